@@ -293,6 +293,7 @@ def create_app(config_name=None):
     from routes.help_routes import help_bp
     from routes.public_files_routes import public_files_bp
     from routes.admin_routes import admin_bp
+    from routes.job_routes import job_bp
     
     app.register_blueprint(list_bp)
     app.register_blueprint(auth_bp)
@@ -304,6 +305,7 @@ def create_app(config_name=None):
     app.register_blueprint(help_bp)
     app.register_blueprint(public_files_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(job_bp)
     
     # Initialize internationalization
     i18n.init_app(app)
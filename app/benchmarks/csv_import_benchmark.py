@@ -0,0 +1,112 @@
+"""
+Measures the CSV import (csv.reader and batched writer) on a generated file
+
+Run from the app directory:
+
+    python -m benchmarks.csv_import_benchmark --rows 1000000
+
+Rows go through DataImporter._process_csv_data as in a real import; the
+database writes are replaced by a writer that only counts the cells, so the
+timings cover reading, column selection and batching.
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+from flask import Flask
+
+from models.data_importer import DataImporter
+from models.data_writer import ListDataWriter
+
+HEADER = ['ip', 'hostname', 'first_seen', 'score', 'country', 'comment']
+COLUMN_TYPES = {'ip': 'ip', 'first_seen': 'date', 'score': 'number'}
+
+
+class _CountingWriter(ListDataWriter):
+    """Writer that drops the batches instead of inserting them"""
+
+    def flush(self):
+        self.cells_written += len(self._buffer)
+        self._buffer = []
+
+
+class _BenchmarkImporter(DataImporter):
+    def __init__(self, list_instance):
+        super().__init__(list_instance)
+        self.logger = logging.getLogger('csv_import_benchmark')
+
+    def _create_data_writer(self, columns):
+        return _CountingWriter(self.list_instance.id, batch_size=self.config.get('batch_size'))
+
+
+def generate_csv(path, rows, seed=42):
+    """Writes a CSV file of rows lines (plus the header)"""
+    rng = random.Random(seed)
+    countries = ['FR', 'DE', 'US', 'GB', 'NL', 'ES']
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(HEADER) + '\n')
+        for i in range(rows):
+            f.write(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255},host-{i}.example.org,"
+                    f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/20{rng.randint(10, 25)},"
+                    f"{rng.randint(0, 1000)}.{rng.randint(0, 99):02d},{rng.choice(countries)},"
+                    f"\"entry {i}, imported\"\n")
+
+
+def build_list(columns_to_import):
+    selected = [HEADER[i] for i in columns_to_import] if columns_to_import else HEADER
+    columns = [
+        SimpleNamespace(name=name, position=position, column_type=COLUMN_TYPES.get(name, 'text'))
+        for position, name in enumerate(selected)
+    ]
+    return SimpleNamespace(
+        id=0,
+        max_results=0,
+        columns=columns,
+        update_config={
+            'source': 'url',
+            'auto_create_columns': False,
+            'csv_config': {'separator': ',', 'has_header': True, 'columns_to_import': columns_to_import}
+        }
+    )
+
+
+def run_import(path, columns_to_import):
+    importer = _BenchmarkImporter(build_list(columns_to_import))
+    started = time.perf_counter()
+    with open(path, encoding='utf-8', newline='') as f:
+        rows = importer._process_csv_data(f)
+    return rows, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--file', help='Existing CSV file with the benchmark header (generated otherwise)')
+    parser.add_argument('--columns', default='0,2,3', help="Indices of columns_to_import ('' = all)")
+    args = parser.parse_args()
+
+    columns_to_import = [int(i) for i in args.columns.split(',') if i.strip()]
+
+    app = Flask(__name__)
+    path = args.file
+    with app.app_context():
+        if not path:
+            fd, path = tempfile.mkstemp(suffix='.csv')
+            os.close(fd)
+            started = time.perf_counter()
+            generate_csv(path, args.rows)
+            print(f"Generated {args.rows} rows ({os.path.getsize(path) / 1e6:.1f} MB) in {time.perf_counter() - started:.1f}s")
+        try:
+            rows, elapsed = run_import(path, columns_to_import)
+            print(f"{rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+        finally:
+            if not args.file:
+                os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Compares the IP list import (streamed, batched) with the former per-line INSERTs
+
+Run from the app directory:
+
+    python -m benchmarks.ip_list_benchmark --lines 1000000 [--database-url mysql+pymysql://...]
+
+Both paths write into the list_data table of the given database (an in-memory
+SQLite database by default). The former path is measured on a sample of
+lines (--legacy-lines) and extrapolated, as it takes minutes on 1M lines.
+"""
+import argparse
+import io
+import random
+import time
+from types import SimpleNamespace
+
+from flask import Flask
+from sqlalchemy import text
+
+from database import db
+from models.api_token import ApiToken  # noqa: F401 (mapped by User relationships)
+from models.list import List
+from models.list_components import ListColumn, ListData
+from models.csv_import_helper import import_ip_file
+
+
+def generate_lines(count, seed=42):
+    """IPv4 addresses with a few CIDR blocks, comments, IPv6 addresses and duplicates"""
+    rng = random.Random(seed)
+    lines = ['# Generated IP feed\n']
+    for i in range(count):
+        if i % 1000 == 0:
+            lines.append(f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.0/24 ; block\n")
+        elif i % 997 == 0:
+            lines.append(f"2001:db8::{i >> 16:x}:{i & 0xffff:x}\n")
+        elif i % 101 == 0 and len(lines) > 1:
+            lines.append(lines[-1])
+        else:
+            lines.append(f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}\n")
+    return ''.join(lines)
+
+
+def legacy_import(list_id, content, limit):
+    """Former import_ip_file loop: one INSERT per line (portable statement, without ON DUPLICATE KEY)"""
+    connection = db.engine.connect()
+    transaction = connection.begin()
+    sql = text("""
+    INSERT INTO list_data (list_id, row_id, column_position, value, created_at, updated_at)
+    VALUES (:list_id, :row_id, :column_position, :value, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+    """)
+    row_count = 0
+    for line in content.strip().split('\n')[:limit]:
+        ip = line.strip()
+        if ip:
+            row_count += 1
+            connection.execute(sql, {'list_id': list_id, 'row_id': row_count, 'column_position': 0, 'value': ip})
+    transaction.rollback()
+    connection.close()
+    return row_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--lines', type=int, default=1000000)
+    parser.add_argument('--legacy-lines', type=int, default=20000)
+    parser.add_argument('--database-url', default='sqlite://')
+    parser.add_argument('--dedupe', action='store_true', help='Remove duplicate addresses')
+    parser.add_argument('--collapse', action='store_true', help='Collapse addresses into CIDR blocks')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database_url
+    db.init_app(app)
+
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=[List.__table__, ListColumn.__table__, ListData.__table__])
+        content = generate_lines(args.lines)
+        print(f"Generated {args.lines} lines ({len(content) / 1e6:.1f} MB)")
+
+        list_obj = SimpleNamespace(id=987654, auto_create_columns=False)
+        csv_config = {'deduplicate_ips': args.dedupe, 'collapse_networks': args.collapse}
+
+        started = time.perf_counter()
+        rows = import_ip_file(list_obj, io.StringIO(content), csv_config)
+        elapsed = time.perf_counter() - started
+        print(f"   batched: {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+        started = time.perf_counter()
+        legacy_rows = legacy_import(list_obj.id + 1, content, args.legacy_lines)
+        legacy_elapsed = time.perf_counter() - started
+        estimate = legacy_elapsed * args.lines / max(legacy_rows, 1)
+        print(f"per-line: {legacy_rows} rows in {legacy_elapsed:.2f}s, ~{estimate:.0f}s estimated for {args.lines} lines")
+
+        db.session.execute(text("DELETE FROM list_data WHERE list_id = :list_id"), {'list_id': list_obj.id})
+        db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+-- Migration SQL: compteur de version des données d'une liste (invalide les index et caches dérivés)
+ALTER TABLE lists
+    ADD COLUMN data_version INT NOT NULL DEFAULT 0;
@@ -0,0 +1,23 @@
+-- Migration SQL : imports manuels exécutés en tâche de fond (progression et annulation)
+CREATE TABLE IF NOT EXISTS import_jobs (
+    id VARCHAR(32) NOT NULL,
+    list_id INT NOT NULL,
+    user_id INT DEFAULT NULL,
+    kind VARCHAR(30) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    phase VARCHAR(30) DEFAULT NULL,
+    bytes_read BIGINT DEFAULT 0,
+    bytes_total BIGINT DEFAULT NULL,
+    rows_written INT DEFAULT 0,
+    rows_total INT DEFAULT NULL,
+    cancel_requested TINYINT(1) NOT NULL DEFAULT 0,
+    message TEXT,
+    result MEDIUMTEXT,
+    created_at DATETIME DEFAULT NULL,
+    started_at DATETIME DEFAULT NULL,
+    updated_at DATETIME DEFAULT NULL,
+    finished_at DATETIME DEFAULT NULL,
+    PRIMARY KEY (id),
+    KEY idx_import_jobs_list_created (list_id, created_at),
+    CONSTRAINT import_jobs_ibfk_1 FOREIGN KEY (list_id) REFERENCES lists (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
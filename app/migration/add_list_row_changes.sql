@@ -0,0 +1,21 @@
+-- Migration SQL : suivi des changements de lignes par version de données (flux delta public)
+CREATE TABLE IF NOT EXISTS list_row_state (
+    list_id INT NOT NULL,
+    row_id INT NOT NULL,
+    row_hash VARCHAR(64) NOT NULL,
+    data_version INT NOT NULL,
+    PRIMARY KEY (list_id, row_id),
+    CONSTRAINT list_row_state_ibfk_1 FOREIGN KEY (list_id) REFERENCES lists (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE IF NOT EXISTS list_row_changes (
+    id BIGINT NOT NULL AUTO_INCREMENT,
+    list_id INT NOT NULL,
+    data_version INT NOT NULL,
+    row_id INT NOT NULL,
+    change_type VARCHAR(10) NOT NULL,
+    created_at DATETIME DEFAULT NULL,
+    PRIMARY KEY (id),
+    KEY idx_row_changes_list_version (list_id, data_version),
+    CONSTRAINT list_row_changes_ibfk_1 FOREIGN KEY (list_id) REFERENCES lists (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,18 @@
+-- Migration SQL : index inversé des valeurs (recherche transverse entre listes)
+CREATE TABLE IF NOT EXISTS list_value_index (
+    id BIGINT NOT NULL AUTO_INCREMENT,
+    value_hash VARCHAR(64) NOT NULL,
+    list_id INT NOT NULL,
+    row_id INT NOT NULL,
+    column_position INT NOT NULL,
+    PRIMARY KEY (id),
+    KEY idx_value_index_hash (value_hash, list_id),
+    KEY idx_value_index_list_row (list_id, row_id),
+    CONSTRAINT list_value_index_ibfk_1 FOREIGN KEY (list_id) REFERENCES lists (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Construction initiale de l'index pour les données existantes
+INSERT INTO list_value_index (value_hash, list_id, row_id, column_position)
+SELECT SHA2(LOWER(TRIM(value)), 256), list_id, row_id, column_position
+FROM list_data
+WHERE value IS NOT NULL AND TRIM(value) <> '';
@@ -0,0 +1,26 @@
+-- Migration SQL : validateurs HTTP des sources (requêtes conditionnelles) et historique des imports
+CREATE TABLE IF NOT EXISTS list_source_state (
+    list_id INT NOT NULL,
+    source_url TEXT,
+    etag VARCHAR(255) DEFAULT NULL,
+    last_modified VARCHAR(64) DEFAULT NULL,
+    content_hash VARCHAR(64) DEFAULT NULL,
+    config_hash VARCHAR(64) DEFAULT NULL,
+    checked_at DATETIME DEFAULT NULL,
+    changed_at DATETIME DEFAULT NULL,
+    PRIMARY KEY (list_id),
+    CONSTRAINT list_source_state_ibfk_1 FOREIGN KEY (list_id) REFERENCES lists (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE IF NOT EXISTS list_update_runs (
+    id BIGINT NOT NULL AUTO_INCREMENT,
+    list_id INT NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    rows_imported INT DEFAULT NULL,
+    message TEXT,
+    started_at DATETIME DEFAULT NULL,
+    duration_ms INT DEFAULT NULL,
+    PRIMARY KEY (id),
+    KEY idx_update_runs_list_started (list_id, started_at),
+    CONSTRAINT list_update_runs_ibfk_1 FOREIGN KEY (list_id) REFERENCES lists (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
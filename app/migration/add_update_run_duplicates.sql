@@ -0,0 +1,3 @@
+-- Migration SQL : nombre de lignes en double écartées par le dédoublonnage à l'import
+ALTER TABLE list_update_runs
+    ADD COLUMN duplicates_dropped INT DEFAULT NULL;
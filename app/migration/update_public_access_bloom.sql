@@ -0,0 +1,5 @@
+-- Migration SQL pour l’export public en filtre de Bloom dans List-IQ
+ALTER TABLE lists
+    ADD COLUMN public_bloom_enabled BOOLEAN DEFAULT FALSE,
+    ADD COLUMN public_bloom_column VARCHAR(255),
+    ADD COLUMN public_bloom_fp_rate DOUBLE DEFAULT 0.001;
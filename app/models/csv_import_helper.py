@@ -5,12 +5,15 @@ CSV import helper module for the List model
 """
 import csv
 import io
+import itertools
 import json
 from typing import Dict, Any, List
 from flask import current_app
 from models.list import ListColumn, ListData
+from models.data_writer import ListDataWriter
 from database import db
 from sqlalchemy import text
+from utils.ip_lines import DEFAULT_LINE_BATCH_SIZE, InvalidIPLine, collapse_networks, iter_ip_batches
 
 def read_csv_with_config(file_obj, csv_config=None, list_obj=None):
     """
@@ -143,13 +146,20 @@ def import_ip_file(list_obj, content, csv_config):
     """
     Special function to import a file of IP addresses
     
+    Every value must be an address or a network: on the first other value, the
+    import is rolled back and InvalidIPLine is raised, so that the caller can
+    import the file as a regular CSV file instead.
+    
     Args:
         list_obj: The List object to import data into
-        content: The file content
-        csv_config: The CSV configuration
+        content: The file content, as text or as a text stream
+        csv_config: The CSV configuration (deduplicate_ips, collapse_networks)
         
     Returns:
         The number of imported rows
+    
+    Raises:
+        InvalidIPLine: A line is not an IP address or network
     """
     current_app.logger.info("Using special method to import IP address file")
     
@@ -180,86 +190,57 @@ def import_ip_file(list_obj, content, csv_config):
             position=0,  # Always position 0 for IP address files
             column_type=col_type
         )
+        # Committed with the rows, so that a file which is not an IP file leaves no column behind
         db.session.add(new_column)
-        db.session.commit()
+        db.session.flush()
         current_app.logger.info(f"Column created for IP addresses: {column_name} (type: {col_type}, position: 0)")
         column = new_column
     else:
         column = existing_column
     
-    # Delete existing data
-    try:
-        count_before = db.session.query(ListData).filter(ListData.list_id == list_obj.id).count()
-        current_app.logger.info(f"Deleting existing data: {count_before} rows found")
-        
-        db.session.query(ListData).filter(ListData.list_id == list_obj.id).delete()
-        db.session.commit()
-        current_app.logger.info("Existing data deleted successfully")
-    except Exception as e:
-        current_app.logger.error(f"Error while deleting existing data: {str(e)}")
-        db.session.rollback()
+    # Delete existing data (committed with the new rows)
+    db.session.query(ListData).filter(ListData.list_id == list_obj.id).delete(synchronize_session=False)
     
-    # Import IP addresses line by line
-    lines = content.strip().split('\n')
-    row_count = 0
-    connection = db.engine.connect()
-    transaction = connection.begin()
+    if isinstance(content, str):
+        content = io.StringIO(content)
+    content.seek(0)
+    
+    # Stream the lines, normalize the addresses per batch and write them with multi-row INSERTs
+    # A single column: the list's row deduplication amounts to the address deduplication
+    list_config = getattr(list_obj, 'update_config', None) or {}
+    deduplicate = bool(csv_config.get('deduplicate_ips', False) or list_config.get('deduplicate_rows', False))
+    collapse = bool(csv_config.get('collapse_networks', False))
+    batch_size = current_app.config.get('IP_IMPORT_BATCH_SIZE', DEFAULT_LINE_BATCH_SIZE)
+    writer = ListDataWriter(list_obj.id, batch_size=batch_size)
+    stats = {}
     
     try:
-        for line in lines:
-            ip = line.strip()
-            if ip:  # Ignore empty lines
-                row_id = row_count + 1
-                
-                # Debugging to understand the retrieved values
-                if row_count < 3:  # Limit the number of logs to avoid overload
-                    current_app.logger.info(f"Line {row_id}, IP address: '{ip}'")
-                
-                # Insert directly into the database
-                sql = text("""
-                INSERT INTO list_data (list_id, row_id, column_position, value, created_at, updated_at)
-                VALUES (:list_id, :row_id, :column_position, :value, NOW(), NOW())
-                ON DUPLICATE KEY UPDATE value = VALUES(value), updated_at = NOW()
-                """)
-                
-                connection.execute(
-                    sql, 
-                    {
-                        'list_id': list_obj.id,
-                        'row_id': row_id,
-                        'column_position': 0,  # Always position 0 for IP address files
-                        'value': ip
-                    }
-                )
-                
-                row_count += 1
-                
-                # Progress log
-                if row_count % 100 == 0:
-                    current_app.logger.info(f"{row_count} rows processed")
-        
-        # Commit the transaction
-        transaction.commit()
-        
-        # Check the total number of entries after import
-        count_sql = text("SELECT COUNT(*) FROM list_data WHERE list_id = :list_id")
-        count_result = connection.execute(count_sql, {'list_id': list_obj.id}).scalar()
+        batches = iter_ip_batches(content, batch_size=batch_size, deduplicate=deduplicate or collapse,
+                                  stats=stats, strict=True)
+        if collapse:
+            # Aggregation needs every address: the collapsed blocks are written at the end
+            batches = [list(collapse_networks(itertools.chain.from_iterable(batches)))]
         
-        current_app.logger.info(f"Import finished. {row_count} rows imported, {count_result} entries in the database")
-        return row_count
-    
+        row_count = 0
+        for values in batches:
+            # Always position 0 for IP address files
+            writer.add_columns(row_count + 1, [(0, values)])
+            row_count += len(values)
+        writer.close()
+        db.session.commit()
+    except InvalidIPLine as e:
+        db.session.rollback()
+        current_app.logger.info(f"Not an IP address file ({str(e)}), import cancelled")
+        raise
     except Exception as e:
+        db.session.rollback()
         current_app.logger.error(f"Error during IP address import: {str(e)}")
-        
-        # Rollback the transaction in case of error
-        if transaction.is_active:
-            transaction.rollback()
-        
         # Reraise the exception for upstream error handling
         raise
-    finally:
-        # Close the connection
-        connection.close()
+    
+    current_app.logger.info(f"Import finished. {stats.get('lines', 0)} lines read, {stats.get('duplicates', 0)} duplicates removed, "
+                            f"{row_count} rows imported" + (" (networks collapsed)" if collapse else ""))
+    return row_count
 
 def import_csv_data(list_obj, stream, config: Dict[str, Any]) -> int:
     """
@@ -293,9 +274,13 @@ def import_csv_data(list_obj, stream, config: Dict[str, Any]) -> int:
         has_headers = csv_config.get('has_headers', csv_config.get('has_header', True))
         columns_to_import = csv_config.get('columns_to_import', [])
         
-        # Check if we have an IP address file
+        # Check if we have an IP address file (only the first non-empty line is needed)
         stream.seek(0)
-        content = stream.read()
+        first_line = ''
+        for line in stream:
+            first_line = line.strip()
+            if first_line:
+                break
         stream.seek(0)
         
         # Special detection for IP address files - only if no specific separator is configured
@@ -304,20 +289,21 @@ def import_csv_data(list_obj, stream, config: Dict[str, Any]) -> int:
         # Only perform IP address detection if the default separator (comma) is used
         # or if the file is treated as a simple text file (no separator)
         if delimiter == ',' or not csv_config.get('separator'):
-            lines = content.strip().split('\n')
-            if len(lines) > 0:
-                first_line = lines[0].strip()
-                # Check if the first line looks like an IP address
-                if '.' in first_line and not has_headers and len(first_line.split('.')) == 4:
-                    # Check if all parts are digits
-                    parts = first_line.split('.')
-                    if all(part.isdigit() for part in parts):
-                        is_ip_file = True
-                        current_app.logger.info(f"Detected an IP address file, special handling")
+            # Check if the first line looks like an IP address
+            if '.' in first_line and not has_headers and len(first_line.split('.')) == 4:
+                # Check if all parts are digits
+                parts = first_line.split('.')
+                if all(part.isdigit() for part in parts):
+                    is_ip_file = True
+                    current_app.logger.info(f"Detected an IP address file, special handling")
         
         # If it is an IP address file AND no specific separator is configured, special handling
         if is_ip_file and delimiter == ',':
-            return import_ip_file(list_obj, content, csv_config)
+            try:
+                return import_ip_file(list_obj, stream, csv_config)
+            except InvalidIPLine:
+                # Only the first line was an address: import every line as it is
+                current_app.logger.info("The file is not only made of IP addresses, using standard CSV processing")
         
         # If a specific separator is configured (like tab), use that separator even for IP addresses
         if is_ip_file and delimiter != ',':
@@ -3,14 +3,32 @@ from flask import current_app
 import requests
 import json
 import csv
-import io
-import subprocess
+import itertools
+import operator
+import time
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List as TypeList
+from typing import Dict, Any, Iterable, Optional, List as TypeList
 from sqlalchemy.exc import SQLAlchemyError
 
 from .list_components import ListColumn, ListData
+from .data_writer import ListDataWriter, DEFAULT_BATCH_SIZE, create_deduplicator
 from database import db
+from utils.stream_utils import open_text_stream, iter_response_text, peek_prefix, SNIFF_PREFIX_SIZE
+from utils.json_stream import JSONPathFanOut, iter_json_records
+from utils.json_path import MISSING, DottedPath, compile_json_path
+from utils.json_projection import column_paths, root_keys
+from services.source_fetch_service import (
+    SpooledResponse, DEFAULT_SPOOL_MAX_MEMORY, compute_config_hash, conditional_headers,
+    get_source_state, is_unchanged, mark_source_checked, save_source_state
+)
+from services.http_client import get_http_settings, http_get
+from services.shared_fetch_service import SharedBody, shared_fetch, source_key
+from services.internal_source_service import column_mapping, copy_list_rows, resolve_source_list, source_fingerprint
+from services.curl_client import DEFAULT_CURL_TIMEOUT, UnsupportedCurlCommand, parse_curl_command, run_curl_process
+from services.update_history_service import record_run, RUN_SUCCESS, RUN_SKIPPED, RUN_ERROR
+
+# Declared payload size from which JSON sources are parsed incrementally
+DEFAULT_JSON_STREAM_MIN_BYTES = 20 * 1024 * 1024
 
 try:
     from app.utils.date_utils import get_paris_now
@@ -22,6 +40,13 @@ class DataImporter:
         self.list_instance = list_instance
         self.config = list_instance.update_config
         self.logger = current_app.logger
+        # Set when the source did not need to be imported (unchanged, too recent)
+        self.skip_reason = None
+        # Validators of the fetched URL source, saved with the imported data
+        self._pending_source_state = None
+        self._not_modified_headers = None
+        # Rows dropped by the import-time deduplication (deduplicate_rows)
+        self.duplicates_dropped = 0
 
     def import_data(self, force_update=False) -> Optional[int]:
         source = self.config.get('source')
@@ -29,23 +54,50 @@ class DataImporter:
         lines_imported = None
 
         self.logger.info(f"List {self.list_instance.id}: Starting import. Source: {source}, API Type: {api_type}")
+        started_at = datetime.now(timezone.utc)
+        started = time.monotonic()
 
         try:
             self._clear_existing_data()
 
-            if source == 'url':
+            # Another list of the application, configured as such or through its public JSON URL
+            source_list = resolve_source_list(self.config) if source in ('list', 'url') else None
+            if source_list is not None:
+                lines_imported = self._import_data_from_internal_list(source_list, force_update=force_update)
+            elif source == 'url':
                 lines_imported = self._import_data_from_url_source(force_update=force_update)
             elif source == 'curl' or (source == 'api' and api_type == 'curl'):
-                lines_imported = self._import_data_from_api_curl_source()
+                lines_imported = self._import_data_from_api_curl_source(force_update=force_update)
             else:
                 self.logger.warning(f"List {self.list_instance.id}: Unsupported import source '{source}'.")
                 return None
 
             if lines_imported is not None:
                 self.list_instance.last_update = get_paris_now()
+                self.list_instance.bump_data_version()
                 db.session.add(self.list_instance)
+                if self._pending_source_state:
+                    save_source_state(self.list_instance.id, config_hash=compute_config_hash(self.list_instance),
+                                      **self._pending_source_state)
                 db.session.commit()
                 self.logger.info(f"List {self.list_instance.id}: Import successful, {lines_imported} lines imported. Last update set.")
+                if self.duplicates_dropped:
+                    self.logger.info(f"List {self.list_instance.id}: {self.duplicates_dropped} duplicate rows dropped.")
+                record_run(self.list_instance.id, RUN_SUCCESS, rows_imported=lines_imported,
+                           duplicates_dropped=self.duplicates_dropped if self.config.get('deduplicate_rows') else None,
+                           started_at=started_at, duration_ms=self._elapsed_ms(started))
+
+                # Refresh the indexes derived from the list's data
+                from services.data_change_service import on_list_data_changed
+                on_list_data_changed(self.list_instance)
+            elif self.skip_reason:
+                # Keep the current data: undo the clearing done before the fetch
+                db.session.rollback()
+                self.logger.info(f"List {self.list_instance.id}: Import skipped ({self.skip_reason}).")
+                mark_source_checked(self.list_instance.id, self._not_modified_headers)
+                db.session.commit()
+                record_run(self.list_instance.id, RUN_SKIPPED, message=self.skip_reason,
+                           started_at=started_at, duration_ms=self._elapsed_ms(started))
             else:
                 self.logger.info(f"List {self.list_instance.id}: Import returned no lines or was cancelled.")
             
@@ -54,8 +106,14 @@ class DataImporter:
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"List {self.list_instance.id}: Major error during import_data: {e}", exc_info=True)
+            record_run(self.list_instance.id, RUN_ERROR, message=str(e),
+                       started_at=started_at, duration_ms=self._elapsed_ms(started))
             return None
 
+    @staticmethod
+    def _elapsed_ms(started: float) -> int:
+        return int((time.monotonic() - started) * 1000)
+
     def _clear_existing_data(self) -> None:
         self.logger.info(f"List {self.list_instance.id}: Clearing existing data and columns.")
         try:
@@ -127,16 +185,8 @@ class DataImporter:
             except json.JSONDecodeError:
                 self.logger.warning(f"List {self.list_instance.id}: Could not decode selected columns: {self.list_instance.json_selected_columns}")
         
-        # Create a set of selected column names for faster lookup
-        selected_column_names = {col['name'] for col in selected_columns} if selected_columns else set()
-        
         new_column_objects = []
-        for key in sample_item.keys():
-            # If columns are selected, only create those
-            if selected_column_names and key not in selected_column_names:
-                self.logger.info(f"List {self.list_instance.id}: Column {key} ignored as it was not selected in the JSON configuration")
-                continue
-                
+        for key in self._json_column_names(sample_item, selected_columns):
             if key not in existing_columns_map:
                 current_max_position += 1
                 # Look for the column type in the selected columns
@@ -201,8 +251,6 @@ class DataImporter:
             except json.JSONDecodeError:
                 self.logger.warning(f"List {self.list_instance.id}: Could not decode selected columns: {self.list_instance.json_selected_columns}")
         
-        # Create a set of selected column names for faster lookup
-        selected_column_names = {col['name'] for col in selected_columns} if selected_columns else set()
 
         # This fallback uses direct SQL, which is generally discouraged if ORM can be used.
         # However, porting as-is first.
@@ -216,12 +264,7 @@ class DataImporter:
             current_position = (current_max_position_query or -1) + 1
             
             new_cols_added_count = 0
-            for key in sample_item.keys():
-                # If columns are selected, only create those
-                if selected_column_names and key not in selected_column_names:
-                    self.logger.info(f"List {self.list_instance.id}: Column {key} ignored as it was not selected in the JSON configuration (fallback)")
-                    continue
-                    
+            for key in self._json_column_names(sample_item, selected_columns):
                 if key not in existing_column_names:
                     # Look for the column type in the selected columns
                     column_type = 'text'
@@ -251,95 +294,161 @@ class DataImporter:
         finally:
             conn.close()
 
+    def _json_column_names(self, sample_item: Dict[str, Any], selected_columns: TypeList[Dict[str, Any]]) -> TypeList[str]:
+        """Names of the columns to create from a sample item: the selected columns found in it, or all its keys"""
+        paths = column_paths(selected_columns)
+        if not paths:
+            return list(sample_item.keys())
+        return [name for name, path in paths if path.search(sample_item) is not MISSING]
+
     def _create_columns_from_json(self, json_obj_list: TypeList[Dict[str, Any]]) -> bool:
         if self._create_columns_from_json_direct(json_obj_list):
             return True
         self.logger.warning(f"List {self.list_instance.id}: Direct column creation from JSON failed, trying fallback.")
         return self._create_columns_fallback(json_obj_list)
 
-    def _import_rows_from_json(self, json_data_list: TypeList[Dict[str, Any]], columns_map: Dict[str, ListColumn]) -> int:
-        if not isinstance(json_data_list, list):
+    def _import_rows_from_json(self, json_data_list: Iterable[Dict[str, Any]], columns_map: Dict[str, ListColumn]) -> int:
+        # Accepts a list or a lazy iterator of records (streamed JSON)
+        if isinstance(json_data_list, (str, bytes, dict)) or not hasattr(json_data_list, '__iter__'):
             self.logger.error(f"List {self.list_instance.id}: JSON data for row import is not a list.")
             return 0
 
-        # Check if specific columns were selected in the JSON configuration
-        selected_column_names = set()
-        selected_columns_config = []
-        if hasattr(self.list_instance, 'json_selected_columns') and self.list_instance.json_selected_columns:
-            try:
-                selected_columns_config = json.loads(self.list_instance.json_selected_columns)
-                selected_column_names = {col['name'] for col in selected_columns_config}
-                self.logger.info(f"List {self.list_instance.id}: Importing data only for selected columns: {selected_column_names}")
-            except json.JSONDecodeError:
-                self.logger.warning(f"List {self.list_instance.id}: Could not decode selected columns: {self.list_instance.json_selected_columns}")
-
-        # Log available columns in columns_map for debugging
-        self.logger.info(f"List {self.list_instance.id}: Available columns in columns_map: {list(columns_map.keys())}")
-        
-        # Check if the selected columns exist in columns_map
-        if selected_column_names:
-            missing_columns = selected_column_names - set(columns_map.keys())
+        # Selected columns are compiled once into (getter, column position) pairs:
+        # only the chosen keys (or nested paths) of each item are read
+        selected_paths = self._get_selected_json_paths()
+        targets = []
+        if selected_paths:
+            self.logger.info(f"List {self.list_instance.id}: Importing data only for selected columns: {[name for name, _ in selected_paths]}")
+            missing_columns = [name for name, _ in selected_paths if name not in columns_map]
             if missing_columns:
                 self.logger.warning(f"List {self.list_instance.id}: Some selected columns do not exist in columns_map: {missing_columns}")
-            
-            available_selected_columns = selected_column_names.intersection(set(columns_map.keys()))
-            self.logger.info(f"List {self.list_instance.id}: Available selected columns: {available_selected_columns}")
+            targets = [(path.search, columns_map[name].position) for name, path in selected_paths if name in columns_map]
+        else:
+            self.logger.info(f"List {self.list_instance.id}: Available columns in columns_map: {list(columns_map.keys())}")
+        positions = {name: column.position for name, column in columns_map.items()}
+        unknown_keys = set()
         
         # Apply row limit if configured
         max_results = getattr(self.list_instance, 'max_results', 0)
-        if max_results > 0 and len(json_data_list) > max_results:
-            self.logger.info(f"List {self.list_instance.id}: Limiting to {max_results} rows out of {len(json_data_list)} available")
-            json_data_list = json_data_list[:max_results]
+        if max_results > 0:
+            self.logger.info(f"List {self.list_instance.id}: Limiting to {max_results} rows")
+            json_data_list = itertools.islice(json_data_list, max_results)
         
         # Prepare data for insertion
-        new_data_items = []
-        rows_imported_count = 0
+        writer = self._create_data_writer(columns_map.values())
         
         for row_index, item in enumerate(json_data_list):
             if not isinstance(item, dict):
                 self.logger.warning(f"List {self.list_instance.id}: Item at index {row_index} is not a dict, skipping.")
                 continue
-                
-            has_data_for_row = False
             
-            # Log available keys in this item for debugging
-            self.logger.info(f"List {self.list_instance.id}: Available keys in item {row_index}: {list(item.keys())}")
+            if selected_paths:
+                row_cells = []
+                for get, position in targets:
+                    value = get(item)
+                    if value is not MISSING:
+                        row_cells.append((position, value))
+            else:
+                row_cells = []
+                for col_name, value in item.items():
+                    position = positions.get(col_name)
+                    if position is not None:
+                        row_cells.append((position, value))
+                    elif col_name not in unknown_keys:
+                        unknown_keys.add(col_name)
+                        self.logger.warning(f"List {self.list_instance.id}: Column '{col_name}' not found in columns_map")
             
-            for col_name, value in item.items():
-                # If specific columns were selected, ignore the others
-                if selected_column_names and col_name not in selected_column_names:
-                    continue
-                    
-                column = columns_map.get(col_name)
-                if column:
-                    # Convert the value to a string if necessary
-                    if isinstance(value, (dict, list)):
-                        value = json.dumps(value)
-                    
-                    self.logger.info(f"List {self.list_instance.id}: Adding value for column '{col_name}'")
-                    new_data_items.append(ListData(
-                        list_id=self.list_instance.id,
-                        row_id=row_index, 
-                        column_position=column.position,
-                        value=str(value) if value is not None else None
-                    ))
-                    has_data_for_row = True
-                else:
-                    self.logger.warning(f"List {self.list_instance.id}: Column '{col_name}' not found in columns_map")
+            # Nested values are stored as JSON text
+            row_cells = [(position, json.dumps(value) if isinstance(value, (dict, list)) else value)
+                         for position, value in row_cells]
             
-            if has_data_for_row:
-                rows_imported_count += 1
+            if writer.add_row(row_index, row_cells):
                 if row_index < 3:  # Log only the first few rows to avoid log flooding
                     self.logger.info(f"List {self.list_instance.id}: Row {row_index} imported successfully")
-            else:
+            elif not row_cells:
                 self.logger.warning(f"List {self.list_instance.id}: No data imported for row {row_index}")
         
-        if new_data_items:
-            db.session.bulk_save_objects(new_data_items)
-            # No commit here
-        self.logger.info(f"List {self.list_instance.id}: Prepared {len(new_data_items)} data cells for {rows_imported_count} rows from JSON data.")
+        # No commit here
+        rows_imported_count = writer.close()
+        self.duplicates_dropped += writer.duplicates_dropped
+        self.logger.info(f"List {self.list_instance.id}: Imported {writer.cells_written} data cells for {rows_imported_count} rows from JSON data.")
         return rows_imported_count
 
+    def _get_json_data_path(self) -> str:
+        if hasattr(self.list_instance, 'json_data_path') and self.list_instance.json_data_path:
+            return self.list_instance.json_data_path
+        return self.config.get('json_data_path', '')
+
+    def _get_selected_json_paths(self) -> TypeList[tuple]:
+        """(column name, compiled path) pairs of the selected JSON columns, empty when all columns are imported"""
+        if not getattr(self.list_instance, 'json_selected_columns', None):
+            return []
+        try:
+            return column_paths(json.loads(self.list_instance.json_selected_columns))
+        except (json.JSONDecodeError, TypeError):
+            self.logger.warning(f"List {self.list_instance.id}: Could not decode selected columns: {self.list_instance.json_selected_columns}")
+            return []
+
+    def _use_json_streaming(self, response) -> bool:
+        if not hasattr(response, 'iter_content'):
+            return False
+        # The streaming parser only follows dotted paths, expressions need the whole document
+        if not isinstance(compile_json_path(self._get_json_data_path()), DottedPath):
+            return False
+        # Explicit per-list setting first, then automatic for large declared payloads
+        json_streaming = self.config.get('json_streaming')
+        if json_streaming is not None:
+            return bool(json_streaming)
+        # A capped import only parses the records it keeps
+        if (getattr(self.list_instance, 'max_results', 0) or 0) > 0:
+            return True
+        try:
+            content_length = int(response.headers.get('Content-Length', 0))
+        except (TypeError, ValueError):
+            return False
+        return content_length >= current_app.config.get('JSON_STREAM_MIN_BYTES', DEFAULT_JSON_STREAM_MIN_BYTES)
+
+    def _process_json_stream(self, response) -> Optional[int]:
+        """
+        Imports JSON records while the document is being read
+
+        Only the records at json_data_path are decoded, restricted to the selected
+        columns, and reading stops as soon as max_results records were produced.
+        A path reading a key in every element of an array is only resolved on the
+        whole document: the body is then imported by _process_json_data.
+
+        Args:
+            response: Downloaded response (SpooledResponse, SharedBodyResponse), replayable
+        """
+        data_path = self._get_json_data_path()
+        selected_paths = self._get_selected_json_paths()
+        # Only the top-level keys holding the selected columns are decoded
+        selected_column_names = sorted(root_keys(selected_paths) or [])
+        max_results = getattr(self.list_instance, 'max_results', 0) or 0
+        self.logger.info(f"List {self.list_instance.id}: Streaming JSON import (path: '{data_path}', selected columns: {selected_column_names or 'all'}, limit: {max_results or 'none'})")
+
+        # Ensure the data format is set to JSON
+        if hasattr(self.list_instance, 'data_source_format'):
+            self.list_instance.data_source_format = 'json'
+            db.session.flush()
+
+        records = iter_json_records(iter_response_text(response), data_path, selected_column_names, max_results)
+        try:
+            first_record = next(records, None)
+        except JSONPathFanOut as e:
+            self.logger.info(f"List {self.list_instance.id}: {e}, parsing the whole document")
+            return self._process_json_data(response.json())
+        if first_record is None:
+            self.logger.error(f"List {self.list_instance.id}: Empty JSON data after path navigation")
+            return 0
+
+        # Columns are created from the first record, the rest of the document is still unread
+        if not self.list_instance.columns or getattr(self.list_instance, 'auto_create_columns', True):
+            self._create_columns_from_json_direct([first_record])
+
+        columns_map = {col.name: col for col in self.list_instance.columns}
+        return self._import_rows_from_json(itertools.chain([first_record], records), columns_map)
+
     def _process_json_data(self, json_input: Any) -> Optional[int]:
         if isinstance(json_input, str):
             try:
@@ -379,32 +488,10 @@ class DataImporter:
         
         records_list = json_data_parsed
         if data_path:
-            try:
-                # Process the path part by part
-                path_parts = [part for part in data_path.split('.') if part]  # Filter out empty parts
-                self.logger.info(f"List {self.list_instance.id}: Path parts: {path_parts}")
-                
-                for key_part in path_parts:
-                    if isinstance(records_list, dict):
-                        if key_part in records_list:
-                            records_list = records_list[key_part]
-                            self.logger.info(f"List {self.list_instance.id}: Navigating path: '{key_part}' (type: dict)")
-                        else:
-                            available_keys = list(records_list.keys())
-                            self.logger.error(f"List {self.list_instance.id}: Key '{key_part}' not found in dictionary. Available keys: {available_keys}")
-                            raise KeyError(f"Path part '{key_part}' not found in dictionary. Available keys: {available_keys}")
-                    elif isinstance(records_list, list):
-                        if key_part.isdigit() and int(key_part) < len(records_list):
-                            records_list = records_list[int(key_part)]
-                            self.logger.info(f"List {self.list_instance.id}: Navigating path: '{key_part}' (type: list)")
-                        else:
-                            self.logger.error(f"List {self.list_instance.id}: Index '{key_part}' invalid for a list of size {len(records_list)}")
-                            raise IndexError(f"Path part '{key_part}' is an invalid index for list of size {len(records_list)}.")
-                    else:
-                        self.logger.error(f"List {self.list_instance.id}: Cannot navigate path part '{key_part}'. Current type: {type(records_list)}")
-                        raise TypeError(f"Cannot navigate path part '{key_part}' on type {type(records_list)}.")
-            except (KeyError, IndexError, TypeError) as e:
-                self.logger.error(f"List {self.list_instance.id}: json_data_path '{data_path}' not found in JSON structure: {e}")
+            # Compiled once per expression (dotted path, JMESPath or JSONPath)
+            records_list = compile_json_path(data_path).search(json_data_parsed)
+            if records_list is MISSING:
+                self.logger.error(f"List {self.list_instance.id}: json_data_path '{data_path}' not found in JSON structure")
                 # Show JSON structure to help with debugging
                 if isinstance(json_data_parsed, dict):
                     self.logger.error(f"List {self.list_instance.id}: Root JSON structure (keys): {list(json_data_parsed.keys())}")
@@ -412,10 +499,7 @@ class DataImporter:
                     self.logger.error(f"List {self.list_instance.id}: Root JSON structure: list of {len(json_data_parsed)} elements")
                     if isinstance(json_data_parsed[0], dict):
                         self.logger.error(f"List {self.list_instance.id}: First element (keys): {list(json_data_parsed[0].keys())}")
-                raise
-                if isinstance(json_data_parsed, dict):
-                    self.logger.error(f"List {self.list_instance.id}: Available root JSON keys: {list(json_data_parsed.keys())}")
-                raise ValueError(f"json_data_path '{data_path}' not found: {str(e)}") from e
+                raise ValueError(f"json_data_path '{data_path}' not found in JSON structure")
 
         # Check if records_list is empty
         if records_list is None:
@@ -528,99 +612,101 @@ class DataImporter:
         return final_columns_map
 
     def _import_rows_from_csv(self, csv_reader: csv.reader, header_row: TypeList[str], columns_map: Dict[str, ListColumn]) -> int:
-        rows_imported_count = 0
-        new_data_items = []
-        header_to_index = {name.strip(): i for i, name in enumerate(header_row)}
-        
-        # Check if we have a CSV configuration with specific columns to import
-        csv_config = self.config.get('csv_config', {})
-        columns_to_import = csv_config.get('columns_to_import', [])
+        column_indices = self._csv_column_indices(header_row)
         
         # Get the configured row limit
         max_results = getattr(self.list_instance, 'max_results', 0)
         if max_results > 0:
             self.logger.info(f"List {self.list_instance.id}: Limit configured to {max_results} rows for CSV import")
         
-        # Create a mapping between column indices and column names
-        column_indices = {}
-        if columns_to_import:
-            for col_idx in columns_to_import:
-                if isinstance(col_idx, int) and 0 <= col_idx < len(header_row):
-                    col_name = header_row[col_idx].strip()
-                    if col_name:
-                        column_indices[col_name] = col_idx
-        
-        # Counter for the row limit
-        row_count = 0
+        # Resolve (source index, column position) pairs once instead of per row
+        cell_mapping = [
+            (column_indices[col_name], column_obj.position)
+            for col_name, column_obj in columns_map.items()
+            if col_name in column_indices
+        ]
+        if not cell_mapping:
+            return 0
+        # Complete rows only go through one compiled getter of the selected fields
+        positions = [position for _, position in cell_mapping]
+        extract = operator.itemgetter(*[col_idx for col_idx, _ in cell_mapping])
+        if len(cell_mapping) == 1:
+            single = extract
+            extract = lambda row: (single(row),)
+        min_length = max(col_idx for col_idx, _ in cell_mapping) + 1
         
+        writer = self._create_data_writer(columns_map.values())
         for row_index, row_values in enumerate(csv_reader):
             # Check if we have reached the configured limit
-            if max_results > 0 and row_count >= max_results:
+            if max_results > 0 and writer.rows_written >= max_results:
                 self.logger.info(f"List {self.list_instance.id}: Limit of {max_results} rows reached, stopping CSV import")
                 break
-                
-            has_data_for_row = False
             
-            # If we have specific columns to import, only use those
-            if columns_to_import:
-                for col_name, column_obj in columns_map.items():
-                    # Check if this column is in our filtered list
-                    if col_name in column_indices:
-                        col_idx = column_indices[col_name]
-                        if col_idx < len(row_values):
-                            value = row_values[col_idx]
-                            new_data_items.append(ListData(
-                                list_id=self.list_instance.id,
-                                row_id=row_index,
-                                column_position=column_obj.position,
-                                value=str(value) if value is not None else None
-                            ))
-                            has_data_for_row = True
+            if len(row_values) >= min_length:
+                writer.add_row(row_index, zip(positions, extract(row_values)))
             else:
-                # Default behavior: import all columns
-                for col_name, column_obj in columns_map.items():
-                    col_idx = header_to_index.get(col_name)
-                    if col_idx is not None and col_idx < len(row_values):
-                        value = row_values[col_idx]
-                        new_data_items.append(ListData(
-                            list_id=self.list_instance.id,
-                            row_id=row_index,
-                            column_position=column_obj.position,
-                            value=str(value) if value is not None else None
-                        ))
-                        has_data_for_row = True
-            
-            if has_data_for_row:
-                rows_imported_count += 1
-                row_count += 1
+                # Short row: only the fields it has
+                row_length = len(row_values)
+                writer.add_row(row_index, (
+                    (position, row_values[col_idx])
+                    for col_idx, position in cell_mapping
+                    if col_idx < row_length
+                ))
         
-        if new_data_items:
-            db.session.bulk_save_objects(new_data_items)
-        self.logger.info(f"List {self.list_instance.id}: Prepared {len(new_data_items)} data cells for {rows_imported_count} rows from CSV data.")
+        rows_imported_count = writer.close()
+        self.duplicates_dropped += writer.duplicates_dropped
+        self.logger.info(f"List {self.list_instance.id}: Imported {writer.cells_written} data cells for {rows_imported_count} rows from CSV data.")
         return rows_imported_count
 
-    def _process_csv_data(self, csv_content_stream: io.StringIO) -> Optional[int]:
+    def _csv_column_indices(self, header_row: TypeList[str]) -> Dict[str, int]:
+        """Maps the names of the CSV columns to import (csv_config columns_to_import, all by default) to their index"""
+        columns_to_import = self.config.get('csv_config', {}).get('columns_to_import', [])
+        if not columns_to_import:
+            # Default behavior: import all columns
+            return {name.strip(): i for i, name in enumerate(header_row)}
+        
+        column_indices = {}
+        for col_idx in columns_to_import:
+            if isinstance(col_idx, int) and 0 <= col_idx < len(header_row):
+                col_name = header_row[col_idx].strip()
+                if col_name:
+                    column_indices[col_name] = col_idx
+        return column_indices
+
+    def _create_data_writer(self, columns: Iterable[ListColumn]) -> ListDataWriter:
+        """Writer of the imported rows, deduplicating them when the list asks for it"""
+        batch_size = self.config.get('batch_size') or current_app.config.get('IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        deduplicator = create_deduplicator(self.list_instance.id, self.config, columns)
+        return ListDataWriter(self.list_instance.id, batch_size=batch_size, deduplicator=deduplicator)
+
+    def _process_csv_data(self, csv_content_stream) -> Optional[int]:
+        """
+        Imports CSV data read line by line
+
+        Args:
+            csv_content_stream: Any iterable of text lines (StringIO, streamed HTTP response lines)
+        """
         # Get the CSV configuration
         csv_config = self.config.get('csv_config', {})
         
+        # Keep a bounded prefix for dialect detection and chain it back in front of the stream
+        sniff_sample, csv_lines = peek_prefix(csv_content_stream, SNIFF_PREFIX_SIZE)
+        
         # Strictly use the configured separator if it exists
         if 'separator' in csv_config and csv_config['separator']:
             separator = csv_config['separator']
             self.logger.info(f"List {self.list_instance.id}: Strictly using configured separator: '{separator}' (ASCII code: {ord(separator)})")
-            csv_content_stream.seek(0)
-            csv_reader_obj = csv.reader(csv_content_stream, delimiter=separator)
+            csv_reader_obj = csv.reader(csv_lines, delimiter=separator)
         else:
             # Only if no separator is configured, use automatic detection
             try:
                 # Attempt to sniff the dialect
-                dialect = csv.Sniffer().sniff(csv_content_stream.read(1024*5)) # Read more data for sniffing
-                csv_content_stream.seek(0) # Rewind stream after sniffing
-                csv_reader_obj = csv.reader(csv_content_stream, dialect)
+                dialect = csv.Sniffer().sniff(sniff_sample)
+                csv_reader_obj = csv.reader(csv_lines, dialect)
                 self.logger.info(f"List {self.list_instance.id}: CSV dialect sniffed: delimiter='{dialect.delimiter}', quotechar='{dialect.quotechar}'.") 
             except Exception as e:
                 self.logger.warning(f"List {self.list_instance.id}: Could not sniff CSV dialect, falling back to default (comma, doublequote). Error: {e}")
-                csv_content_stream.seek(0)
-                csv_reader_obj = csv.reader(csv_content_stream) # Default dialect
+                csv_reader_obj = csv.reader(csv_lines) # Default dialect
 
         # Check if the file has a header or if we should use custom names
         has_header = csv_config.get('has_header', True)
@@ -643,9 +729,8 @@ class DataImporter:
             try:
                 # Read the first data row to determine the number of columns
                 first_row = next(csv_reader_obj)
-                # Go back to the beginning of the file for import
-                csv_content_stream.seek(0)
-                csv_reader_obj = csv.reader(csv_content_stream, delimiter=csv_config.get('separator', ','))
+                # Put the row back in front of the remaining rows for import
+                csv_reader_obj = itertools.chain([first_row], csv_reader_obj)
                 
                 # Determine column names
                 if custom_column_names and len(custom_column_names) > 0:
@@ -676,6 +761,42 @@ class DataImporter:
 
         return self._import_rows_from_csv(csv_reader_obj, header_row, columns_map)
 
+    def _import_data_from_internal_list(self, source_list, force_update=False) -> Optional[int]:
+        """
+        Imports the rows of another list of the application, copied inside the database
+
+        Selected columns reading a top-level key become a column mapping and the
+        source list's filters a WHERE clause; nested paths, a data path or row
+        deduplication go through the JSON import of the source list's rows.
+        """
+        self.logger.info(f"List {self.list_instance.id}: Importing data from list {source_list.id} ({source_list.name})")
+        source_url = f"list:{source_list.id}"
+        source_state = get_source_state(self.list_instance.id)
+        config_hash = compute_config_hash(self.list_instance)
+        fingerprint = source_fingerprint(source_list)
+        if not force_update and is_unchanged(source_state, source_url, config_hash, fingerprint):
+            self.skip_reason = f"source list {source_list.id} unchanged (data version {source_list.data_version or 0})"
+            return None
+        self._pending_source_state = {'url': source_url, 'headers': {}, 'content_hash': fingerprint}
+
+        selected_columns = []
+        if getattr(self.list_instance, 'json_selected_columns', None):
+            try:
+                selected_columns = json.loads(self.list_instance.json_selected_columns)
+            except json.JSONDecodeError:
+                self.logger.warning(f"List {self.list_instance.id}: Could not decode selected columns: {self.list_instance.json_selected_columns}")
+
+        mapping = column_mapping(source_list.columns, selected_columns)
+        if mapping is None or self._get_json_data_path() or self.config.get('deduplicate_rows'):
+            self.logger.info(f"List {self.list_instance.id}: Nested paths, data path or deduplication configured, importing the rows of list {source_list.id} as JSON")
+            return self._process_json_data(source_list.generate_public_json())
+
+        self.list_instance.data_source_format = 'json'
+        rows_imported = copy_list_rows(self.list_instance, source_list, mapping,
+                                       max_results=getattr(self.list_instance, 'max_results', 0) or 0)
+        db.session.expire(self.list_instance, ['columns'])
+        return rows_imported
+
     def _import_data_from_url_source(self, force_update=False) -> Optional[int]:
         # If force_update is True, completely ignore the elapsed time check
         if force_update:
@@ -701,6 +822,7 @@ class DataImporter:
                 # In this case, we force the update.
                 if delta_seconds > 0 and delta_seconds < self.config.get('min_update_interval', 300):
                     self.logger.info(f"List {self.list_instance.id}: Update not forced and last update too recent ({delta_seconds} seconds). Skipping URL import.")
+                    self.skip_reason = f"last update too recent ({int(delta_seconds)} seconds)"
                     return None
             except Exception as e:
                 self.logger.warning(f"List {self.list_instance.id}: Error checking update time: {e}, proceeding with update.")
@@ -712,178 +834,91 @@ class DataImporter:
             raise ValueError("No URL configured for import.")
 
         self.logger.info(f"List {self.list_instance.id}: Importing data from URL: {url}")
+        response = None
         try:
-            # Detect if the URL points to our own application
-            from flask import current_app
-            import os
+            # Shared pooled client: proxy, SSL, timeouts, retries and rate limit are resolved by services.http_client
+            # (URLs of lists of this instance never get here, see _import_data_from_internal_list)
+            http_settings = get_http_settings()
+            self.logger.info(f"List {self.list_instance.id}: HTTP request to {url} with proxy={http_settings['proxies'] or None} and verify_ssl={http_settings['verify']}")
             
-            # Get the application domain from the SERVER_NAME environment variable
-            # or from the Flask configuration
-            app_domain = os.environ.get('SERVER_NAME') or current_app.config.get('SERVER_NAME', 'localhost')
-            self.logger.info(f"List {self.list_instance.id}: Application domain detected: {app_domain}")
+            # Build the request parameters
+            request_params = {
+                # Body is read lazily so CSV sources are parsed while they download
+                'stream': True
+            }
+            if self.config.get('timeout'):
+                request_params['timeout'] = self.config['timeout']
             
-            # Add other possible internal domains
-            internal_domains = ["localhost:5000", "web:5000", "nginx", app_domain]
-            
-            is_internal_url = False
-            for domain in internal_domains:
-                if domain in url:
-                    is_internal_url = True
-                    break
+            # Add custom headers if configured
+            headers = dict(self.config.get('headers', {}) or {})
+            if headers:
+                self.logger.info(f"List {self.list_instance.id}: Adding custom headers: {headers}")
             
-            if is_internal_url and "/public/json/" in url:
-                self.logger.info(f"List {self.list_instance.id}: Detected an internal URL, using an alternative method")
-                
-                # Extract the public list identifier from the URL
-                # Expected format: .../public/json/IDENTIFIER
-                parts = url.split("/public/json/")
-                if len(parts) == 2:
-                    public_id = parts[1].split("?")[0].strip()
-                    
-                    # Use an alternative method to fetch the data
-                    from models.list import List
-                    from flask import current_app
-                    
-                    # Find the list corresponding to this public identifier
-                    list_obj = List.query.filter_by(public_access_token=public_id).first()
-                    
-                    if list_obj:
-                        self.logger.info(f"List {self.list_instance.id}: Internal list found with ID {list_obj.id}")
-                        # Directly generate the JSON data
-                        json_data = list_obj.generate_public_json()
-                        # Create a response object similar to requests'
-                        class MockResponse:
-                            def __init__(self, json_data):
-                                self.json_data = json_data
-                                self.headers = {"Content-Type": "application/json"}
-                                self.status_code = 200
-                            
-                            def json(self):
-                                return self.json_data
-                            
-                            def raise_for_status(self):
-                                pass
-                        
-                        response = MockResponse(json_data)
-                    else:
-                        self.logger.error(f"List {self.list_instance.id}: Internal list with public ID {public_id} not found")
-                        raise ValueError(f"List with public ID {public_id} not found")
-                else:
-                    self.logger.error(f"List {self.list_instance.id}: Invalid internal URL format: {url}")
-                    raise ValueError(f"Invalid internal URL format: {url}")
-            else:
-                # Standard method for external URLs
-                # Get parameters from environment variables or Flask configuration
-                try:
-                    # Get proxy variables from environment variables (priority)
-                    import os
-                    
-                    # Get proxy variables (uppercase and lowercase)
-                    http_proxy = os.environ.get('HTTP_PROXY', os.environ.get('http_proxy', ''))
-                    https_proxy = os.environ.get('HTTPS_PROXY', os.environ.get('https_proxy', ''))
-                    no_proxy = os.environ.get('NO_PROXY', os.environ.get('no_proxy', ''))
-                    
-                    # Get SSL verification variable
-                    verify_ssl_env = os.environ.get('VERIFY_SSL', '')
-                    
-                    # If VERIFY_SSL environment variable is set, use it
-                    # Otherwise, use Flask configuration
-                    if verify_ssl_env:
-                        verify_ssl = verify_ssl_env.lower() == 'true'
-                        self.logger.info(f"List {self.list_instance.id}: Using environment variable VERIFY_SSL={verify_ssl_env}")
-                    else:
-                        # Fallback to Flask configuration
-                        verify_ssl = current_app.config.get('VERIFY_SSL', 'false').lower() == 'true'
-                        self.logger.info(f"List {self.list_instance.id}: Using Flask configuration VERIFY_SSL={verify_ssl}")
-                    
-                    # If proxy environment variables are empty, try via Flask configuration
-                    if not http_proxy:
-                        http_proxy = current_app.config.get('HTTP_PROXY', '')
-                    if not https_proxy:
-                        https_proxy = current_app.config.get('HTTPS_PROXY', '')
-                    if not no_proxy:
-                        no_proxy = current_app.config.get('NO_PROXY', '')
-                        
-                    # Detailed logs about the variables used
-                    self.logger.info(f"List {self.list_instance.id}: Detected proxy variables - HTTP_PROXY={http_proxy}, HTTPS_PROXY={https_proxy}, NO_PROXY={no_proxy}")
-                    
-                except Exception as e:
-                    # Fallback to default values in case of error
-                    self.logger.warning(f"List {self.list_instance.id}: Error retrieving environment variables: {str(e)}")
-                    verify_ssl = False
-                    http_proxy = ''
-                    https_proxy = ''
-                
-                # Configure the proxy only if variables are defined and not empty
-                proxies = None
-                if http_proxy or https_proxy:
-                    proxies = {}
-                    if http_proxy:
-                        proxies['http'] = http_proxy
-                    if https_proxy:
-                        proxies['https'] = https_proxy
-                    if no_proxy:
-                        # Add NO_PROXY to the environment so requests picks it up
-                        os.environ['NO_PROXY'] = no_proxy
-                    self.logger.info(f"List {self.list_instance.id}: Using proxy: {proxies}")
+            source_state = get_source_state(self.list_instance.id)
+            config_hash = compute_config_hash(self.list_instance)
+
+            # Lists with the same source definition due in the same window share one download
+            shared_key = source_key('body', 'GET', url, headers)
+            with shared_fetch(shared_key, reuse=not force_update) as shared:
+                if shared.payload is not None:
+                    self.logger.info(f"List {self.list_instance.id}: Reusing the body of {url} downloaded {shared.age:.0f}s ago for another list ({shared.payload.size} bytes)")
+                    response = shared.payload.open()
                 else:
-                    self.logger.info(f"List {self.list_instance.id}: No proxy used")
-                
-                # Disable SSL warnings if necessary
-                if not verify_ssl:
-                    import urllib3
-                    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-                    self.logger.info(f"List {self.list_instance.id}: SSL verification disabled, warnings suppressed")
-                
-                # Check if custom certificates are available
-                ca_bundle = os.environ.get('REQUESTS_CA_BUNDLE', '')
-                ssl_cert_file = os.environ.get('SSL_CERT_FILE', '')
-                
-                if ca_bundle:
-                    self.logger.info(f"List {self.list_instance.id}: Using custom certificate bundle: {ca_bundle}")
-                if ssl_cert_file:
-                    self.logger.info(f"List {self.list_instance.id}: Using custom SSL certificate file: {ssl_cert_file}")
-                
-                # Download content with proxy (if defined) and SSL parameters
-                self.logger.info(f"List {self.list_instance.id}: HTTP request to {url} with proxy={proxies} and verify_ssl={verify_ssl}")
-                
-                # Build the request parameters
-                request_params = {
-                    'timeout': self.config.get('timeout', 30),
-                    'verify': verify_ssl
-                }
-                
-                # Add proxy only if defined
-                if proxies:
-                    request_params['proxies'] = proxies
+                    # Conditional request with the validators of the last import (unless forced)
+                    if not force_update:
+                        validators = conditional_headers(source_state, url, config_hash)
+                        if validators:
+                            self.logger.info(f"List {self.list_instance.id}: Conditional request with {validators}")
+                            for name, value in validators.items():
+                                headers.setdefault(name, value)
+                    if headers:
+                        request_params['headers'] = headers
+            
+                    try:
+                        # Execute the request with appropriate parameters
+                        self.logger.info(f"List {self.list_instance.id}: Executing HTTP request with parameters: {request_params}")
+                        response = http_get(url, **request_params)
                 
-                # Add custom headers if configured
-                headers = self.config.get('headers', {})
-                if headers:
-                    request_params['headers'] = headers
-                    self.logger.info(f"List {self.list_instance.id}: Adding custom headers: {headers}")
+                        # Detailed log of the response
+                        self.logger.info(f"List {self.list_instance.id}: HTTP response received - Status: {response.status_code}, Content-Type: {response.headers.get('Content-Type', 'not specified')}")
                 
-                try:
-                    # Execute the request with appropriate parameters
-                    self.logger.info(f"List {self.list_instance.id}: Executing HTTP request with parameters: {request_params}")
-                    response = requests.get(url, **request_params)
-                    
-                    # Detailed log of the response
-                    self.logger.info(f"List {self.list_instance.id}: HTTP response received - Status: {response.status_code}, Content-Type: {response.headers.get('Content-Type', 'not specified')}")
-                    
-                    # Raise an exception for HTTP errors
-                    response.raise_for_status()
-                except requests.exceptions.SSLError as ssl_err:
-                    self.logger.error(f"List {self.list_instance.id}: SSL error during request to {url}: {ssl_err}", exc_info=True)
-                    self.logger.error(f"List {self.list_instance.id}: Check SSL certificate configuration or disable SSL verification with VERIFY_SSL=false")
-                    raise
-                except requests.exceptions.ProxyError as proxy_err:
-                    self.logger.error(f"List {self.list_instance.id}: Proxy error during request to {url}: {proxy_err}", exc_info=True)
-                    self.logger.error(f"List {self.list_instance.id}: Check proxy configuration: HTTP_PROXY={http_proxy}, HTTPS_PROXY={https_proxy}")
-                    raise
-                except requests.exceptions.RequestException as req_err:
-                    self.logger.error(f"List {self.list_instance.id}: Error during request to {url}: {req_err}", exc_info=True)
-                    raise
+                        # Raise an exception for HTTP errors
+                        try:
+                            response.raise_for_status()
+                        except requests.exceptions.HTTPError:
+                            response.close()
+                            raise
+                    except requests.exceptions.SSLError as ssl_err:
+                        self.logger.error(f"List {self.list_instance.id}: SSL error during request to {url}: {ssl_err}", exc_info=True)
+                        self.logger.error(f"List {self.list_instance.id}: Check SSL certificate configuration or disable SSL verification with VERIFY_SSL=false")
+                        raise
+                    except requests.exceptions.ProxyError as proxy_err:
+                        self.logger.error(f"List {self.list_instance.id}: Proxy error during request to {url}: {proxy_err}", exc_info=True)
+                        self.logger.error(f"List {self.list_instance.id}: Check proxy configuration: {http_settings['proxies']}")
+                        raise
+                    except requests.exceptions.RequestException as req_err:
+                        self.logger.error(f"List {self.list_instance.id}: Error during request to {url}: {req_err}", exc_info=True)
+                        raise
+
+                    # Nothing changed upstream since the last import: skip parse and write
+                    if response.status_code == 304:
+                        self._not_modified_headers = response.headers
+                        self.skip_reason = "source not modified (HTTP 304)"
+                        return None
+
+                    # Download and hash the body before parsing it
+                    response = SpooledResponse(response, current_app.config.get('SOURCE_SPOOL_MAX_MEMORY', DEFAULT_SPOOL_MAX_MEMORY))
+                    # Kept in memory only when another list can reuse it
+                    if shared.wanted(self.list_instance.id):
+                        shared.publish(SharedBody.from_response(response))
+            if not force_update and is_unchanged(source_state, url, config_hash, response.content_hash):
+                self.skip_reason = f"source content unchanged ({response.size} bytes, sha256 {response.content_hash[:12]})"
+                return None
+            self._pending_source_state = {
+                'url': url,
+                'headers': response.headers,
+                'content_hash': response.content_hash
+            }
 
             content_type = response.headers.get('Content-Type', '').lower()
             # data_source_format from list config should be the primary determinant
@@ -899,15 +934,16 @@ class DataImporter:
                 # Add more inferences if needed
 
             lines_imported = 0
-            if is_json:
+            if is_json and self._use_json_streaming(response):
+                self.logger.info(f"List {self.list_instance.id}: Processing as JSON from URL (streamed).")
+                lines_imported = self._process_json_stream(response)
+            elif is_json:
                 self.logger.info(f"List {self.list_instance.id}: Processing as JSON from URL.")
                 lines_imported = self._process_json_data(response.json())
             elif is_csv:
-                self.logger.info(f"List {self.list_instance.id}: Processing as CSV from URL.")
-                # response.text will use detected encoding or fallback. 
-                # For more control, response.content and decode with chardet if issues arise.
-                csv_stream = io.StringIO(response.text)
-                lines_imported = self._process_csv_data(csv_stream)
+                self.logger.info(f"List {self.list_instance.id}: Processing as CSV from URL (streamed).")
+                # Decoded incrementally (Content-Type charset, UTF-8 otherwise) and parsed line by line
+                lines_imported = self._process_csv_data(open_text_stream(response))
             else:
                 self.logger.warning(f"List {self.list_instance.id}: Could not determine data format from URL/headers (Content-Type: {content_type}, URL: {url}, ConfigFormat: {list_format_config}). Attempting JSON then CSV.")
                 try:
@@ -916,8 +952,8 @@ class DataImporter:
                 except (json.JSONDecodeError, ValueError) as e_json:
                     self.logger.warning(f"List {self.list_instance.id}: Fallback JSON parse failed ({e_json}), attempting CSV parse.")
                     try:
-                        csv_stream = io.StringIO(response.text)
-                        lines_imported = self._process_csv_data(csv_stream)
+                        # The body was already downloaded by the JSON attempt; iter_content replays it
+                        lines_imported = self._process_csv_data(open_text_stream(response))
                     except Exception as e_csv:
                         self.logger.error(f"List {self.list_instance.id}: Fallback CSV parse also failed ({e_csv}). Cannot process data from URL.")
                         raise ValueError("Could not determine data format from URL and fallbacks failed.") from e_csv
@@ -931,8 +967,12 @@ class DataImporter:
         except Exception as e:
             self.logger.error(f"List {self.list_instance.id}: Error processing data from URL {url}: {e}", exc_info=True)
             raise
+        finally:
+            # Streamed responses hold their connection until closed
+            if response is not None and hasattr(response, 'close'):
+                response.close()
 
-    def _import_data_from_api_curl_source(self) -> Optional[int]:
+    def _import_data_from_api_curl_source(self, force_update=False) -> Optional[int]:
         curl_command_template = self.config.get('curl_command')
         if not curl_command_template:
             self.logger.error(f"List {self.list_instance.id}: No cURL command configured.")
@@ -963,13 +1003,13 @@ class DataImporter:
             config['is_json'] = True
             self.list_instance.update_config = config
             
-            # Force immediate save
-            db.session.commit()
+            # Saved with the import (a commit would also commit the clearing of the data)
+            db.session.flush()
         # Otherwise, use the configured format
         elif format_config:
             self.logger.info(f"List {self.list_instance.id}: Format configured in config: {format_config}")
             self.list_instance.data_source_format = format_config
-            db.session.commit()
+            db.session.flush()
         
         # Check and log the current JSON configuration after update
         self.logger.info(f"List {self.list_instance.id}: Current JSON configuration - data_source_format: {self.list_instance.data_source_format}")
@@ -989,126 +1029,133 @@ class DataImporter:
         db.session.flush()
 
         self.logger.info(f"List {self.list_instance.id}: Executing cURL command: {curl_command}")
+        timeout = self.config.get('timeout', DEFAULT_CURL_TIMEOUT)
+        response = None
         try:
-            # Execute curl command and capture output
-            process = subprocess.run(curl_command, shell=True, capture_output=True, text=True, check=False, timeout=self.config.get('timeout', 60))
-            
-            if process.returncode != 0:
-                self.logger.error(f"List {self.list_instance.id}: cURL command failed with return code {process.returncode}: {process.stderr}")
-                raise ValueError(f"cURL command failed with return code {process.returncode}: {process.stderr}")
-            
-            output_data = process.stdout
-            if not output_data:
+            # Common curl options run in process on the shared HTTP client; anything else runs through curl
+            try:
+                curl_request = parse_curl_command(curl_command)
+            except UnsupportedCurlCommand as e:
+                self.logger.info(f"List {self.list_instance.id}: cURL command runs in a subprocess ({e})")
+                curl_request = None
+
+            source_state = get_source_state(self.list_instance.id)
+            config_hash = compute_config_hash(self.list_instance)
+            if curl_request is not None:
+                source_url = curl_request.url
+                validators = {}
+                if not force_update and curl_request.effective_method == 'GET':
+                    validators = conditional_headers(source_state, source_url, config_hash)
+                    if validators:
+                        self.logger.info(f"List {self.list_instance.id}: Conditional request with {validators}")
+                response = curl_request.send(stream=True, headers=validators, timeout=timeout)
+                self.logger.info(f"List {self.list_instance.id}: HTTP response received - Status: {response.status_code}, Content-Type: {response.headers.get('Content-Type', 'not specified')}")
+
+                # Nothing changed upstream since the last import: skip parse and write
+                if response.status_code == 304 and validators:
+                    self._not_modified_headers = response.headers
+                    self.skip_reason = "source not modified (HTTP 304)"
+                    return None
+                if response.status_code >= 400:
+                    raise ValueError(f"cURL request failed with HTTP status {response.status_code}")
+            else:
+                source_url = curl_command
+                response = run_curl_process(curl_command, timeout=timeout)
+                if response.returncode != 0:
+                    self.logger.error(f"List {self.list_instance.id}: cURL command failed with return code {response.returncode}: {response.stderr}")
+                    raise ValueError(f"cURL command failed with return code {response.returncode}: {response.stderr}")
+
+            # Download and hash the body before parsing it
+            response = SpooledResponse(response, current_app.config.get('SOURCE_SPOOL_MAX_MEMORY', DEFAULT_SPOOL_MAX_MEMORY))
+            if response.size == 0:
                 self.logger.warning(f"List {self.list_instance.id}: cURL command returned empty output.")
                 return 0
+            if not force_update and is_unchanged(source_state, source_url, config_hash, response.content_hash):
+                self.skip_reason = f"source content unchanged ({response.size} bytes, sha256 {response.content_hash[:12]})"
+                return None
+            self._pending_source_state = {
+                'url': source_url,
+                'headers': response.headers,
+                'content_hash': response.content_hash
+            }
 
             # Log a sample of the output for debugging
-            output_sample = output_data[:500] + '...' if len(output_data) > 500 else output_data
-            self.logger.info(f"List {self.list_instance.id}: cURL output sample: {output_sample}")
+            output_sample = next(iter_response_text(response, chunk_size=500), '')
+            self.logger.info(f"List {self.list_instance.id}: cURL output sample ({response.size} bytes): {output_sample}{'...' if response.size > 500 else ''}")
             
             # Use the same logic as for URL import
             # Determine the format based on configuration and content
             list_format_config = self.list_instance.data_source_format.lower() if self.list_instance.data_source_format else ''
             self.logger.info(f"List {self.list_instance.id}: Format configured in the database: {list_format_config}")
             
-            # Check if the content looks like JSON
             is_json = False
-            parsed_json = None
-            try:
-                # Try to parse as JSON
-                parsed_json = json.loads(output_data)
-                is_json = True
-                self.logger.info(f"List {self.list_instance.id}: cURL output successfully parsed as JSON.")
-                # Log the JSON structure for debugging
-                if isinstance(parsed_json, dict):
-                    self.logger.info(f"List {self.list_instance.id}: Available root JSON keys: {list(parsed_json.keys())}")
-                elif isinstance(parsed_json, list) and len(parsed_json) > 0:
-                    self.logger.info(f"List {self.list_instance.id}: Root JSON is a list of {len(parsed_json)} elements")
-                    if isinstance(parsed_json[0], dict):
-                        self.logger.info(f"List {self.list_instance.id}: First element (keys): {list(parsed_json[0].keys())}")
-            except json.JSONDecodeError as e:
-                self.logger.info(f"List {self.list_instance.id}: cURL output is not JSON: {e}")
-            
-            # Check if the content looks like CSV
             is_csv = False
-            if not is_json:
-                csv_stream = io.StringIO(output_data)
-                try:
-                    # Try to read as CSV
-                    dialect = csv.Sniffer().sniff(csv_stream.read(1024))
-                    csv_stream.seek(0)
-                    is_csv = True
-                    self.logger.info(f"List {self.list_instance.id}: cURL output appears to be CSV.")
-                except csv.Error as e:
-                    self.logger.warning(f"List {self.list_instance.id}: cURL output doesn't appear to be CSV either: {e}")
-                    csv_stream.seek(0)
-            
             # Prioritize the configured format
             if list_format_config == 'json':
                 is_json = True
-                is_csv = False
                 self.logger.info(f"List {self.list_instance.id}: Format forced to JSON according to configuration")
             elif list_format_config == 'csv':
                 # Check if a JSON configuration is present despite the configured CSV format
                 if hasattr(self.list_instance, 'json_data_path') and self.list_instance.json_data_path:
                     self.logger.warning(f"List {self.list_instance.id}: Format configured as CSV but JSON configuration detected. Forcing to JSON.")
                     is_json = True
-                    is_csv = False
                     # Update the configuration to avoid this issue in the future
                     self.list_instance.data_source_format = 'json'
                     config = self.list_instance.update_config
                     config['format'] = 'json'
                     config['is_json'] = True
                     self.list_instance.update_config = config
-                    db.session.commit()
+                    db.session.flush()
                 else:
-                    is_json = False
                     is_csv = True
                     self.logger.info(f"List {self.list_instance.id}: Format forced to CSV according to configuration")
+            else:
+                # No configured format: guess from the beginning of the output
+                sample = next(iter_response_text(response, chunk_size=SNIFF_PREFIX_SIZE), '')
+                if sample.lstrip()[:1] in ('{', '['):
+                    is_json = True
+                    self.logger.info(f"List {self.list_instance.id}: cURL output looks like JSON.")
+                else:
+                    try:
+                        csv.Sniffer().sniff(sample)
+                        is_csv = True
+                        self.logger.info(f"List {self.list_instance.id}: cURL output appears to be CSV.")
+                    except csv.Error as e:
+                        self.logger.warning(f"List {self.list_instance.id}: cURL output doesn't appear to be CSV either: {e}")
             
             # Process data according to the determined format
             lines_imported = 0
-            if is_json:
+            if is_json and self._use_json_streaming(response):
+                self.logger.info(f"List {self.list_instance.id}: Processing cURL output as JSON (streamed)")
+                lines_imported = self._process_json_stream(response)
+            elif is_json:
                 self.logger.info(f"List {self.list_instance.id}: Processing cURL output as JSON")
-                # Create an object similar to requests' response.json()
-                class JsonResponse:
-                    def __init__(self, data):
-                        self._data = data
-                    
-                    def json(self):
-                        if isinstance(self._data, str):
-                            return json.loads(self._data)
-                        return self._data
-                
-                # Use the exact same approach as for URL
-                self.logger.info(f"List {self.list_instance.id}: Creating a mock response.json() object for curl")
-                response = JsonResponse(output_data)
                 lines_imported = self._process_json_data(response.json())
             elif is_csv:
                 self.logger.info(f"List {self.list_instance.id}: Processing cURL output as CSV")
-                csv_stream = io.StringIO(output_data)
-                lines_imported = self._process_csv_data(csv_stream)
+                lines_imported = self._process_csv_data(open_text_stream(response))
             else:
                 # Try JSON then CSV as fallback
                 self.logger.warning(f"List {self.list_instance.id}: Undetermined format, trying JSON then CSV")
                 try:
                     self.logger.info(f"List {self.list_instance.id}: Attempting JSON parse")
-                    json_data = json.loads(output_data)
-                    lines_imported = self._process_json_data(json_data)
+                    lines_imported = self._process_json_data(response.json())
                 except (json.JSONDecodeError, ValueError) as e_json:
                     self.logger.warning(f"List {self.list_instance.id}: JSON parse failed ({e_json}), attempting CSV")
                     try:
-                        csv_stream = io.StringIO(output_data)
-                        lines_imported = self._process_csv_data(csv_stream)
+                        lines_imported = self._process_csv_data(open_text_stream(response))
                     except Exception as e_csv:
                         self.logger.error(f"List {self.list_instance.id}: CSV parse also failed ({e_csv})")
                         raise ValueError("Could not determine data format") from e_csv
             
             return lines_imported
             
-        except subprocess.TimeoutExpired:
-            self.logger.error(f"List {self.list_instance.id}: cURL command timed out after {self.config.get('timeout', 60)} seconds")
-            raise ValueError(f"cURL command timed out after {self.config.get('timeout', 60)} seconds")
+        except requests.RequestException as e:
+            self.logger.error(f"List {self.list_instance.id}: cURL request failed: {e}", exc_info=True)
+            raise
         except Exception as e:
             self.logger.error(f"List {self.list_instance.id}: Error executing or processing cURL command: {e}", exc_info=True)
-            raise
\ No newline at end of file
+            raise
+        finally:
+            if response is not None:
+                response.close()
\ No newline at end of file
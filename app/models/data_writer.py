@@ -0,0 +1,180 @@
+# models/data_writer.py
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from .list_components import ListData
+from database import db
+from services.job_service import report_progress
+from utils.row_dedup import RowDeduplicator, DEFAULT_MEMORY_BUDGET
+
+logger = logging.getLogger(__name__)
+
+# Number of cells sent per executemany INSERT
+DEFAULT_BATCH_SIZE = 5000
+
+
+def create_deduplicator(list_id, config, columns):
+    """
+    Builds the row deduplicator configured for a list's imports, if any
+
+    update_config keys: deduplicate_rows (bool) and deduplicate_key_columns (names
+    of the columns identifying a row, the whole row when empty). The memory budget
+    comes from IMPORT_DEDUP_MEMORY_MB; beyond it the seen rows spill to IMPORT_SPOOL_DIR.
+
+    Args:
+        list_id: ID of the list
+        config: The list's update_config
+        columns: Target columns of the import (objects with name and position)
+
+    Returns:
+        RowDeduplicator or None
+    """
+    if not config or not config.get('deduplicate_rows'):
+        return None
+    key_names = config.get('deduplicate_key_columns') or []
+    positions = {column.name: column.position for column in columns}
+    key_positions = [positions[name] for name in key_names if name in positions]
+    missing = [name for name in key_names if name not in positions]
+    if missing:
+        logger.warning(f"List {list_id}: Unknown deduplication key columns {missing}")
+    if key_names and not key_positions:
+        logger.warning(f"List {list_id}: No deduplication key column found, comparing whole rows")
+
+    memory_mb = current_app.config.get('IMPORT_DEDUP_MEMORY_MB')
+    memory_budget = int(float(memory_mb) * 1024 * 1024) if memory_mb else DEFAULT_MEMORY_BUDGET
+    spill_dir = current_app.config.get('IMPORT_SPOOL_DIR') or tempfile.gettempdir()
+    os.makedirs(spill_dir, exist_ok=True)
+    return RowDeduplicator(key_positions or None, memory_budget=memory_budget, spill_dir=spill_dir)
+
+
+class ListDataWriter:
+    """
+    Buffers the cells of an import and writes them in batches
+
+    Rows are inserted with Core executemany statements as the buffer fills up,
+    so an import keeps a bounded number of cells in memory whatever the size of
+    the source. The caller owns the transaction (commit / rollback).
+
+    With a deduplicator, rows already seen are dropped and the following rows
+    are renumbered so that row ids stay contiguous.
+    """
+
+    def __init__(self, list_id, batch_size=DEFAULT_BATCH_SIZE, deduplicator=None):
+        self.list_id = list_id
+        self.batch_size = max(int(batch_size or DEFAULT_BATCH_SIZE), 1)
+        self.deduplicator = deduplicator
+        self.rows_written = 0
+        self.cells_written = 0
+        self._buffer = []
+        self._insert = ListData.__table__.insert()
+
+    def add_row(self, row_id, cells):
+        """
+        Queues a row
+
+        Args:
+            row_id: Row number within the list
+            cells: Iterable of (column_position, value) pairs
+
+        Returns:
+            bool: True if the row had at least one cell and was not a duplicate
+        """
+        if self.deduplicator is not None:
+            cells = list(cells)
+            if self.deduplicator.is_duplicate(cells):
+                return False
+            row_id -= self.deduplicator.duplicates
+        now = datetime.now(timezone.utc)
+        added = False
+        for column_position, value in cells:
+            self._buffer.append({
+                'list_id': self.list_id,
+                'row_id': row_id,
+                'column_position': column_position,
+                'value': str(value) if value is not None else None,
+                'created_at': now,
+                'updated_at': now
+            })
+            added = True
+        if added:
+            self.rows_written += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+        return added
+
+    def add_columns(self, first_row_id, columns):
+        """
+        Queues a block of rows given column by column (vectorized readers)
+
+        Args:
+            first_row_id: Row number of the first row of the block
+            columns: List of (column_position, values) pairs, all values lists having
+                one entry per row; None entries are skipped
+
+        Returns:
+            int: Number of rows that had at least one cell
+        """
+        if not columns:
+            return 0
+        row_count = len(columns[0][1])
+        if self.deduplicator is not None:
+            # Rows must be compared one by one
+            rows_with_cells = 0
+            for offset in range(row_count):
+                cells = [(column_position, values[offset]) for column_position, values in columns
+                         if values[offset] is not None]
+                if cells and self.add_row(first_row_id + offset, cells):
+                    rows_with_cells += 1
+            return rows_with_cells
+        # Rows per slice, so that the buffer never grows much beyond batch_size
+        step = max(self.batch_size // len(columns), 1)
+        now = datetime.now(timezone.utc)
+        rows_with_cells = 0
+        for start in range(0, row_count, step):
+            end = min(start + step, row_count)
+            filled = [False] * (end - start)
+            for column_position, values in columns:
+                for offset, value in enumerate(values[start:end]):
+                    if value is None:
+                        continue
+                    self._buffer.append({
+                        'list_id': self.list_id,
+                        'row_id': first_row_id + start + offset,
+                        'column_position': column_position,
+                        'value': str(value),
+                        'created_at': now,
+                        'updated_at': now
+                    })
+                    filled[offset] = True
+            rows_with_cells += sum(filled)
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+        self.rows_written += rows_with_cells
+        return rows_with_cells
+
+    def flush(self):
+        """Sends the buffered cells to the database"""
+        if not self._buffer:
+            return
+        db.session.execute(self._insert, self._buffer)
+        self.cells_written += len(self._buffer)
+        self._buffer = []
+        # Also where a background import notices its cancellation
+        report_progress(phase='writing', rows_written=self.rows_written)
+
+    @property
+    def duplicates_dropped(self):
+        return self.deduplicator.duplicates if self.deduplicator is not None else 0
+
+    def close(self):
+        """Flushes the remaining cells and returns the number of rows written"""
+        self.flush()
+        if self.deduplicator is not None:
+            self.deduplicator.close()
+            logger.info(f"List {self.list_id}: Dropped {self.deduplicator.duplicates} duplicate rows")
+        logger.info(f"List {self.list_id}: Wrote {self.cells_written} data cells for {self.rows_written} rows")
+        return self.rows_written
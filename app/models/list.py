@@ -17,6 +17,7 @@ from flask import current_app
 from utils.timezone_utils import get_paris_now, utc_to_paris, PARIS_TIMEZONE
 from .list_components import ListColumn, ListData
 from .data_importer import DataImporter
+from services.http_client import http_get
 
 class List(db.Model):
     __tablename__ = 'lists'
@@ -31,7 +32,7 @@ class List(db.Model):
 
     # Valid update types
     UPDATE_TYPES = ['manual', 'automatic']
-    UPDATE_SOURCES = ['url', 'script', 'api', 'curl']
+    UPDATE_SOURCES = ['url', 'script', 'api', 'curl', 'list']
     SCRIPT_LANGUAGES = ['python', 'powershell']
     DATA_FORMATS = ['csv', 'json']
 
@@ -57,6 +58,9 @@ class List(db.Model):
     # Limit for the number of imported results (0 = no limit)
     max_results = db.Column(db.Integer, default=100)
 
+    # Monotonic counter incremented on every data change (used to key derived caches)
+    data_version = db.Column(db.Integer, default=0, nullable=False)
+
     # We no longer use a property for data_source_format, but the DB column directly
     # The following methods are utilities for synchronizing the configuration
 
@@ -134,6 +138,10 @@ class List(db.Model):
     public_txt_enabled = db.Column(db.Boolean, default=False)
     public_txt_column = db.Column(db.String(255))
     public_txt_include_headers = db.Column(db.Boolean, default=True)
+    # Options pour l'export public en filtre de Bloom
+    public_bloom_enabled = db.Column(db.Boolean, default=False)
+    public_bloom_column = db.Column(db.String(255))
+    public_bloom_fp_rate = db.Column(db.Float, default=0.001)
 
     @property
     def formatted_allowed_ips(self):
@@ -274,6 +282,11 @@ class List(db.Model):
                     elif config['source'] == 'curl':
                         if 'curl_command' not in config:
                             raise ValueError("The curl command is required for the 'curl' source")
+                    elif config['source'] == 'list':
+                        if not config.get('source_list_id'):
+                            raise ValueError("The source list is required for the 'list' source")
+                        # The copied rows are stored like the rows of a JSON source
+                        kwargs['data_source_format'] = 'json'
             except json.JSONDecodeError:
                 raise ValueError("Invalid update configuration: Invalid JSON")
 
@@ -400,69 +413,9 @@ class List(db.Model):
                 return None
 
             try:
-                # Get parameters from Flask configuration
-                try:
-                    # First, try via current_app.config
-                    verify_ssl = current_app.config.get('VERIFY_SSL', 'false').lower() == 'true'
-                    http_proxy = current_app.config.get('HTTP_PROXY', os.environ.get('HTTP_PROXY', ''))
-                    https_proxy = current_app.config.get('HTTPS_PROXY', os.environ.get('HTTPS_PROXY', ''))
-                    no_proxy = current_app.config.get('NO_PROXY', os.environ.get('NO_PROXY', ''))
-                    
-                    # Also check lowercase variables
-                    if not http_proxy:
-                        http_proxy = current_app.config.get('http_proxy', os.environ.get('http_proxy', ''))
-                    if not https_proxy:
-                        https_proxy = current_app.config.get('https_proxy', os.environ.get('https_proxy', ''))
-                    if not no_proxy:
-                        no_proxy = current_app.config.get('no_proxy', os.environ.get('no_proxy', ''))
-                        
-                    # Check for custom certificates
-                    ca_bundle = os.environ.get('REQUESTS_CA_BUNDLE', '')
-                    ssl_cert_file = os.environ.get('SSL_CERT_FILE', '')
-                    
-                    if ca_bundle:
-                        current_app.logger.info(f"List {self.id}: Using custom CA certificate: {ca_bundle}")
-                    if ssl_cert_file:
-                        current_app.logger.info(f"List {self.id}: Using custom SSL certificate: {ssl_cert_file}")
-                        
-                except Exception as e:
-                    # Fallback to default values in case of error
-                    current_app.logger.warning(f"Error retrieving environment variables: {str(e)}")
-                    verify_ssl = False
-                    http_proxy = ''
-                    https_proxy = ''
-                    no_proxy = ''
-                
-                # Configure proxy only if variables are defined and not empty
-                proxies = None
-                if http_proxy or https_proxy:
-                    proxies = {}
-                    if http_proxy:
-                        proxies['http'] = http_proxy
-                    if https_proxy:
-                        proxies['https'] = https_proxy
-                    current_app.logger.info(f"List {self.id}: Using proxy: {proxies}")
-                else:
-                    current_app.logger.info(f"List {self.id}: No proxy used")
-                
-                # Disable SSL warnings if necessary
-                if not verify_ssl:
-                    import urllib3
-                    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-                    current_app.logger.info(f"List {self.id}: SSL verification disabled")
-                
-                # Build request parameters
-                request_params = {
-                    'verify': verify_ssl
-                }
-                
-                # Add proxy only if defined
-                if proxies:
-                    request_params['proxies'] = proxies
-                
-                # Execute request with appropriate parameters
-                current_app.logger.info(f"List {self.id}: HTTP request to {url} with proxy={proxies} and verify_ssl={verify_ssl}")
-                response = requests.get(url, **request_params)
+                # Shared pooled client (proxy, SSL, timeouts, retries and rate limit)
+                current_app.logger.info(f"List {self.id}: HTTP request to {url}")
+                response = http_get(url)
                 response.raise_for_status()
                 data = response.json()
                 self.last_update = datetime.now(timezone.utc)
@@ -758,6 +711,18 @@ class List(db.Model):
             current_app.logger.error(traceback.format_exc())
             return data
 
+    def bump_data_version(self):
+        """Marks the list's data as changed.
+
+        Must be called by every path that writes ListData, before the commit,
+        so that caches keyed by (list_id, data_version) are invalidated.
+
+        Returns:
+            int: The new data version
+        """
+        self.data_version = (self.data_version or 0) + 1
+        return self.data_version
+
     def save(self):
         """Saves the changes"""
         db.session.add(self)
@@ -1250,50 +1215,9 @@ class List(db.Model):
         
         # Download URL content
         try:
-            # Get parameters from Flask configuration
-            try:
-                # First try via current_app.config
-                verify_ssl = current_app.config.get('VERIFY_SSL', 'false').lower() == 'true'
-                http_proxy = current_app.config.get('HTTP_PROXY', '')
-                https_proxy = current_app.config.get('HTTPS_PROXY', '')
-            except Exception as e:
-                # Fallback to default values in case of error
-                current_app.logger.warning(f"Error retrieving environment variables: {str(e)}")
-                verify_ssl = config.get('verify_ssl', False)
-                http_proxy = ''
-                https_proxy = ''
-            
-            # Configure proxy only if variables are defined and not empty
-            proxies = None
-            if http_proxy or https_proxy:
-                proxies = {}
-                if http_proxy:
-                    proxies['http'] = http_proxy
-                if https_proxy:
-                    proxies['https'] = https_proxy
-                current_app.logger.info(f"List {self.id}: Using proxy: {proxies}")
-            else:
-                current_app.logger.info(f"List {self.id}: No proxy used")
-            
-            # Disable SSL warnings if necessary
-            if not verify_ssl:
-                import urllib3
-                urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            
-            # Download content with proxy (if defined) and SSL parameters
-            current_app.logger.info(f"List {self.id}: HTTP request with proxy={proxies} and verify_ssl={verify_ssl}")
-            
-            # Build request parameters
-            request_params = {
-                'verify': verify_ssl
-            }
-            
-            # Add proxy only if defined
-            if proxies:
-                request_params['proxies'] = proxies
-                
-            # Execute request with appropriate parameters
-            response = requests.get(self.data_source_url, **request_params)
+            # Shared pooled client (proxy, SSL, timeouts, retries and rate limit)
+            current_app.logger.info(f"List {self.id}: HTTP request to {self.data_source_url}")
+            response = http_get(self.data_source_url)
 
             # Check status code
             if response.status_code != 200:
@@ -1318,7 +1242,10 @@ class List(db.Model):
                     current_app.logger.info(f"JSON import (fixed method) for list {self.id}: {rows_imported} rows.")
                     
                     setattr(self, 'last_update_at', datetime.now(timezone.utc))
+                    self.bump_data_version()
                     db.session.commit()
+                    from services.data_change_service import on_list_data_changed
+                    on_list_data_changed(self)
 
                     if hasattr(self, 'public_csv_enabled') and hasattr(self, 'public_json_enabled'):
                         if self.public_csv_enabled or self.public_json_enabled:
@@ -1339,7 +1266,10 @@ class List(db.Model):
 
                     # Update the last update date
                     setattr(self, 'last_update_at', datetime.now(timezone.utc))
+                    self.bump_data_version()
                     db.session.commit()
+                    from services.data_change_service import on_list_data_changed
+                    on_list_data_changed(self)
 
                     # Generate public files if necessary
                     if hasattr(self, 'public_csv_enabled') and hasattr(self, 'public_json_enabled'):
@@ -2015,69 +1945,9 @@ class List(db.Model):
             return 0
         
         try:
-            # Get parameters from Flask configuration
-            try:
-                # First try via current_app.config
-                verify_ssl = current_app.config.get('VERIFY_SSL', 'false').lower() == 'true'
-                http_proxy = current_app.config.get('HTTP_PROXY', os.environ.get('HTTP_PROXY', ''))
-                https_proxy = current_app.config.get('HTTPS_PROXY', os.environ.get('HTTPS_PROXY', ''))
-                no_proxy = current_app.config.get('NO_PROXY', os.environ.get('NO_PROXY', ''))
-                
-                # Also check lowercase variables
-                if not http_proxy:
-                    http_proxy = current_app.config.get('http_proxy', os.environ.get('http_proxy', ''))
-                if not https_proxy:
-                    https_proxy = current_app.config.get('https_proxy', os.environ.get('https_proxy', ''))
-                if not no_proxy:
-                    no_proxy = current_app.config.get('no_proxy', os.environ.get('no_proxy', ''))
-                    
-                # Check for custom certificates
-                ca_bundle = os.environ.get('REQUESTS_CA_BUNDLE', '')
-                ssl_cert_file = os.environ.get('SSL_CERT_FILE', '')
-                
-                if ca_bundle:
-                    current_app.logger.info(f"List {self.id}: Using custom CA certificate: {ca_bundle}")
-                if ssl_cert_file:
-                    current_app.logger.info(f"List {self.id}: Using custom SSL certificate: {ssl_cert_file}")
-                    
-            except Exception as e:
-                # Fallback to default values in case of error
-                current_app.logger.warning(f"Error retrieving environment variables: {str(e)}")
-                verify_ssl = False
-                http_proxy = ''
-                https_proxy = ''
-                no_proxy = ''
-            
-            # Configure proxy only if variables are defined and not empty
-            proxies = None
-            if http_proxy or https_proxy:
-                proxies = {}
-                if http_proxy:
-                    proxies['http'] = http_proxy
-                if https_proxy:
-                    proxies['https'] = https_proxy
-                current_app.logger.info(f"List {self.id}: Using proxy: {proxies}")
-            else:
-                current_app.logger.info(f"List {self.id}: No proxy used")
-            
-            # Disable SSL warnings if necessary
-            if not verify_ssl:
-                import urllib3
-                urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-                current_app.logger.info(f"List {self.id}: SSL verification disabled")
-            
-            # Build request parameters
-            request_params = {
-                'verify': verify_ssl
-            }
-            
-            # Add proxy only if defined
-            if proxies:
-                request_params['proxies'] = proxies
-            
-            # Execute request with appropriate parameters
-            current_app.logger.info(f"List {self.id}: HTTP request to {self.data_source_url} with proxy={proxies} and verify_ssl={verify_ssl}")
-            response = requests.get(self.data_source_url, **request_params)
+            # Shared pooled client (proxy, SSL, timeouts, retries and rate limit)
+            current_app.logger.info(f"List {self.id}: HTTP request to {self.data_source_url}")
+            response = http_get(self.data_source_url)
             response.raise_for_status()
             
             # Determine data format (CSV or JSON)
@@ -2099,7 +1969,10 @@ class List(db.Model):
             
             # Update the last update date
             self.last_update = datetime.now(timezone.utc)
+            self.bump_data_version()
             db.session.commit()
+            from services.data_change_service import on_list_data_changed
+            on_list_data_changed(self)
             
             # Generate public files if necessary
             if self.is_published:
@@ -2179,14 +2052,19 @@ class List(db.Model):
             curl_command = current_config.get('curl_command')
             current_app.logger.info(f"List {self.id}: Executing curl command: {curl_command}")
 
-            # Using subprocess is generally safer and more flexible than os.popen
-            import subprocess
-            process = subprocess.Popen(curl_command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            output, error = process.communicate()
-
-            if process.returncode != 0:
-                current_app.logger.error(f"List {self.id}: curl command error (code: {process.returncode}): {error}")
-                raise ValueError(f"curl command error: {error}")
+            # Run in process on the shared HTTP client when the options allow it, through curl otherwise
+            from services.curl_client import CurlProcessOutput, execute_curl
+            response = execute_curl(curl_command)
+            try:
+                if isinstance(response, CurlProcessOutput) and response.returncode != 0:
+                    current_app.logger.error(f"List {self.id}: curl command error (code: {response.returncode}): {response.stderr}")
+                    raise ValueError(f"curl command error: {response.stderr}")
+                if response.status_code >= 400:
+                    current_app.logger.error(f"List {self.id}: curl request failed with HTTP status {response.status_code}")
+                    raise ValueError(f"curl request failed with HTTP status {response.status_code}")
+                output = response.text
+            finally:
+                response.close()
             
             if not output:
                 current_app.logger.error(f"List {self.id}: No output from curl command")
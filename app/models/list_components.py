@@ -44,4 +44,113 @@ class ListData(db.Model):
 
     def __repr__(self):
         return f"<ListData(id={self.id}, list_id={self.list_id}, row_id={self.row_id}, " \
-               f"column_position={self.column_position}, value='{str(self.value)[:30]}...')>" # Shortened value
\ No newline at end of file
+               f"column_position={self.column_position}, value='{str(self.value)[:30]}...')>" # Shortened value
+class ListValueIndex(db.Model):
+    """Inverted index entry mapping a normalized cell value to its location"""
+    __tablename__ = 'list_value_index'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    value_hash = db.Column(db.String(64), nullable=False) # SHA-256 of LOWER(TRIM(value))
+    list_id = db.Column(db.Integer, db.ForeignKey('lists.id', ondelete='CASCADE'), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    column_position = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_value_index_hash', 'value_hash', 'list_id'),
+        db.Index('idx_value_index_list_row', 'list_id', 'row_id'),
+    )
+
+    def __repr__(self):
+        return f"<ListValueIndex(list_id={self.list_id}, row_id={self.row_id}, " \
+               f"column_position={self.column_position})>"
+
+class ListRowState(db.Model):
+    """Last known content hash of each row, used to detect changes between data versions"""
+    __tablename__ = 'list_row_state'
+
+    list_id = db.Column(db.Integer, db.ForeignKey('lists.id', ondelete='CASCADE'), primary_key=True)
+    row_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    row_hash = db.Column(db.String(64), nullable=False)
+    data_version = db.Column(db.Integer, nullable=False) # Version at which the row last changed
+
+class ListRowChange(db.Model):
+    """Change log entry of a row for a given data version (added, modified or removed)"""
+    __tablename__ = 'list_row_changes'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    list_id = db.Column(db.Integer, db.ForeignKey('lists.id', ondelete='CASCADE'), nullable=False)
+    data_version = db.Column(db.Integer, nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    change_type = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('idx_row_changes_list_version', 'list_id', 'data_version'),
+    )
+
+class ListSourceState(db.Model):
+    """Validators of the last imported version of a list's URL source (conditional fetching)"""
+    __tablename__ = 'list_source_state'
+
+    list_id = db.Column(db.Integer, db.ForeignKey('lists.id', ondelete='CASCADE'), primary_key=True)
+    source_url = db.Column(db.Text)
+    etag = db.Column(db.String(255))
+    last_modified = db.Column(db.String(64))
+    content_hash = db.Column(db.String(64)) # SHA-256 of the downloaded body
+    config_hash = db.Column(db.String(64)) # SHA-256 of the import settings the body was imported with
+    checked_at = db.Column(db.DateTime)
+    changed_at = db.Column(db.DateTime)
+
+class ListUpdateRun(db.Model):
+    """History entry of an import run (success, skipped or error)"""
+    __tablename__ = 'list_update_runs'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    list_id = db.Column(db.Integer, db.ForeignKey('lists.id', ondelete='CASCADE'), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    rows_imported = db.Column(db.Integer)
+    duplicates_dropped = db.Column(db.Integer)
+    message = db.Column(db.Text)
+    started_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    duration_ms = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.Index('idx_update_runs_list_started', 'list_id', 'started_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'rows_imported': self.rows_imported,
+            'duplicates_dropped': self.duplicates_dropped,
+            'message': self.message,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'duration_ms': self.duration_ms
+        }
+
+class ImportJob(db.Model):
+    """Manual import running in the background, with its progress"""
+    __tablename__ = 'import_jobs'
+
+    id = db.Column(db.String(32), primary_key=True) # Random hex identifier
+    list_id = db.Column(db.Integer, db.ForeignKey('lists.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer)
+    kind = db.Column(db.String(30), nullable=False)
+    status = db.Column(db.String(20), nullable=False) # queued, running, succeeded, failed, cancelled
+    phase = db.Column(db.String(30))
+    bytes_read = db.Column(db.BigInteger, default=0)
+    bytes_total = db.Column(db.BigInteger)
+    rows_written = db.Column(db.Integer, default=0)
+    rows_total = db.Column(db.Integer)
+    cancel_requested = db.Column(db.Boolean, default=False, nullable=False)
+    message = db.Column(db.Text)
+    result = db.Column(db.Text) # JSON document returned by the job
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('idx_import_jobs_list_created', 'list_id', 'created_at'),
+    )
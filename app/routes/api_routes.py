@@ -5,39 +5,21 @@ from database import db
 import csv
 import io
 import json
-from datetime import datetime
-import ipaddress
 from typing import Any, Dict
 
 # Import timezone utilities
 from utils.timezone_utils import get_paris_now, utc_to_paris, PARIS_TIMEZONE, format_datetime
 from services.public_files_service import update_public_files
 from services.scheduler_service import SchedulerService
+from services.data_change_service import on_list_data_changed, on_list_deleted
+from services.upload_import_service import compile_validator, import_validated_csv, spool_upload
+from routes.job_routes import start_import_job
 
 api_bp = Blueprint('api_bp', __name__)
 
 def validate_value(value: str, column_type: str) -> str:
     """Validates and formats a value according to the column type"""
-    if not value or value.strip() == '':
-        return ''
-        
-    try:
-        if column_type == 'ip':
-            # Validate the IP address
-            ipaddress.ip_address(value.strip())
-            return value.strip()
-        elif column_type == 'number':
-            # Validate the number
-            float(value.strip())
-            return value.strip()
-        elif column_type == 'date':
-            # Validate the date (ISO format)
-            datetime.fromisoformat(value.strip())
-            return value.strip()
-        else:  # text
-            return value.strip()
-    except Exception as e:
-        raise ValueError(f"Invalid value for type {column_type}: {value}")
+    return compile_validator(column_type)(value)
 
 @api_bp.route('/api/lists', methods=['POST'])
 @login_required
@@ -199,6 +181,7 @@ def delete_list(list_id):
         current_app.logger.info(f"Deleting list {list_id} with {columns_count} columns and {data_count} entries")
         
         # Delete the list (cascade delete will handle columns and data)
+        on_list_deleted(list_id)
         db.session.delete(list_obj)
         db.session.commit()
         
@@ -233,7 +216,9 @@ def delete_row(list_id, row_id):
     
     try:
         db.session.delete(row)
+        list_obj.bump_data_version()
         db.session.commit()
+        on_list_data_changed(list_obj, [row.row_id])
         
         # Update public files if enabled
         if list_obj.public_csv_enabled or list_obj.public_json_enabled:
@@ -304,7 +289,9 @@ def update_row(list_id, row_id):
                     )
                     db.session.add(row_data)
         
+        list_obj.bump_data_version()
         db.session.commit()
+        on_list_data_changed(list_obj, [row_id])
         
         # Update public files if enabled
         if list_obj.public_csv_enabled or list_obj.public_json_enabled:
@@ -326,15 +313,11 @@ def update_row(list_id, row_id):
 @api_bp.route('/api/lists/<int:list_id>/import', methods=['POST'])
 @login_required
 def import_data(list_id):
-    """Import data from a CSV file"""
+    """Import data from a CSV file (in the background, see /api/jobs/<job_id>; ?wait=true to wait for it)"""
     if not current_user.is_admin:
         return jsonify({'error': 'Unauthorized access'}), 403
         
-    # Debug logs
-    current_app.logger.info(f"Looking for list with ID: {list_id}")
     list_obj = List.query.get_or_404(list_id)
-    current_app.logger.info(f"Found list: {list_obj.name} (ID: {list_obj.id})")
-    current_app.logger.info(f"List columns: {[f'{col.name} (pos: {col.position})' for col in list_obj.columns]}")
     
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
@@ -347,109 +330,9 @@ def import_data(list_id):
         return jsonify({'error': 'Unsupported file format. Use CSV.'}), 400
     
     try:
-        # Create a dictionary of columns for quick access
-        columns_dict = {col.name: col for col in list_obj.columns}
-        
-        # Read the CSV file
-        csv_content = file.read().decode('utf-8-sig')  # Handle UTF-8 BOM
-        stream = io.StringIO(csv_content)
-        csv_reader = csv.DictReader(stream)
-        
-        # Debug logs
-        current_app.logger.info(f"CSV fieldnames: {csv_reader.fieldnames}")
-        
-        # Check columns
-        if not csv_reader.fieldnames:
-            return jsonify({'error': 'The CSV file is empty or poorly formatted'}), 400
-            
-        file_columns = set(csv_reader.fieldnames)
-        list_columns = set(columns_dict.keys())
-        
-        if not file_columns.issubset(list_columns):
-            invalid_columns = file_columns - list_columns
-            return jsonify({
-                'error': f'Invalid columns found: {", ".join(invalid_columns)}',
-                'details': {
-                    'file_columns': list(file_columns),
-                    'expected_columns': list(list_columns)
-                }
-            }), 400
-            
-        # Import data
-        row_count = 0
-        error_rows = []
-        
-        for row_num, row in enumerate(csv_reader, start=1):
-            try:
-                # Validate and format the data
-                validated_data = {}
-                for col_name, value in row.items():
-                    if col_name in columns_dict:
-                        try:
-                            validated_data[col_name] = validate_value(value, columns_dict[col_name].column_type)
-                        except ValueError as ve:
-                            raise ValueError(f"Row {row_num}, column '{col_name}': {str(ve)}")
-                
-                # Add validated data
-                for col_name, value in validated_data.items():
-                    column = columns_dict[col_name]
-                    data = ListData(
-                        list_id=list_obj.id,
-                        row_id=row_num,
-                        column_position=column.position,
-                        value=value
-                    )
-                    db.session.add(data)
-                
-                row_count += 1
-                
-                # Commit every 100 rows to avoid memory overload
-                if row_count % 100 == 0:
-                    db.session.commit()
-                    current_app.logger.info(f"Committed {row_count} rows")
-                
-            except Exception as e:
-                error_rows.append({
-                    'row': row_num,
-                    'error': str(e),
-                    'data': row
-                })
-                current_app.logger.error(f"Error on row {row_num}: {str(e)}")
-                continue
-        
-        # Final commit
-        if row_count % 100 != 0:
-            db.session.commit()
-        
-        # Update the last update date
-        list_obj.last_update = get_paris_now()
-        db.session.commit()
-        
-        # Update public files if enabled
-        if list_obj.public_csv_enabled or list_obj.public_json_enabled:
-            try:
-                update_public_files(list_obj)
-                current_app.logger.info(f"Public files updated for list {list_id} after import")
-            except Exception as e:
-                current_app.logger.error(f"Error updating public files after import: {str(e)}")
-                # Do not block the response if updating public files fails
-        
-        # Prepare the response
-        response = {
-            'message': 'Import finished',
-            'stats': {
-                'total_rows': row_count,
-                'successful_rows': row_count - len(error_rows),
-                'error_rows': len(error_rows)
-            }
-        }
-        
-        if error_rows:
-            response['errors'] = error_rows[:10]  # Limit to 10 errors in the response
-            response['message'] = 'Import finished with errors'
-            
-        return jsonify(response)
-        
+        path, size = spool_upload(file)
+        return start_import_job('file_import', list_obj.id, import_validated_csv, list_obj.id, path,
+                                bytes_total=size)
     except Exception as e:
         current_app.logger.error(f"Import error: {str(e)}")
         db.session.rollback()
@@ -519,13 +402,17 @@ def delete_multiple_rows(list_id):
     try:
         # Delete the rows
         deleted_count = 0
+        changed_rows = set()
         for row_id in row_ids:
             row = ListData.query.filter_by(list_id=list_id, id=row_id).first()
             if row:
+                changed_rows.add(row.row_id)
                 db.session.delete(row)
                 deleted_count += 1
         
+        list_obj.bump_data_version()
         db.session.commit()
+        on_list_data_changed(list_obj, list(changed_rows))
         return jsonify({
             'success': True,
             'message': f'{deleted_count} row(s) deleted successfully'
@@ -0,0 +1,89 @@
+import os
+
+from flask import Blueprint, jsonify, request, url_for, current_app, send_file
+from flask_login import current_user
+
+from database import csrf
+from routes.api_auth_routes import token_auth_required
+from services.job_service import JobFailed, cancel_job, get_job, job_to_dict, submit_job
+from services.upload_import_service import report_path
+
+job_bp = Blueprint('job_bp', __name__)
+
+
+def wants_synchronous_import():
+    """The client asked to wait for the import (?wait=true) instead of getting a job"""
+    return request.args.get('wait', 'false').lower() in ('1', 'true', 'yes')
+
+
+def start_import_job(kind, list_id, func, *args, bytes_total=None):
+    """
+    Runs an import in the background and answers 202 with the job's identifier
+
+    With ?wait=true the import runs in the request as before, and its result
+    (or the result of its JobFailed error) is returned directly.
+
+    Args:
+        kind: Type of job
+        list_id: ID of the imported list
+        func: Import function, called with *args, returning a JSON-serializable dict
+        bytes_total: Size of the input when known
+    """
+    if wants_synchronous_import():
+        try:
+            return jsonify(func(*args))
+        except JobFailed as e:
+            return jsonify(e.result or {'error': str(e)}), e.status_code
+
+    job_id = submit_job(kind, list_id, func, *args, user_id=current_user.id, bytes_total=bytes_total)
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('job_bp.get_job_status', job_id=job_id)
+    }), 202
+
+
+def _get_accessible_job(job_id):
+    job = get_job(job_id)
+    if not job:
+        return None, (jsonify({'error': 'Job not found'}), 404)
+    if not current_user.is_admin and job.user_id != current_user.id:
+        return None, (jsonify({'error': 'Unauthorized access'}), 403)
+    return job, None
+
+
+@job_bp.route('/api/jobs/<job_id>', methods=['GET'])
+@token_auth_required
+def get_job_status(job_id):
+    """Progress of a background import (phase, bytes, rows, ETA) and its result once finished"""
+    job, error = _get_accessible_job(job_id)
+    if error:
+        return error
+    return jsonify(job_to_dict(job))
+
+
+@job_bp.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+@job_bp.route('/api/jobs/<job_id>', methods=['DELETE'])
+@token_auth_required
+@csrf.exempt
+def cancel_job_route(job_id):
+    """Cancels a queued or running import; the list keeps its previous data"""
+    job, error = _get_accessible_job(job_id)
+    if error:
+        return error
+    if not cancel_job(job_id):
+        return jsonify({'error': f'Job already {job.status}'}), 409
+    current_app.logger.info(f"Cancellation of import job {job_id} requested by user {current_user.id}")
+    return jsonify({'message': 'Cancellation requested', 'job_id': job_id})
+
+
+@job_bp.route('/api/import-reports/<token>', methods=['GET'])
+@token_auth_required
+def download_import_report(token):
+    """CSV report of the rows rejected by a file import"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Unauthorized access'}), 403
+    path = report_path(token)
+    if not path or not os.path.isfile(path):
+        return jsonify({'error': 'Report not found or expired'}), 404
+    return send_file(path, mimetype='text/csv', as_attachment=True, download_name=f'import_errors_{token[:8]}.csv')
@@ -1,6 +1,5 @@
 # Standard imports
 import json
-import subprocess
 import re
 import os
 from functools import wraps
@@ -14,6 +13,10 @@ from routes.decorators import admin_required
 from models.list import List
 from database import db, csrf
 from services.scheduler_service import SchedulerService
+from services.http_client import http_get
+from services.internal_source_service import internal_list_token
+from services.curl_client import CurlCommandError, CurlProcessOutput, execute_curl
+from utils.json_path import MISSING, compile_json_path
 
 json_config_bp = Blueprint('json_config_bp', __name__)
 
@@ -28,6 +31,18 @@ def check_list_ownership(f):
         return f(list_id=list_id, list_obj=list_obj, *args, **kwargs)
     return decorated_function
 
+def run_curl_command(curl_command):
+    """Executes a curl command (in process when possible) and returns its output as text"""
+    response = execute_curl(curl_command)
+    try:
+        if isinstance(response, CurlProcessOutput) and response.returncode != 0:
+            raise CurlCommandError(f"Command failed with return code {response.returncode}: {response.stderr}")
+        if response.status_code and response.status_code >= 400:
+            raise CurlCommandError(f"HTTP status {response.status_code}")
+        return response.text
+    finally:
+        response.close()
+
 @json_config_bp.route('/json-config/<int:list_id>', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -69,16 +84,21 @@ def json_config(list_id):
         next_page_path = request.form.get('next_page_path', '')
         max_pages = int(request.form.get('max_pages', 10))
         
-        # Get selected columns
+        # Get selected columns, keeping the nested path configured for a column if any
+        previous_paths = {col.get('name'): col.get('path') for col in (list_obj.get_json_selected_columns or [])
+                          if isinstance(col, dict) and col.get('path')}
         selected_columns = []
         for key, value in request.form.items():
             if key.startswith('include_column_'):
                 column_name = key.replace('include_column_', '')
                 column_type = request.form.get(f'column_type_{column_name}', 'text')
-                selected_columns.append({
+                column = {
                     'name': column_name,
                     'type': column_type
-                })
+                }
+                if previous_paths.get(column_name):
+                    column['path'] = previous_paths[column_name]
+                selected_columns.append(column)
         
         # Update the configuration
         list_obj.json_data_path = data_path
@@ -167,15 +187,13 @@ def json_config(list_id):
             
             # Execute the curl command and capture the output
             try:
-                result = subprocess.run(curl_command, shell=True, capture_output=True, text=True, check=True)
-                output = result.stdout
+                output = run_curl_command(curl_command)
                 
                 if not output:
                     current_app.logger.error("Error executing curl command: no output")
                     raise Exception("Curl error: no output")
-            except subprocess.CalledProcessError as e:
+            except CurlCommandError as e:
                 current_app.logger.error(f"Error executing curl command: {e}")
-                current_app.logger.error(f"Error output: {e.stderr}")
                 raise Exception(f"Curl error: {e}")
             except Exception as e:
                 current_app.logger.error(f"Exception executing curl command: {e}")
@@ -190,57 +208,30 @@ def json_config(list_id):
             
             current_app.logger.info(f"Getting JSON data from URL: {url}")
             
-            # Detect if the URL points to our own application
-            import os
-            
-            # Get the application domain from the SERVER_NAME environment variable
-            # or from the Flask configuration
-            app_domain = os.environ.get('SERVER_NAME') or current_app.config.get('SERVER_NAME', 'localhost')
-            current_app.logger.info(f"Application domain detected: {app_domain}")
-            
-            # Add other possible internal domains
-            internal_domains = ["localhost:5000", "web:5000", "nginx", app_domain]
-            
-            is_internal_url = False
-            for domain in internal_domains:
-                if domain in url:
-                    is_internal_url = True
-                    break
-            
-            if is_internal_url and "/public/json/" in url:
-                current_app.logger.info(f"Detected an internal URL, using an alternative method")
+            # A list of this instance is read directly instead of through its public URL
+            public_id = internal_list_token(url)
+            if public_id:
+                current_app.logger.info(f"Detected an internal URL, reading list {public_id} directly")
                 
-                # Extract the public list identifier from the URL
-                # Expected format: .../public/json/IDENTIFIER
-                parts = url.split("/public/json/")
-                if len(parts) == 2:
-                    public_id = parts[1].split("?")[0].strip()
-                    
-                    # Use an alternative method to get the data
-                    from models.list import List
-                    
-                    # Search for the list corresponding to this public identifier
-                    source_list = List.query.filter_by(public_access_token=public_id).first()
-                    
-                    if source_list:
-                        current_app.logger.info(f"Internal list found with ID {source_list.id}")
-                        # Directly generate the JSON data
-                        json_data = source_list.generate_public_json()
-                        output = json.dumps(json_data)
-                        current_app.logger.info(f"JSON data retrieved directly: {output[:200]}...")
-                    else:
-                        current_app.logger.error(f"Internal list with public ID {public_id} not found")
-                        raise Exception(f"List with public ID {public_id} not found")
+                # Search for the list corresponding to this public identifier
+                source_list = List.query.filter_by(public_access_token=public_id).first()
+                
+                if source_list:
+                    current_app.logger.info(f"Internal list found with ID {source_list.id}")
+                    # Directly generate the JSON data
+                    json_data = source_list.generate_public_json()
+                    output = json.dumps(json_data)
+                    current_app.logger.info(f"JSON data retrieved directly: {output[:200]}...")
                 else:
-                    current_app.logger.error(f"Invalid internal URL format: {url}")
-                    raise Exception(f"Invalid internal URL format: {url}")
+                    current_app.logger.error(f"Internal list with public ID {public_id} not found")
+                    raise Exception(f"List with public ID {public_id} not found")
             else:
                 # Standard method for external URLs
                 import requests
                 headers = {'Accept': 'application/json'}
                 try:
                     # Disable SSL verification to bypass certificate errors
-                    response = requests.get(url, headers=headers, timeout=30, verify=False)
+                    response = http_get(url, headers=headers, timeout=30, verify=False)
                     response.raise_for_status()  # Raises an exception if the HTTP status is an error code
                     
                     # Check if the response is valid JSON
@@ -283,19 +274,10 @@ def json_config(list_id):
         data = raw_data
         if list_obj.json_data_path:
             try:
-                for key in list_obj.json_data_path.split('.'):
-                    if not key:
-                        continue
-                    if key.isdigit() and isinstance(data, list) and int(key) < len(data):
-                        data = data[int(key)]
-                    elif isinstance(data, dict) and key in data:
-                        data = data[key]
-                    elif isinstance(data, list) and len(data) > 0:
-                        data = data[0]
-                    else:
-                        current_app.logger.warning(f"Invalid JSON path: {list_obj.json_data_path}")
-                        data = None
-                        break
+                data = compile_json_path(list_obj.json_data_path).search(raw_data)
+                if data is MISSING:
+                    current_app.logger.warning(f"Invalid JSON path: {list_obj.json_data_path}")
+                    data = None
             except Exception as e:
                 current_app.logger.error(f"Error navigating JSON data: {str(e)}")
                 data = None
@@ -407,8 +389,7 @@ def test_json_path(list_id):
             
             # Execute the curl command and capture the output
             try:
-                stream = os.popen(curl_command)
-                output = stream.read()
+                output = run_curl_command(curl_command)
                 current_app.logger.info(f"Curl command result: {output[:200]}...")
                 
                 if not output:
@@ -433,7 +414,7 @@ def test_json_path(list_id):
                 import requests
                 headers = {'Accept': 'application/json'}
                 # Disable SSL verification to bypass certificate errors
-                response = requests.get(url, headers=headers, timeout=30, verify=False)
+                response = http_get(url, headers=headers, timeout=30, verify=False)
                 response.raise_for_status()  # Raises an exception if the HTTP status is an error code
                 
                 # Check if the response is valid JSON
@@ -472,36 +453,13 @@ def test_json_path(list_id):
             result['message'] = f"Error parsing JSON: {str(e)}"
             return jsonify(result)
         
-        # Navigate through the data according to the provided path
+        # Navigate through the data with the path compiled as it will be for the imports
         try:
-            data = raw_data
-            path_parts = data_path.split('.')
-            current_app.logger.info(f"Path parts: {path_parts}")
-            
-            for key in path_parts:
-                if not key:
-                    continue
-                
-                current_app.logger.info(f"Processing key: {key}, current data type: {type(data).__name__}")
-                
-                if key.isdigit() and isinstance(data, list) and int(key) < len(data):
-                    data = data[int(key)]
-                elif isinstance(data, dict) and key in data:
-                    data = data[key]
-                elif isinstance(data, list) and len(data) > 0:
-                    # If an element of a list is requested without specifying an index, take the first one
-                    data = data[0]
-                    # If the key exists in this element, use it
-                    if isinstance(data, dict) and key in data:
-                        data = data[key]
-                    else:
-                        current_app.logger.warning(f"Key '{key}' not found in the list element")
-                        result['message'] = f"Key '{key}' not found in the list element"
-                        return jsonify(result)
-                else:
-                    current_app.logger.warning(f"Key '{key}' not found in the data")
-                    result['message'] = f"Key '{key}' not found in the data"
-                    return jsonify(result)
+            data = compile_json_path(data_path).search(raw_data)
+            if data is MISSING:
+                current_app.logger.warning(f"Path '{data_path}' not found in the data")
+                result['message'] = f"Path '{data_path}' not found in the data"
+                return jsonify(result)
             
             # Check that the extracted data is usable
             if isinstance(data, (dict, list)):
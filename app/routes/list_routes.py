@@ -21,9 +21,18 @@ from sqlalchemy.orm import joinedload
 from functools import wraps
 from routes.api_auth_routes import token_auth_required
 from services.scheduler_service import SchedulerService
-from routes.decorators import admin_required
+from routes.decorators import admin_required, check_ip_access
 from services.scheduler_service import SchedulerService
 from services.public_files_service import update_public_files
+from services.ip_index_service import get_ip_index
+from services.cidr_aggregation_service import get_aggregated_column
+from services.data_change_service import on_list_data_changed, on_list_deleted
+from services.value_index_service import search_value
+from services.update_history_service import get_runs
+from services.http_client import http_get
+from services.job_service import JobFailed
+from services.upload_import_service import format_date_for_db, import_list_file, spool_upload
+from routes.job_routes import start_import_job
 
 list_bp = Blueprint('list_bp', __name__)
 
@@ -149,7 +158,7 @@ def preview_csv(list_id):
         
         # Get data from the URL
         try:
-            response = requests.get(url, timeout=30)
+            response = http_get(url)
             response.raise_for_status()
             csv_content = response.content.decode('utf-8')
         except requests.exceptions.RequestException as e:
@@ -423,24 +432,6 @@ def check_list_ownership(f):
         return jsonify({'error': 'Unauthorized access - Only administrators can modify lists'}), 403
     return decorated_function
 
-def format_date_for_db(date_str):
-    """Converts a date to DD/MM/YYYY format"""
-    if not date_str:
-        return None
-        
-    try:
-        # If the date is already in DD/MM/YYYY format
-        if len(date_str.split('/')) == 3:
-            date_obj = datetime.strptime(date_str, '%d/%m/%Y')
-            return date_str
-            
-        # Otherwise, try to parse and convert
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-        return date_obj.strftime('%d/%m/%Y')
-        
-    except ValueError as e:
-        raise ValueError(f"Invalid date format. Use DD/MM/YYYY format: {str(e)}")
-
 @list_bp.route('/lists/<int:list_id>')
 @login_required
 @check_list_access
@@ -854,7 +845,6 @@ def create_list():
                     try:
                         # Create columns manually before importing data
                         # To do this, we will first get a sample of the data
-                        import requests
                         import time
                         
                         # Wait a bit to ensure the list is saved in the database
@@ -875,7 +865,7 @@ def create_list():
                         try:
                             # Get a sample of the data to create the columns
                             current_app.logger.info(f"Getting a data sample from {data_source_url}")
-                            response = requests.get(data_source_url, timeout=30)
+                            response = http_get(data_source_url)
                             response.raise_for_status()
                             
                             # Create columns manually
@@ -1082,7 +1072,7 @@ def create_list():
                         try:
                             # Instead of using the import_data_from_url method, import directly here
                             # as virtual properties may not work correctly
-                            response = requests.get(data_source_url, timeout=30)
+                            response = http_get(data_source_url)
                             response.raise_for_status()
                             
                             # Determine the data format from the configuration
@@ -1419,7 +1409,8 @@ def update_list(list_id):
             checkbox_keys = [
                 'is_active', 'is_published', 'ip_restriction_enabled',
                 'public_csv_enabled', 'public_json_enabled', 'regenerate_token',
-                'public_csv_include_headers', 'public_txt_enabled', 'public_txt_include_headers'
+                'public_csv_include_headers', 'public_txt_enabled', 'public_txt_include_headers',
+                'public_bloom_enabled'
             ]
             for key in checkbox_keys:
                 data[key] = key in data
@@ -1541,18 +1532,25 @@ def update_list(list_id):
         list_obj.public_txt_enabled = data.get('public_txt_enabled', list_obj.public_txt_enabled)
         list_obj.public_txt_column = data.get('public_txt_column', list_obj.public_txt_column)
         list_obj.public_txt_include_headers = data.get('public_txt_include_headers', True)
+        # Options du filtre de Bloom public
+        list_obj.public_bloom_enabled = data.get('public_bloom_enabled', list_obj.public_bloom_enabled)
+        list_obj.public_bloom_column = data.get('public_bloom_column', list_obj.public_bloom_column)
+        if 'public_bloom_fp_rate' in data:
+            from services.bloom_filter_service import normalize_fp_rate
+            list_obj.public_bloom_fp_rate = normalize_fp_rate(data.get('public_bloom_fp_rate'))
         current_app.logger.info(f"Public access options - CSV: {list_obj.public_csv_enabled}, JSON: {list_obj.public_json_enabled}, Include headers: {list_obj.public_csv_include_headers}")
         
         # Generate an access token if necessary
-        if (list_obj.public_csv_enabled or list_obj.public_json_enabled or list_obj.public_txt_enabled) and \
+        if (list_obj.public_csv_enabled or list_obj.public_json_enabled or list_obj.public_txt_enabled or list_obj.public_bloom_enabled) and \
            (not list_obj.public_access_token or data.get('regenerate_token', False)):
             # Import the token generation function
             from routes.public_files_routes import generate_access_token
             list_obj.public_access_token = generate_access_token()
             current_app.logger.info(f"New access token generated for list {list_id}")
         
-        # Supprimer le token uniquement si AUCUN export public n'est activé (CSV, JSON, TXT)
-        if not list_obj.public_csv_enabled and not list_obj.public_json_enabled and not list_obj.public_txt_enabled:
+        # Supprimer le token uniquement si AUCUN export public n'est activé (CSV, JSON, TXT, Bloom)
+        if not list_obj.public_csv_enabled and not list_obj.public_json_enabled and not list_obj.public_txt_enabled \
+                and not list_obj.public_bloom_enabled:
             list_obj.public_access_token = None
             current_app.logger.info(f"Access token deleted for list {list_id} as public access is disabled (aucun format public)")
         
@@ -1732,6 +1730,9 @@ def delete_list(list_id):
         # Delete the columns
         ListColumn.query.filter_by(list_id=list_id).delete()
         
+        # Delete the derived index entries
+        on_list_deleted(list_id)
+        
         # Delete the list
         db.session.delete(list_obj)
         db.session.commit()
@@ -1823,7 +1824,9 @@ def add_list_data(list_id):
                 
         # Save the data
         db.session.add_all(row_data)
+        list_obj.bump_data_version()
         db.session.commit()
+        on_list_data_changed(list_obj, [next_row_id])
         
         # Update public files if enabled
         if list_obj.public_csv_enabled or list_obj.public_json_enabled:
@@ -1853,6 +1856,128 @@ def get_list_data(list_id):
     list_obj = List.query.get(list_id)
     return jsonify(list_obj.get_data())
 
+@list_bp.route('/api/lists/<int:list_id>/ip-lookup', methods=['GET'])
+@token_auth_required
+@check_list_access
+@check_ip_restriction
+def ip_lookup(list_id):
+    """Returns the rows whose IP, CIDR or range cells contain the given address"""
+    ip_value = request.args.get('ip', '').strip()
+    if not ip_value:
+        return jsonify({'error': "The 'ip' parameter is required"}), 400
+
+    try:
+        address = ipaddress.ip_address(ip_value)
+    except ValueError:
+        return jsonify({'error': f'Invalid IP address: {ip_value}'}), 400
+
+    try:
+        list_obj = List.query.get(list_id)
+        index = get_ip_index(list_obj)
+        if index is None:
+            return jsonify({'error': 'This list has no IP column'}), 400
+
+        owners = index.lookup(address)
+        row_ids = sorted({row_id for row_id, _ in owners})
+
+        # Load only the matching rows
+        columns_by_position = {col.position: col.name for col in list_obj.columns}
+        rows = {row_id: {'id': row_id} for row_id in row_ids}
+        if row_ids:
+            cells = db.session.query(ListData.row_id, ListData.column_position, ListData.value).filter(
+                ListData.list_id == list_id,
+                ListData.row_id.in_(row_ids)
+            ).all()
+            for cell in cells:
+                column_name = columns_by_position.get(cell.column_position)
+                if column_name:
+                    rows[cell.row_id][column_name] = cell.value
+
+        return jsonify({
+            'ip': str(address),
+            'data_version': index.data_version,
+            'match_count': len(row_ids),
+            'matches': [
+                dict(rows[row_id], matched_columns=[
+                    columns_by_position.get(position) for owner_row, position in owners if owner_row == row_id
+                ])
+                for row_id in row_ids
+            ]
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error during IP lookup for list {list_id}: {str(e)}")
+        current_app.logger.exception(e)
+        return jsonify({'error': str(e)}), 500
+
+@list_bp.route('/api/lists/<int:list_id>/watch', methods=['GET'])
+@token_auth_required
+@check_list_access
+@check_ip_restriction
+def watch_list(list_id):
+    """Long-poll / SSE endpoint that completes when the list's data version advances"""
+    from routes.public_files_routes import build_public_artifact_urls, watch_list_version
+
+    list_obj = List.query.get(list_id)
+    urls = build_public_artifact_urls(list_obj)
+    urls['data'] = url_for('list_bp.get_list_data', list_id=list_id, _external=True)
+    urls['export_csv'] = url_for('list_bp.export_list_data', list_id=list_id, format='csv', _external=True)
+    urls['export_json'] = url_for('list_bp.export_list_data', list_id=list_id, format='json', _external=True)
+    changes_url = url_for('public_files_bp.get_public_json_changes', token=list_obj.public_access_token, _external=True) \
+        if list_obj.public_json_enabled and list_obj.public_access_token else None
+
+    def artifact_urls(version, since_version):
+        result = dict(urls)
+        if changes_url:
+            result['changes'] = f"{changes_url}?since={since_version}"
+        return result
+
+    return watch_list_version(list_obj, artifact_urls)
+
+@list_bp.route('/api/lists/<int:list_id>/update-history', methods=['GET'])
+@token_auth_required
+@check_list_access
+def get_update_history(list_id):
+    """Returns the recent import runs of a list (success, skipped or error)"""
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+    except ValueError:
+        return jsonify({'error': "The 'limit' parameter must be an integer"}), 400
+
+    return jsonify({'list_id': list_id, 'runs': get_runs(list_id, limit)})
+
+@list_bp.route('/api/search', methods=['GET'])
+@token_auth_required
+def search_lists_value():
+    """Finds which lists contain a value (only the lists the user can access)"""
+    value = request.args.get('value', '')
+    if not value.strip():
+        return jsonify({'error': "The 'value' parameter is required"}), 400
+
+    try:
+        limit = min(max(int(request.args.get('limit', 1000)), 1), 10000)
+    except ValueError:
+        return jsonify({'error': "The 'limit' parameter must be an integer"}), 400
+
+    try:
+        excluded = None
+        if not current_user.is_admin:
+            # IP-restricted lists are only visible from their allowed addresses; they are
+            # excluded in the query so that the limit applies to the visible matches
+            restricted_lists = List.query.filter_by(is_published=True, ip_restriction_enabled=True).all()
+            excluded = [list_obj.id for list_obj in restricted_lists if not check_ip_access(list_obj)]
+        matches = search_value(value, user=current_user, limit=limit, exclude_list_ids=excluded)
+        list_ids = sorted({match['list_id'] for match in matches})
+        return jsonify({
+            'value': value,
+            'match_count': len(matches),
+            'list_ids': list_ids,
+            'matches': matches
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error searching value across lists: {str(e)}")
+        current_app.logger.exception(e)
+        return jsonify({'error': str(e)}), 500
+
 @list_bp.route('/api/lists/<int:list_id>/data/<int:row_id>', methods=['DELETE'])
 @token_auth_required
 @admin_required
@@ -1876,7 +2001,9 @@ def delete_row(list_id, row_id):
         ).delete()
 
         if deleted > 0:
+            list_obj.bump_data_version()
             db.session.commit()
+            on_list_data_changed(list_obj, [row_id])
             current_app.logger.info(f"Row {row_id} from list {list_id} deleted successfully")
             
             # Update public files if enabled
@@ -2006,7 +2133,9 @@ def update_row_data(list_id, row_id):
                     )
                     db.session.add(data_entry)
 
+        list_obj.bump_data_version()
         db.session.commit()
+        on_list_data_changed(list_obj, [row_id])
         current_app.logger.info(f"Row {row_id} of list {list_id} updated successfully")
         
         # Update public files if enabled
@@ -2030,7 +2159,7 @@ def update_row_data(list_id, row_id):
 @check_list_ownership
 @csrf.exempt
 def import_list_data(list_id):
-    """Import data from a CSV or JSON file"""
+    """Import data from a CSV or JSON file (in the background, see /api/jobs/<job_id>; ?wait=true to wait for it)"""
     try:
         file = request.files['file']
         if file.filename == '':
@@ -2042,143 +2171,10 @@ def import_list_data(list_id):
         if file_extension not in ['csv', 'json']:
             return jsonify({'error': 'The file must be in CSV or JSON format'}), 400
             
-        # Read the file content
-        file_content = file.stream.read().decode("UTF8")
-        
-        # Get the list and its columns
-        list_obj = List.query.get_or_404(list_id)
-        columns = {col.name: col for col in list_obj.columns}
-        list_columns = set(columns.keys())
-        
-        # Process according to the file type
-        if file_extension == 'csv':
-            # CSV processing
-            stream = io.StringIO(file_content, newline=None)
-            
-            # Get CSV configuration from the list if it exists
-            update_config = list_obj.get_update_config
-            csv_config = update_config.get('csv_config', {}) if update_config else {}
-            
-            # Use the configured delimiter or comma by default
-            delimiter = csv_config.get('separator', ',')
-            
-            # Check if the first line contains headers
-            has_headers = csv_config.get('has_headers', True)
-            
-            if has_headers:
-                # Use headers from the first line
-                csv_reader = csv.DictReader(stream, delimiter=delimiter)
-            else:
-                # Use manual column names if provided
-                manual_column_names = csv_config.get('column_names', [])
-                if manual_column_names:
-                    csv_reader = csv.DictReader(stream, fieldnames=manual_column_names, delimiter=delimiter)
-                else:
-                    # Generate column names automatically (Col1, Col2, etc.)
-                    # First, read the first line to determine the number of columns
-                    first_line = file_content.split('\n')[0] if '\n' in file_content else file_content
-                    num_columns = len(first_line.split(delimiter))
-                    auto_column_names = [f'Col{i+1}' for i in range(num_columns)]
-                    
-                    # Reset the file cursor
-                    stream.seek(0)
-                    csv_reader = csv.DictReader(stream, fieldnames=auto_column_names, delimiter=delimiter)
-            
-            # Check that all CSV columns match
-            if not csv_reader.fieldnames:
-                return jsonify({'error': 'The CSV file does not contain column headers'}), 400
-                
-            csv_columns = set(csv_reader.fieldnames)
-            
-            if not csv_columns.issubset(list_columns):
-                invalid_columns = csv_columns - list_columns
-                return jsonify({
-                    'error': f'Invalid columns in CSV: {", ".join(invalid_columns)}'
-                }), 400
-                
-            # Convert to a list for processing
-            rows = list(csv_reader)
-            
-            # Apply the results limit if defined
-            if list_obj.max_results > 0 and len(rows) > list_obj.max_results:
-                current_app.logger.info(f"Results limit applied during CSV import: {list_obj.max_results} out of {len(rows)} available results")
-                rows = rows[:list_obj.max_results]
-        else:
-            # JSON processing
-            try:
-                json_data = json.loads(file_content)
-                
-                # Check that the JSON is a list of objects
-                if not isinstance(json_data, list):
-                    return jsonify({'error': 'The JSON file must contain a list of objects'}), 400
-                    
-                if not all(isinstance(row, dict) for row in json_data):
-                    return jsonify({'error': 'The JSON file must contain a list of objects'}), 400
-                    
-                # Check that all keys of the JSON objects match the list's columns
-                all_keys = set()
-                for row in json_data:
-                    all_keys.update(row.keys())
-                    
-                if not all_keys.issubset(list_columns):
-                    invalid_columns = all_keys - list_columns
-                    return jsonify({
-                        'error': f'Invalid columns in JSON: {", ".join(invalid_columns)}'
-                    }), 400
-                    
-                rows = json_data
-                
-                # Apply the results limit if defined
-                if list_obj.max_results > 0 and len(rows) > list_obj.max_results:
-                    current_app.logger.info(f"Results limit applied during JSON import: {list_obj.max_results} out of {len(rows)} available results")
-                    rows = rows[:list_obj.max_results]
-            except json.JSONDecodeError as e:
-                return jsonify({'error': f'JSON decoding error: {str(e)}'}), 400
-        
-        # Find the next available row_id
-        max_row_id = db.session.query(db.func.max(ListData.row_id)).filter(
-            ListData.list_id == list_id
-        ).scalar()
-        next_row_id = (max_row_id or 0) + 1
-            
-        # Import the data
-        row_count = 0
-        for row in rows:
-            row_data = []
-            for col_name, value in row.items():
-                if col_name in columns:
-                    column = columns[col_name]
-                    # Convert to string if necessary
-                    if not isinstance(value, str):
-                        value = str(value)
-                    # Format the date if necessary
-                    if column.column_type == 'date':
-                        value = format_date_for_db(value)
-                    row_data.append(ListData(
-                        list_id=list_id,
-                        column_position=column.position,
-                        row_id=next_row_id,
-                        value=value
-                    ))
-            if row_data:
-                db.session.add_all(row_data)
-                row_count += 1
-                next_row_id += 1
-                
-        db.session.commit()
-        
-        # Update public files if enabled
-        if list_obj.public_csv_enabled or list_obj.public_json_enabled:
-            try:
-                update_public_files(list_obj)
-                current_app.logger.info(f"Public files updated for list {list_id} after import")
-            except Exception as e:
-                current_app.logger.error(f"Error updating public files: {str(e)}")
-                # Do not block the response if updating public files fails
-        
-        return jsonify({
-            'message': f'{row_count} rows imported successfully'
-        })
+        # Spool the file to disk for the import
+        path, size = spool_upload(file)
+        return start_import_job('file_import', list_id, import_list_file, list_id, path, file_extension,
+                                bytes_total=size)
         
     except Exception as e:
         db.session.rollback()
@@ -2191,16 +2187,37 @@ def import_list_data(list_id):
 @check_list_access
 @check_ip_restriction
 def export_list_data(list_id):
-    """Export list data in CSV or JSON format"""
+    """Export list data in CSV, JSON or aggregated CIDR format"""
     format_type = request.args.get('format', 'csv')
     
-    if format_type not in ['json', 'csv']:
+    if format_type not in ['json', 'csv', 'cidr']:
         return jsonify({'error': 'Unsupported format'}), 400
         
     try:
         # Get the list object
         list_obj = List.query.get_or_404(list_id)
         
+        if format_type == 'cidr':
+            # Aggregate an IP column into the minimal set of CIDR blocks
+            column_name = request.args.get('column')
+            if not column_name:
+                ip_columns = [col.name for col in list_obj.columns if col.column_type == 'ip']
+                if not ip_columns:
+                    return jsonify({'error': "No IP column found, use the 'column' parameter"}), 400
+                column_name = ip_columns[0]
+            elif not any(col.name == column_name for col in list_obj.columns):
+                return jsonify({'error': f'Column {column_name} not found'}), 400
+            
+            result = get_aggregated_column(list_obj, column_name)
+            return jsonify({
+                'column': column_name,
+                'data_version': list_obj.data_version or 0,
+                'entries_before': result['entries_before'],
+                'entries_after': result['entries_after'],
+                'invalid_entries': result['invalid_entries'],
+                'networks': result['networks']
+            })
+        
         # Get the data
         data = list_obj.get_data()
         
@@ -2287,7 +2304,9 @@ def bulk_delete_rows(list_id):
 
         # Commit only if rows have been deleted
         if deleted_count > 0:
+            list_obj.bump_data_version()
             db.session.commit()
+            on_list_data_changed(list_obj, row_ids)
             current_app.logger.info(f"{deleted_count} rows deleted successfully in list {list_id}")
             
             # Update public files if enabled
@@ -2408,13 +2427,7 @@ def update_list_from_url(list_id):
             }), 400
         
         # Import data from the URL
-        row_count = list_obj.import_data_from_url()
-        
-        return jsonify({
-            'message': f'{row_count} rows imported successfully',
-            'row_count': row_count,
-            'success': True
-        })
+        return start_import_job('url_import', list_id, import_list_from_url, list_id)
         
     except Exception as e:
         current_app.logger.error(f"Error updating from URL: {str(e)}")
@@ -2425,6 +2438,19 @@ def update_list_from_url(list_id):
         }), 500
 
 
+def import_list_from_url(list_id):
+    """Imports a list's data from its source URL and returns the response of the update"""
+    list_obj = List.query.get(list_id)
+    if not list_obj:
+        raise JobFailed('List not found', {'error': 'List not found', 'success': False}, status_code=404)
+    row_count = list_obj.import_data_from_url()
+    return {
+        'message': f'{row_count} rows imported successfully',
+        'row_count': row_count,
+        'success': True
+    }
+
+
 @list_bp.route('/lists/<int:list_id>/update-data', methods=['POST'])
 @login_required
 @admin_required
@@ -2449,32 +2475,8 @@ def update_list_data(list_id):
                 'success': False
             }), 400
         
-        # Execute the update using the scheduler service
-        scheduler = SchedulerService(current_app)
-        success, logs = scheduler._update_list_data(list_id)
-        
-        # If the update was successful, update the last update date
-        if success:
-            list_obj.last_update = get_paris_now()
-            db.session.commit()
-        
-        # Prepare the response with the execution logs
-        response = {
-            'success': success,
-            'logs': logs
-        }
-        
-        if success:
-            response['message'] = 'Data updated successfully'
-        else:
-            # Extract the error message from the logs if available
-            error_logs = [log for log in logs if log.startswith('ERROR:')]
-            if error_logs:
-                response['error'] = error_logs[0].replace('ERROR: ', '')
-            else:
-                response['error'] = 'Error during data update'
-        
-        return jsonify(response)
+        # Execute the update in the background using the scheduler service
+        return start_import_job('source_update', list_id, run_list_source_update, list_id)
         
     except Exception as e:
         current_app.logger.error(f"Error updating data: {str(e)}")
@@ -2483,4 +2485,39 @@ def update_list_data(list_id):
             'error': str(e),
             'success': False,
             'logs': [f"ERROR: {str(e)}", "An unexpected error occurred during the data update."]
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+def run_list_source_update(list_id):
+    """Runs the scheduled update of a list now and returns its result with the execution logs"""
+    list_obj = List.query.get(list_id)
+    if not list_obj:
+        raise JobFailed('List not found', {'error': 'List not found', 'success': False}, status_code=404)
+    scheduler = SchedulerService(current_app)
+    success, logs = scheduler._update_list_data(list_id)
+    
+    # If the update was successful, update the last update date
+    if success:
+        list_obj.last_update = get_paris_now()
+        db.session.commit()
+    
+    # Prepare the response with the execution logs
+    response = {
+        'success': success,
+        'logs': logs
+    }
+    
+    if success:
+        response['message'] = 'Data updated successfully'
+    else:
+        # Extract the error message from the logs if available
+        error_logs = [log for log in logs if log.startswith('ERROR:')]
+        if error_logs:
+            response['error'] = error_logs[0].replace('ERROR: ', '')
+        else:
+            response['error'] = 'Error during data update'
+    
+    if not success:
+        # The job fails, keeping the logs in its result
+        raise JobFailed(response['error'], response, status_code=200)
+    return response
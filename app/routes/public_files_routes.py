@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, send_file, current_app, request, abort, session
+from flask import Blueprint, jsonify, send_file, current_app, request, abort, session, url_for, Response, stream_with_context
 from models.list import List
 from database import db
 import io
@@ -14,9 +14,16 @@ from datetime import datetime
 from utils.timezone_utils import get_paris_now, format_datetime
 from functools import wraps
 from routes.decorators import public_route
+from services.cidr_aggregation_service import get_aggregated_column
+from services.bloom_filter_service import get_bloom_path, read_bloom_file_version, write_bloom_file
+from services.delta_feed_service import get_changes, load_rows
+from services.list_change_notifier import notifier, stream_version_events, DEFAULT_MAX_WAIT
 
 public_files_bp = Blueprint('public_files_bp', __name__)
 
+# Rows passed to List.apply_filters per call when filtering a change feed
+FILTER_CHUNK_SIZE = 10000
+
 @public_files_bp.route('/favicon.ico')
 @public_route
 def favicon():
@@ -177,15 +184,18 @@ def get_public_txt(token):
         }
         abort(403)
     try:
-        data = list_obj.get_data()
-        if not data:
-            return jsonify({'error': 'Aucune donnée disponible'}), 404
         col_name = getattr(list_obj, 'public_txt_column', None)
         if not col_name:
             return jsonify({'error': 'Aucune colonne sélectionnée pour l’export TXT'}), 400
         # Vérifie si la colonne existe
         if not any(col.name == col_name for col in list_obj.columns):
             return jsonify({'error': f'Colonne {col_name} introuvable'}), 400
+        # Mode agrégé : dédoublonnage et fusion des adresses/réseaux en un minimum de blocs CIDR
+        if request.args.get('aggregate', '').lower() in ('1', 'true', 'yes', 'cidr'):
+            return _send_aggregated_txt(list_obj, col_name)
+        data = list_obj.get_data()
+        if not data:
+            return jsonify({'error': 'Aucune donnée disponible'}), 404
         output = io.StringIO()
         # Option entête
         if getattr(list_obj, 'public_txt_include_headers', True):
@@ -205,6 +215,76 @@ def get_public_txt(token):
         current_app.logger.error(f"Erreur accès TXT public : {str(e)}")
         abort(500)
 
+def _send_aggregated_txt(list_obj, col_name):
+    """
+    Envoie l'export TXT agrégé (CIDR minimal) d'une colonne IP
+    """
+    result = get_aggregated_column(list_obj, col_name)
+    if not result['entries_before']:
+        return jsonify({'error': 'Aucune donnée disponible'}), 404
+    output = io.StringIO()
+    if getattr(list_obj, 'public_txt_include_headers', True):
+        output.write(f"{col_name}\n")
+    for network in result['networks']:
+        output.write(f"{network}\n")
+    response = send_file(
+        io.BytesIO(output.getvalue().encode('utf-8')),
+        mimetype='text/plain',
+        as_attachment=True,
+        download_name=f'{list_obj.name}_{col_name}_cidr_{get_paris_now().strftime("%Y%m%d_%H%M%S")}.txt'
+    )
+    # Compteurs avant/après agrégation
+    response.headers['X-Entries-Before'] = str(result['entries_before'])
+    response.headers['X-Entries-After'] = str(result['entries_after'])
+    response.headers['X-Invalid-Entries'] = str(result['invalid_entries'])
+    response.headers['X-Data-Version'] = str(list_obj.data_version or 0)
+    return response
+
+@public_files_bp.route('/public/bloom/<token>')
+@public_route
+def get_public_bloom(token):
+    """
+    Public access to the Bloom filter of a list column (binary layout documented in bloom_filter_service)
+    """
+    # Find the list by its access token
+    list_obj = List.query.filter_by(public_access_token=token).first()
+    
+    if not list_obj or not list_obj.public_bloom_enabled:
+        abort(404)
+    
+    # Check IP restrictions
+    if list_obj.ip_restriction_enabled and not check_ip_access(list_obj):
+        current_app.logger.warning(f"Unauthorized access attempt to the public Bloom filter of list {list_obj.id} from {request.remote_addr}")
+        # Store IP error information in the session
+        session['ip_error_info'] = {
+            'detected_ip': request.remote_addr,
+            'original_header': request.headers.get('X-Forwarded-For', request.remote_addr),
+            'allowed_ips': list_obj.allowed_ips
+        }
+        abort(403)
+    
+    try:
+        public_files_dir = os.path.join(current_app.root_path, 'public_files')
+        bloom_path = get_bloom_path(public_files_dir, list_obj.id)
+        
+        # Regenerate the filter if it is missing or built from an older data version
+        if read_bloom_file_version(bloom_path) != (list_obj.data_version or 0):
+            os.makedirs(public_files_dir, exist_ok=True)
+            if not write_bloom_file(list_obj, public_files_dir):
+                return jsonify({'error': 'No column configured for the Bloom filter'}), 400
+        
+        response = send_file(
+            bloom_path,
+            mimetype='application/octet-stream',
+            as_attachment=True,
+            download_name=f'{list_obj.name}_{list_obj.public_bloom_column}.bloom'
+        )
+        response.headers['X-Data-Version'] = str(list_obj.data_version or 0)
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error accessing public Bloom filter: {str(e)}")
+        abort(500)
+
 @public_files_bp.route('/public/json/<token>')
 @public_route
 def get_public_json(token):
@@ -252,4 +332,192 @@ def get_public_json(token):
         return jsonify(filtered_data)
     except Exception as e:
         current_app.logger.error(f"Error accessing public JSON file: {str(e)}")
-        abort(500)
\ No newline at end of file
+        abort(500)
+
+@public_files_bp.route('/public/json/<token>/changes')
+@public_route
+def get_public_json_changes(token):
+    """
+    Public delta feed: rows added, modified and removed since a given data version
+    """
+    # Find the list by its access token
+    list_obj = List.query.filter_by(public_access_token=token).first()
+    
+    if not list_obj or not list_obj.public_json_enabled:
+        abort(404)
+    
+    # Check IP restrictions
+    if list_obj.ip_restriction_enabled and not check_ip_access(list_obj):
+        current_app.logger.warning(f"Unauthorized access attempt to the public JSON changes of list {list_obj.id} from {request.remote_addr}")
+        # Store IP error information in the session
+        session['ip_error_info'] = {
+            'detected_ip': request.remote_addr,
+            'original_header': request.headers.get('X-Forwarded-For', request.remote_addr),
+            'allowed_ips': list_obj.allowed_ips
+        }
+        abort(403)
+    
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'error': "The 'since' parameter must be an integer"}), 400
+    
+    try:
+        data_version = list_obj.data_version or 0
+        changes = get_changes(list_obj, since)
+        
+        if changes is None:
+            # The requested version is no longer covered by the change log: send a full snapshot
+            rows = load_rows(list_obj)
+            kept = _rows_passing_filters(list_obj, rows)
+            return jsonify({
+                'data_version': data_version,
+                'since': since,
+                'full_snapshot': True,
+                'rows': [
+                    {'row_id': row_id, 'data': row}
+                    for row_id, row in rows.items() if row_id in kept
+                ]
+            })
+        
+        rows = load_rows(list_obj, changes['added'] | changes['modified'])
+        removed = set(changes['removed'])
+        kept = _rows_passing_filters(list_obj, rows)
+        added = []
+        modified = []
+        for row_id, row in rows.items():
+            # A changed row that no longer passes the list filters is reported as removed
+            if row_id not in kept:
+                removed.add(row_id)
+            elif row_id in changes['added']:
+                added.append({'row_id': row_id, 'data': row})
+            else:
+                modified.append({'row_id': row_id, 'data': row})
+        
+        return jsonify({
+            'data_version': data_version,
+            'since': since,
+            'full_snapshot': False,
+            'added': added,
+            'modified': modified,
+            'removed': sorted(removed)
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error accessing public JSON changes: {str(e)}")
+        abort(500)
+
+def _rows_passing_filters(list_obj, rows):
+    """
+    Applies the list's filter rules to loaded rows, FILTER_CHUNK_SIZE rows per apply_filters call
+
+    Args:
+        list_obj: The list
+        rows: row_id -> row data (load_rows())
+
+    Returns:
+        set: IDs of the rows kept by the filters
+    """
+    if not list_obj.filter_enabled or not list_obj.filter_rules:
+        return set(rows)
+    kept = set()
+    items = list(rows.items())
+    for start in range(0, len(items), FILTER_CHUNK_SIZE):
+        chunk = [dict(row, id=row_id) for row_id, row in items[start:start + FILTER_CHUNK_SIZE]]
+        kept.update(row['id'] for row in list_obj.apply_filters(chunk))
+    return kept
+
+def build_public_artifact_urls(list_obj):
+    """
+    Returns the URLs of the public artifacts enabled for a list
+    """
+    if not list_obj.public_access_token:
+        return {}
+    token = list_obj.public_access_token
+    urls = {}
+    if list_obj.public_csv_enabled:
+        urls['csv'] = url_for('public_files_bp.get_public_csv', token=token, _external=True)
+    if list_obj.public_json_enabled:
+        urls['json'] = url_for('public_files_bp.get_public_json', token=token, _external=True)
+    if list_obj.public_txt_enabled:
+        urls['txt'] = url_for('public_files_bp.get_public_txt', token=token, _external=True)
+    if list_obj.public_bloom_enabled:
+        urls['bloom'] = url_for('public_files_bp.get_public_bloom', token=token, _external=True)
+    return urls
+
+def watch_list_version(list_obj, artifact_urls):
+    """
+    Long-poll or Server-Sent Events response that completes when the list's data version advances
+
+    Query parameters: since (defaults to the current version, or Last-Event-ID for SSE),
+    timeout (seconds, capped by LONG_POLL_MAX_WAIT) and stream=1 to force SSE.
+    """
+    since = request.args.get('since', request.headers.get('Last-Event-ID'))
+    try:
+        since = int(since) if since is not None else (list_obj.data_version or 0)
+        timeout = float(request.args.get('timeout', 30))
+    except ValueError:
+        return jsonify({'error': "The 'since' and 'timeout' parameters must be numbers"}), 400
+    max_wait = current_app.config.get('LONG_POLL_MAX_WAIT', DEFAULT_MAX_WAIT)
+    timeout = min(max(timeout, 0), max_wait)
+    list_id = list_obj.id
+    
+    def build_payload(version, previous_version):
+        # The list object may be detached while streaming: only use already loaded attributes
+        return {
+            'list_id': list_id,
+            'data_version': version,
+            'artifacts': artifact_urls(version, since_version=previous_version)
+        }
+    
+    wants_stream = request.args.get('stream') in ('1', 'true') or \
+        request.accept_mimetypes.best == 'text/event-stream'
+    if wants_stream:
+        return Response(
+            stream_with_context(stream_version_events(list_id, since, max_wait, build_payload)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
+    version = notifier.wait_for_version(list_id, since, timeout)
+    if version is None:
+        abort(404)
+    payload = build_payload(version, since)
+    payload['changed'] = version > since
+    return jsonify(payload)
+
+@public_files_bp.route('/public/watch/<token>')
+@public_route
+def watch_public_list(token):
+    """
+    Blocks until the public list changes, then returns its new data version and artifact URLs
+    """
+    # Find the list by its access token
+    list_obj = List.query.filter_by(public_access_token=token).first()
+    
+    if not list_obj or not (list_obj.public_csv_enabled or list_obj.public_json_enabled
+                            or list_obj.public_txt_enabled or list_obj.public_bloom_enabled):
+        abort(404)
+    
+    # Check IP restrictions
+    if list_obj.ip_restriction_enabled and not check_ip_access(list_obj):
+        current_app.logger.warning(f"Unauthorized access attempt to the public watch endpoint of list {list_obj.id} from {request.remote_addr}")
+        # Store IP error information in the session
+        session['ip_error_info'] = {
+            'detected_ip': request.remote_addr,
+            'original_header': request.headers.get('X-Forwarded-For', request.remote_addr),
+            'allowed_ips': list_obj.allowed_ips
+        }
+        abort(403)
+    
+    # URLs are built now, while the request context is available
+    urls = build_public_artifact_urls(list_obj)
+    changes_url = url_for('public_files_bp.get_public_json_changes', token=token, _external=True) \
+        if list_obj.public_json_enabled else None
+    
+    def artifact_urls(version, since_version):
+        result = dict(urls)
+        if changes_url:
+            result['changes'] = f"{changes_url}?since={since_version}"
+        return result
+    
+    return watch_list_version(list_obj, artifact_urls)
@@ -0,0 +1,209 @@
+"""
+Bloom filter export of a list column
+
+Binary layout (all integers big-endian), version 1:
+
+    offset  size  field
+    0       8     magic            b'LIQBLOOM'
+    8       1     format_version   1
+    9       1     hash_algorithm   1 = double hashing over SHA-256
+    10      2     k                number of hash functions (uint16)
+    12      8     m                number of bits (uint64)
+    20      8     n                number of inserted values (uint64)
+    28      8     data_version     list data version the filter was built from (uint64)
+    36      8     fp_rate          target false-positive rate (IEEE 754 double)
+    44      ...   bits             ceil(m / 8) bytes, bit i is (bits[i >> 3] >> (i & 7)) & 1
+
+Hashing: each value is stripped of surrounding whitespace and encoded in UTF-8.
+With d = SHA-256(value), h1 = uint64(d[0:8]) and h2 = uint64(d[8:16]) | 1,
+the k bit positions are (h1 + i * h2) mod m for i in 0..k-1.
+"""
+import hashlib
+import logging
+import math
+import os
+import struct
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+BLOOM_MAGIC = b'LIQBLOOM'
+BLOOM_FORMAT_VERSION = 1
+BLOOM_HASH_SHA256_DOUBLE = 1
+BLOOM_HEADER = struct.Struct('>8sBBHQQQd')
+
+DEFAULT_FP_RATE = 0.001
+MIN_FP_RATE = 1e-9
+MAX_FP_RATE = 0.5
+
+
+def normalize_fp_rate(fp_rate):
+    """Returns a usable false-positive rate, falling back to the default"""
+    try:
+        fp_rate = float(fp_rate)
+    except (TypeError, ValueError):
+        return DEFAULT_FP_RATE
+    if not (MIN_FP_RATE <= fp_rate <= MAX_FP_RATE):
+        return DEFAULT_FP_RATE
+    return fp_rate
+
+
+def bloom_parameters(item_count, fp_rate):
+    """
+    Computes the optimal number of bits and hash functions
+
+    Args:
+        item_count: Number of values to insert
+        fp_rate: Target false-positive rate
+
+    Returns:
+        tuple: (m, k)
+    """
+    item_count = max(item_count, 1)
+    m = int(math.ceil(-item_count * math.log(fp_rate) / (math.log(2) ** 2)))
+    m = max(m, 8)
+    k = max(1, int(round(m / item_count * math.log(2))))
+    return m, min(k, 0xFFFF)
+
+
+def _bit_positions(value, m, k):
+    """Yields the k bit positions of a value"""
+    digest = hashlib.sha256(value.encode('utf-8')).digest()
+    h1 = int.from_bytes(digest[0:8], 'big')
+    h2 = int.from_bytes(digest[8:16], 'big') | 1
+    for i in range(k):
+        yield (h1 + i * h2) % m
+
+
+def build_bloom_filter(values, fp_rate=DEFAULT_FP_RATE, data_version=0):
+    """
+    Builds the serialized Bloom filter of a set of values
+
+    Args:
+        values: Iterable of raw values (empty values are skipped, duplicates counted once)
+        fp_rate: Target false-positive rate
+        data_version: Data version stored in the header
+
+    Returns:
+        bytes: The serialized filter (header + bit array)
+    """
+    fp_rate = normalize_fp_rate(fp_rate)
+    unique_values = {str(value).strip() for value in values if value is not None and str(value).strip()}
+    m, k = bloom_parameters(len(unique_values), fp_rate)
+
+    bits = bytearray((m + 7) // 8)
+    for value in unique_values:
+        for position in _bit_positions(value, m, k):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    header = BLOOM_HEADER.pack(
+        BLOOM_MAGIC, BLOOM_FORMAT_VERSION, BLOOM_HASH_SHA256_DOUBLE,
+        k, m, len(unique_values), data_version or 0, fp_rate
+    )
+    return header + bytes(bits)
+
+
+def read_bloom_header(payload):
+    """
+    Parses the header of a serialized filter
+
+    Args:
+        payload: Bytes starting with the header
+
+    Returns:
+        dict: Header fields, or None if the payload is not a filter
+    """
+    if len(payload) < BLOOM_HEADER.size:
+        return None
+    magic, format_version, hash_algorithm, k, m, n, data_version, fp_rate = BLOOM_HEADER.unpack_from(payload)
+    if magic != BLOOM_MAGIC:
+        return None
+    return {
+        'format_version': format_version,
+        'hash_algorithm': hash_algorithm,
+        'k': k,
+        'm': m,
+        'n': n,
+        'data_version': data_version,
+        'fp_rate': fp_rate
+    }
+
+
+def bloom_contains(payload, value):
+    """
+    Checks a value against a serialized filter (reference implementation for consumers)
+
+    Args:
+        payload: The serialized filter
+        value: The value to test
+
+    Returns:
+        bool: False if the value is definitely absent, True if it is probably present
+    """
+    header = read_bloom_header(payload)
+    if header is None:
+        raise ValueError("Invalid Bloom filter payload")
+    bits = memoryview(payload)[BLOOM_HEADER.size:]
+    return all(
+        bits[position >> 3] & (1 << (position & 7))
+        for position in _bit_positions(str(value).strip(), header['m'], header['k'])
+    )
+
+
+def get_bloom_path(public_files_dir, list_id):
+    """Returns the path of a list's pre-generated filter"""
+    return os.path.join(public_files_dir, f'list_{list_id}.bloom')
+
+
+def write_bloom_file(list_obj, public_files_dir, data=None):
+    """
+    Generates the Bloom filter file of a list's configured column
+
+    Args:
+        list_obj: The list object
+        public_files_dir: Directory of the public artifacts
+        data: Rows already fetched with get_data(), fetched if not provided
+
+    Returns:
+        str: Path of the written file, or None if the filter is not configured
+    """
+    column_name = list_obj.public_bloom_column
+    if not column_name or not any(col.name == column_name for col in list_obj.columns):
+        logger.warning(f"Bloom filter column not configured or not found for list {list_obj.id}")
+        return None
+
+    if data is None:
+        data = list_obj.get_data()
+
+    payload = build_bloom_filter(
+        (row.get(column_name) for row in data),
+        fp_rate=list_obj.public_bloom_fp_rate,
+        data_version=list_obj.data_version
+    )
+
+    bloom_path = get_bloom_path(public_files_dir, list_obj.id)
+    # Unique temporary file in the same directory: concurrent exports of a list cannot mix their writes
+    fd, tmp_path = tempfile.mkstemp(prefix=f'{os.path.basename(bloom_path)}.', suffix='.tmp',
+                                    dir=os.path.dirname(bloom_path))
+    try:
+        with os.fdopen(fd, 'wb') as bloom_file:
+            bloom_file.write(payload)
+        # mkstemp creates the file readable by its owner only; the filter is a public file
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, bloom_path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    logger.info(f"Public Bloom filter updated for list {list_obj.id} ({len(payload)} bytes)")
+    return bloom_path
+
+
+def read_bloom_file_version(bloom_path):
+    """Returns the data version stored in a pre-generated filter, or None"""
+    try:
+        with open(bloom_path, 'rb') as bloom_file:
+            header = read_bloom_header(bloom_file.read(BLOOM_HEADER.size))
+    except OSError:
+        return None
+    return header['data_version'] if header else None
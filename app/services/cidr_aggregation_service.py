@@ -0,0 +1,102 @@
+import ipaddress
+import logging
+import threading
+
+from utils.ip_lines import ip_value_bounds, parse_ip_value
+
+logger = logging.getLogger(__name__)
+
+# Per-process cache: (list_id, column_name) -> (cache_key, result)
+_aggregation_cache = {}
+_cache_lock = threading.Lock()
+
+
+def value_to_networks(value):
+    """
+    Converts an IP cell value into a list of networks
+
+    Accepts a single address, a CIDR (host bits allowed) or a range "start-end".
+
+    Args:
+        value: The raw cell value
+
+    Returns:
+        list: ipaddress networks, or None if the value is not a valid IP entry
+    """
+    parsed = parse_ip_value(value)
+    if parsed is None:
+        return None
+    if isinstance(parsed, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+        return [parsed]
+    return list(ipaddress.summarize_address_range(*ip_value_bounds(parsed)))
+
+
+def aggregate_values(values):
+    """
+    Dedupes and collapses IP values into the minimal set of CIDR blocks
+
+    Args:
+        values: Iterable of raw cell values
+
+    Returns:
+        dict: {'networks': [str, ...], 'entries_before': int, 'entries_after': int, 'invalid_entries': int}
+    """
+    ipv4 = []
+    ipv6 = []
+    entries_before = 0
+    invalid_entries = 0
+
+    for value in values:
+        if value is None or str(value).strip() == '':
+            continue
+        entries_before += 1
+        networks = value_to_networks(value)
+        if networks is None:
+            invalid_entries += 1
+            continue
+        for network in networks:
+            (ipv4 if network.version == 4 else ipv6).append(network)
+
+    # collapse_addresses requires a single IP version per call
+    collapsed = list(ipaddress.collapse_addresses(ipv4)) + list(ipaddress.collapse_addresses(ipv6))
+
+    return {
+        'networks': [str(network) for network in collapsed],
+        'entries_before': entries_before,
+        'entries_after': len(collapsed),
+        'invalid_entries': invalid_entries
+    }
+
+
+def get_aggregated_column(list_obj, column_name):
+    """
+    Returns the aggregated CIDR set of a list column, cached per data version
+
+    The cache key also includes the filter settings, since get_data() applies them.
+
+    Args:
+        list_obj: The list object
+        column_name: Name of the IP column to aggregate
+
+    Returns:
+        dict: See aggregate_values()
+    """
+    cache_key = (list_obj.data_version or 0, bool(list_obj.filter_enabled), list_obj.filter_rules)
+
+    with _cache_lock:
+        cached = _aggregation_cache.get((list_obj.id, column_name))
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+
+    data = list_obj.get_data()
+    result = aggregate_values(row.get(column_name) for row in data)
+
+    with _cache_lock:
+        _aggregation_cache[(list_obj.id, column_name)] = (cache_key, result)
+
+    logger.info(
+        f"CIDR aggregation for list {list_obj.id}, column {column_name}: "
+        f"{result['entries_before']} -> {result['entries_after']} entries "
+        f"({result['invalid_entries']} invalid)"
+    )
+    return result
@@ -0,0 +1,366 @@
+"""
+In-process execution of curl commands
+
+Curl sources are stored as shell commands. The common options (-X, -H, -d and
+--data*, -u, -k, --compressed, -G...) are translated into a request on the
+shared HTTP client, so curl sources get pooling, retries, streaming and
+conditional requests like URL sources. Commands using other options or shell
+features (pipes, redirections, variables) still run through a curl process.
+"""
+import copy
+import json
+import logging
+import re
+import shlex
+import subprocess
+from urllib.parse import quote_plus
+
+from requests.structures import CaseInsensitiveDict
+
+from services.http_client import get_http_settings, http_request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CURL_TIMEOUT = 60
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+# Options that only change curl's terminal output
+_IGNORED_FLAGS = {'-s', '--silent', '-S', '--show-error', '-v', '--verbose', '-L', '--location',
+                  '--compressed', '-#', '--progress-bar', '--no-progress-meter'}
+# Short flags without value, which may be grouped (-sSLk)
+_BOOLEAN_SHORT_FLAGS = set('sSvLkGf#')
+# Short options whose value may be glued to them (-XPOST)
+_VALUE_SHORT_OPTIONS = ('-X', '-H', '-d', '-u', '-A', '-e', '-m', '-b')
+_DATA_OPTIONS = {'-d', '--data', '--data-ascii', '--data-raw', '--data-binary', '--data-urlencode', '--json'}
+# Shell syntax that only a shell can evaluate
+_SHELL_OPERATORS = re.compile(r'[|&;<>()]')
+
+
+class CurlCommandError(ValueError):
+    """Invalid curl command, or curl process failure"""
+
+
+class UnsupportedCurlCommand(ValueError):
+    """The command uses options or shell features that are not translated"""
+
+
+def _check_shell_syntax(command):
+    """Rejects variables and command substitutions outside single quotes"""
+    in_single = in_double = False
+    index = 0
+    while index < len(command):
+        char = command[index]
+        if char == '\\' and not in_single:
+            # Escaped character
+            index += 2
+            continue
+        if char == "'" and not in_double:
+            in_single = not in_single
+        elif char == '"' and not in_single:
+            in_double = not in_double
+        elif not in_single:
+            following = command[index + 1:index + 2]
+            if char == '`' or (char == '$' and following and (following.isalnum() or following in '_{(')):
+                raise UnsupportedCurlCommand("shell variable or command substitution")
+        index += 1
+
+
+def _split_command(command):
+    """Splits a shell command into arguments (line continuations accepted)"""
+    command = re.sub(r'\\\r?\n', ' ', command.strip())
+    _check_shell_syntax(command)
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        tokens = list(lexer)
+    except ValueError as e:
+        raise CurlCommandError(f"Invalid curl command: {e}") from e
+    for token in tokens:
+        if token and not _SHELL_OPERATORS.sub('', token):
+            raise UnsupportedCurlCommand(f"shell operator '{token}'")
+    return tokens
+
+
+def _read_option(tokens, index, name):
+    """Returns the value of an option and the index of the next argument"""
+    if index + 1 >= len(tokens):
+        raise CurlCommandError(f"Missing value for curl option {name}")
+    return tokens[index + 1], index + 2
+
+
+def _encode_data(option, value):
+    """Applies the encoding of a --data* option to its value"""
+    if value.startswith('@') and option not in ('--data-raw',):
+        raise UnsupportedCurlCommand(f"{option} reading from a file")
+    if option == '--data-urlencode':
+        name, separator, content = value.partition('=')
+        if not separator:
+            return quote_plus(name)
+        return f"{name}={quote_plus(content)}" if name else quote_plus(content)
+    if option in ('-d', '--data', '--data-ascii'):
+        # curl strips line breaks from -d values
+        return value.replace('\r', '').replace('\n', '')
+    return value
+
+
+class CurlRequest:
+    """
+    HTTP request described by a curl command
+
+    Attributes:
+        method: HTTP method
+        url: Target URL
+        headers: Request headers
+        data: Request body (None without --data*)
+        auth: (user, password) tuple of -u, or None
+        verify: False with -k/--insecure, None to use the client settings
+        max_time: --max-time in seconds, or None
+        connect_timeout: --connect-timeout in seconds, or None
+        fail: True with -f/--fail (HTTP errors are errors)
+    """
+
+    def __init__(self, url, method=None, headers=None, data=None, auth=None, verify=None,
+                 max_time=None, connect_timeout=None, fail=False):
+        self.url = url
+        self.method = method
+        self.headers = headers or {}
+        self.data = data
+        self.auth = auth
+        self.verify = verify
+        self.max_time = max_time
+        self.connect_timeout = connect_timeout
+        self.fail = fail
+
+    @property
+    def effective_method(self):
+        return self.method or ('POST' if self.data is not None else 'GET')
+
+    def with_url(self, url):
+        """Returns a copy of the request targeting another URL (next page)"""
+        request = copy.copy(self)
+        request.headers = dict(self.headers)
+        request.url = url
+        return request
+
+    def send(self, stream=False, headers=None, timeout=None):
+        """
+        Sends the request through the shared HTTP client
+
+        Args:
+            stream: Reads the body lazily
+            headers: Additional headers (e.g. conditional request validators)
+            timeout: Timeout used when the command does not set one
+
+        Returns:
+            requests.Response: The response (not checked, like curl without -f)
+        """
+        kwargs = {'headers': {**self.headers, **(headers or {})}, 'stream': stream}
+        if self.data is not None:
+            kwargs['data'] = self.data.encode('utf-8')
+        if self.auth:
+            kwargs['auth'] = self.auth
+        if self.verify is not None:
+            kwargs['verify'] = self.verify
+        read_timeout = self.max_time or timeout
+        if read_timeout or self.connect_timeout:
+            # --max-time bounds the whole transfer in curl; it is used as read timeout here
+            default_connect, default_read = get_http_settings()['timeout']
+            kwargs['timeout'] = (self.connect_timeout or default_connect, read_timeout or default_read)
+        response = http_request(self.effective_method, self.url, **kwargs)
+        if self.fail and response.status_code >= 400:
+            response.close()
+            raise CurlCommandError(f"The requested URL returned error: {response.status_code}")
+        return response
+
+
+def parse_curl_command(command):
+    """
+    Translates a curl command into a CurlRequest
+
+    Args:
+        command: The curl command line
+
+    Returns:
+        CurlRequest: The equivalent request
+
+    Raises:
+        UnsupportedCurlCommand: The command must be run by curl itself
+        CurlCommandError: The command is not a valid curl command
+    """
+    tokens = _split_command(command or '')
+    if not tokens or tokens[0].rsplit('/', 1)[-1] != 'curl':
+        raise UnsupportedCurlCommand("not a plain curl command")
+
+    url = None
+    method = None
+    headers = {}
+    data_parts = []
+    auth = None
+    verify = None
+    max_time = None
+    connect_timeout = None
+    fail = False
+    use_get = False
+
+    index = 1
+    while index < len(tokens):
+        token = tokens[index]
+        if len(token) > 2 and token[0] == '-' and token[1] != '-' and set(token[1:]) <= _BOOLEAN_SHORT_FLAGS:
+            # Grouped flags (-sSL)
+            tokens[index:index + 1] = [f"-{flag}" for flag in token[1:]]
+            token = tokens[index]
+        elif len(token) > 2 and token[:2] in _VALUE_SHORT_OPTIONS:
+            # Value glued to the option (-XPOST)
+            tokens[index:index + 1] = [token[:2], token[2:]]
+            token = token[:2]
+        elif token.startswith('--') and '=' in token and token.split('=', 1)[0] in ('--request', '--header', '--url'):
+            name, value = token.split('=', 1)
+            tokens[index:index + 1] = [name, value]
+            token = name
+
+        if token in _IGNORED_FLAGS:
+            index += 1
+        elif token in ('-X', '--request'):
+            method, index = _read_option(tokens, index, token)
+            method = method.upper()
+        elif token in ('-H', '--header'):
+            value, index = _read_option(tokens, index, token)
+            name, separator, content = value.partition(':')
+            if not separator:
+                raise UnsupportedCurlCommand(f"header '{value}'")
+            if content.strip():
+                headers[name.strip()] = content.strip()
+            else:
+                # 'Name:' removes a header curl would send
+                headers[name.strip()] = None
+        elif token in _DATA_OPTIONS:
+            value, index = _read_option(tokens, index, token)
+            data_parts.append(_encode_data(token, value))
+            if token == '--json':
+                headers.setdefault('Content-Type', 'application/json')
+                headers.setdefault('Accept', 'application/json')
+        elif token in ('-u', '--user'):
+            value, index = _read_option(tokens, index, token)
+            user, _, password = value.partition(':')
+            auth = (user, password)
+        elif token in ('-k', '--insecure'):
+            verify = False
+            index += 1
+        elif token in ('-G', '--get'):
+            use_get = True
+            index += 1
+        elif token in ('-f', '--fail'):
+            fail = True
+            index += 1
+        elif token in ('-A', '--user-agent'):
+            headers['User-Agent'], index = _read_option(tokens, index, token)
+        elif token in ('-e', '--referer'):
+            headers['Referer'], index = _read_option(tokens, index, token)
+        elif token in ('-b', '--cookie'):
+            value, index = _read_option(tokens, index, token)
+            if '=' not in value:
+                raise UnsupportedCurlCommand("cookie file")
+            headers['Cookie'] = value
+        elif token in ('-m', '--max-time'):
+            value, index = _read_option(tokens, index, token)
+            max_time = float(value)
+        elif token == '--connect-timeout':
+            value, index = _read_option(tokens, index, token)
+            connect_timeout = float(value)
+        elif token == '--url':
+            url, index = _read_option(tokens, index, token)
+        elif token.startswith('-') and token != '-':
+            raise UnsupportedCurlCommand(f"option {token}")
+        elif url is None:
+            url = token
+            index += 1
+        else:
+            raise UnsupportedCurlCommand("several URLs")
+
+    if not url:
+        raise CurlCommandError("No URL found in the curl command")
+    if '://' not in url:
+        url = f"http://{url}"
+
+    data = '&'.join(data_parts) if data_parts else None
+    if use_get and data is not None:
+        # -G: the data goes into the query string
+        url = f"{url}{'&' if '?' in url else '?'}{data}"
+        data = None
+        method = method or 'GET'
+    if data is not None and not any(name.lower() == 'content-type' for name in headers):
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+    return CurlRequest(url, method=method, headers=headers, data=data, auth=auth,
+                       verify=verify, max_time=max_time, connect_timeout=connect_timeout, fail=fail)
+
+
+class CurlProcessOutput:
+    """
+    Output of a curl process, exposing the parts of the requests Response API
+    used by the importers
+    """
+
+    def __init__(self, command, returncode, stdout, stderr):
+        self.command = command
+        self.returncode = returncode
+        self.content = stdout or b''
+        self.stderr = stderr.decode('utf-8', errors='replace') if isinstance(stderr, bytes) else (stderr or '')
+        self.status_code = 200 if returncode == 0 else None
+        self.headers = CaseInsensitiveDict()
+        self.encoding = None
+        self.url = None
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8-sig', errors='replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size=OUTPUT_CHUNK_SIZE, decode_unicode=False):
+        chunk_size = chunk_size or OUTPUT_CHUNK_SIZE
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def raise_for_status(self):
+        if self.returncode != 0:
+            raise CurlCommandError(f"cURL command failed with return code {self.returncode}: {self.stderr}")
+
+    def close(self):
+        pass
+
+
+def run_curl_process(command, timeout=DEFAULT_CURL_TIMEOUT):
+    """
+    Runs a curl command in a shell (commands that cannot be translated)
+
+    Raises:
+        CurlCommandError: The command timed out
+    """
+    try:
+        process = subprocess.run(command, shell=True, capture_output=True, check=False, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        raise CurlCommandError(f"cURL command timed out after {timeout} seconds") from e
+    return CurlProcessOutput(command, process.returncode, process.stdout, process.stderr)
+
+
+def execute_curl(command, stream=False, headers=None, timeout=DEFAULT_CURL_TIMEOUT):
+    """
+    Executes a curl command, in process when its options can be translated
+
+    Args:
+        command: The curl command line
+        stream: Reads the body lazily (in-process requests only)
+        headers: Additional headers (in-process requests only)
+        timeout: Timeout in seconds when the command does not set one
+
+    Returns:
+        A requests.Response, or a CurlProcessOutput for commands run by curl
+    """
+    try:
+        request = parse_curl_command(command)
+    except UnsupportedCurlCommand as e:
+        logger.info(f"Running curl command in a subprocess ({e})")
+        return run_curl_process(command, timeout=timeout)
+    return request.send(stream=stream, headers=headers, timeout=timeout)
@@ -0,0 +1,60 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def on_list_data_changed(list_obj, row_ids=None):
+    """
+    Refreshes the structures derived from a list's data after a committed change
+
+    Must be called by every path that writes ListData, after the commit that
+    includes list_obj.bump_data_version(). Errors are logged, never raised, so
+    that a failing derived structure does not fail the write itself.
+
+    Args:
+        list_obj: The list object
+        row_ids: Rows touched by the change; None means the whole list was replaced
+    """
+    # Imported here to avoid circular imports with the models
+    from services.value_index_service import reindex_list
+    from services.ip_index_service import refresh_ip_index
+    from services.delta_feed_service import record_changes
+
+    try:
+        reindex_list(list_obj.id, row_ids)
+    except Exception as e:
+        logger.error(f"Error updating value index for list {list_obj.id}: {str(e)}")
+
+    try:
+        record_changes(list_obj, row_ids)
+    except Exception as e:
+        logger.error(f"Error recording changes for list {list_obj.id}: {str(e)}")
+
+    # Full reloads come from imports: build the IP index eagerly, row edits rebuild it lazily
+    if row_ids is None:
+        refresh_ip_index(list_obj)
+
+    # Wake up the clients waiting for a new version (last, so derived data is ready)
+    from services.list_change_notifier import notifier
+    notifier.notify(list_obj.id, list_obj.data_version or 0)
+
+
+def on_list_deleted(list_id):
+    """
+    Removes the structures derived from a list that is being deleted (before the commit)
+
+    Args:
+        list_id: ID of the deleted list
+    """
+    from services.value_index_service import drop_list
+    from services.delta_feed_service import drop_list_changes
+
+    try:
+        drop_list(list_id)
+    except Exception as e:
+        logger.error(f"Error removing value index entries for list {list_id}: {str(e)}")
+
+    try:
+        drop_list_changes(list_id)
+    except Exception as e:
+        logger.error(f"Error removing change log of list {list_id}: {str(e)}")
@@ -0,0 +1,292 @@
+import hashlib
+import logging
+import threading
+
+from flask import current_app
+from sqlalchemy import text
+
+from database import db
+from models.list_components import ListData
+
+logger = logging.getLogger(__name__)
+
+CHANGE_ADDED = 'added'
+CHANGE_MODIFIED = 'modified'
+CHANGE_REMOVED = 'removed'
+
+# Number of data versions kept in the change log when not configured
+DEFAULT_RETENTION_VERSIONS = 200
+
+# Rows per executemany / IN (...) batch
+BATCH_SIZE = 1000
+
+# Serializes change detection per list within a process
+_list_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _get_list_lock(list_id):
+    with _locks_guard:
+        if list_id not in _list_locks:
+            _list_locks[list_id] = threading.Lock()
+        return _list_locks[list_id]
+
+
+def _chunks(values, size=BATCH_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _in_clause(prefix, values, params):
+    """Adds the values to params and returns the matching IN (...) placeholders"""
+    placeholders = []
+    for i, value in enumerate(values):
+        params[f'{prefix}{i}'] = value
+        placeholders.append(f':{prefix}{i}')
+    return ', '.join(placeholders)
+
+
+def _current_row_hashes(list_id, row_ids=None):
+    """
+    Computes the content hash of the current rows of a list
+
+    Args:
+        list_id: ID of the list
+        row_ids: Rows to hash; None hashes the whole list
+
+    Returns:
+        dict: row_id -> SHA-256 of the row's (column_position, value) cells
+    """
+    def hash_query(query):
+        hashes = {}
+        current_row = None
+        digest = None
+        for row_id, column_position, value in query:
+            if row_id != current_row:
+                if current_row is not None:
+                    hashes[current_row] = digest.hexdigest()
+                current_row = row_id
+                digest = hashlib.sha256()
+            digest.update(f"{column_position}\x1f{'' if value is None else value}\x1e".encode('utf-8'))
+        if current_row is not None:
+            hashes[current_row] = digest.hexdigest()
+        return hashes
+
+    base_query = db.session.query(
+        ListData.row_id,
+        ListData.column_position,
+        ListData.value
+    ).filter(ListData.list_id == list_id)
+
+    if row_ids is None:
+        return hash_query(base_query.order_by(ListData.row_id, ListData.column_position).yield_per(10000))
+
+    hashes = {}
+    for chunk in _chunks(row_ids):
+        hashes.update(hash_query(
+            base_query.filter(ListData.row_id.in_(chunk)).order_by(ListData.row_id, ListData.column_position)
+        ))
+    return hashes
+
+
+def _stored_row_hashes(list_id, row_ids=None):
+    """Returns the row hashes recorded at the previous change detection"""
+    if row_ids is None:
+        result = db.session.execute(
+            text("SELECT row_id, row_hash FROM list_row_state WHERE list_id = :list_id"),
+            {'list_id': list_id}
+        )
+        return {row.row_id: row.row_hash for row in result}
+
+    hashes = {}
+    for chunk in _chunks(row_ids):
+        params = {'list_id': list_id}
+        placeholders = _in_clause('r', chunk, params)
+        result = db.session.execute(
+            text(f"SELECT row_id, row_hash FROM list_row_state WHERE list_id = :list_id AND row_id IN ({placeholders})"),
+            params
+        )
+        hashes.update({row.row_id: row.row_hash for row in result})
+    return hashes
+
+
+def record_changes(list_obj, row_ids=None):
+    """
+    Detects the rows changed since the last detection and logs them under the current data version
+
+    Args:
+        list_obj: The list object (data_version already bumped and committed)
+        row_ids: Rows touched by the change; None compares the whole list
+
+    Returns:
+        dict: Number of rows per change type
+    """
+    list_id = list_obj.id
+    version = list_obj.data_version or 0
+
+    with _get_list_lock(list_id):
+        try:
+            if row_ids is not None:
+                row_ids = sorted({int(row_id) for row_id in row_ids})
+            current = _current_row_hashes(list_id, row_ids)
+            stored = _stored_row_hashes(list_id, row_ids)
+
+            changes = []
+            for row_id, row_hash in current.items():
+                previous = stored.get(row_id)
+                if previous is None:
+                    changes.append((row_id, CHANGE_ADDED, row_hash))
+                elif previous != row_hash:
+                    changes.append((row_id, CHANGE_MODIFIED, row_hash))
+            for row_id in stored.keys() - current.keys():
+                changes.append((row_id, CHANGE_REMOVED, None))
+
+            for chunk in _chunks(changes):
+                db.session.execute(
+                    text("""
+                    INSERT INTO list_row_changes (list_id, data_version, row_id, change_type, created_at)
+                    VALUES (:list_id, :version, :row_id, :change_type, NOW())
+                    """),
+                    [{'list_id': list_id, 'version': version, 'row_id': row_id, 'change_type': change_type}
+                     for row_id, change_type, _ in chunk]
+                )
+
+                upserts = [change for change in chunk if change[1] != CHANGE_REMOVED]
+                if upserts:
+                    db.session.execute(
+                        text("""
+                        INSERT INTO list_row_state (list_id, row_id, row_hash, data_version)
+                        VALUES (:list_id, :row_id, :row_hash, :version)
+                        ON DUPLICATE KEY UPDATE row_hash = VALUES(row_hash), data_version = VALUES(data_version)
+                        """),
+                        [{'list_id': list_id, 'row_id': row_id, 'row_hash': row_hash, 'version': version}
+                         for row_id, _, row_hash in upserts]
+                    )
+
+                removed = [row_id for row_id, change_type, _ in chunk if change_type == CHANGE_REMOVED]
+                if removed:
+                    params = {'list_id': list_id}
+                    placeholders = _in_clause('r', removed, params)
+                    db.session.execute(
+                        text(f"DELETE FROM list_row_state WHERE list_id = :list_id AND row_id IN ({placeholders})"),
+                        params
+                    )
+
+            _compact(list_id, version)
+            db.session.commit()
+
+            summary = {
+                CHANGE_ADDED: sum(1 for change in changes if change[1] == CHANGE_ADDED),
+                CHANGE_MODIFIED: sum(1 for change in changes if change[1] == CHANGE_MODIFIED),
+                CHANGE_REMOVED: sum(1 for change in changes if change[1] == CHANGE_REMOVED)
+            }
+            logger.info(f"Changes recorded for list {list_id} at version {version}: {summary}")
+            return summary
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error recording changes for list {list_id}: {str(e)}")
+            return None
+
+
+def _compact(list_id, version):
+    """Drops the change log entries older than the retention window"""
+    retention = current_app.config.get('DELTA_RETENTION_VERSIONS', DEFAULT_RETENTION_VERSIONS)
+    db.session.execute(
+        text("DELETE FROM list_row_changes WHERE list_id = :list_id AND data_version <= :cutoff"),
+        {'list_id': list_id, 'cutoff': version - retention}
+    )
+
+
+def drop_list_changes(list_id):
+    """Removes the change log and row state of a deleted list (without committing)"""
+    db.session.execute(text("DELETE FROM list_row_changes WHERE list_id = :list_id"), {'list_id': list_id})
+    db.session.execute(text("DELETE FROM list_row_state WHERE list_id = :list_id"), {'list_id': list_id})
+
+
+def get_changes(list_obj, since):
+    """
+    Returns the net row changes of a list after a given data version
+
+    Args:
+        list_obj: The list object
+        since: Data version already known by the consumer
+
+    Returns:
+        dict: {'added': {row_id, ...}, 'modified': {...}, 'removed': {...}}, or None if the
+        change log no longer covers the requested version (a full snapshot is then needed)
+    """
+    version = list_obj.data_version or 0
+    if since > version:
+        return None
+    if since == version:
+        return {CHANGE_ADDED: set(), CHANGE_MODIFIED: set(), CHANGE_REMOVED: set()}
+
+    oldest = db.session.execute(
+        text("SELECT MIN(data_version) FROM list_row_changes WHERE list_id = :list_id"),
+        {'list_id': list_obj.id}
+    ).scalar()
+    # Versions before the oldest logged one have been compacted away (or were never tracked)
+    if oldest is None or since < oldest - 1:
+        return None
+
+    result = db.session.execute(
+        text("""
+        SELECT row_id, change_type FROM list_row_changes
+        WHERE list_id = :list_id AND data_version > :since
+        ORDER BY data_version, id
+        """),
+        {'list_id': list_obj.id, 'since': since}
+    )
+
+    # Collapse successive changes of a row into its net change
+    first_change = {}
+    last_change = {}
+    for row in result:
+        first_change.setdefault(row.row_id, row.change_type)
+        last_change[row.row_id] = row.change_type
+
+    net = {CHANGE_ADDED: set(), CHANGE_MODIFIED: set(), CHANGE_REMOVED: set()}
+    for row_id, last in last_change.items():
+        existed_before = first_change[row_id] != CHANGE_ADDED
+        if last == CHANGE_REMOVED:
+            if existed_before:
+                net[CHANGE_REMOVED].add(row_id)
+        elif existed_before:
+            net[CHANGE_MODIFIED].add(row_id)
+        else:
+            net[CHANGE_ADDED].add(row_id)
+    return net
+
+
+def load_rows(list_obj, row_ids=None):
+    """
+    Loads rows as {row_id: {column_name: value}}
+
+    Args:
+        list_obj: The list object
+        row_ids: Rows to load; None loads the whole list
+
+    Returns:
+        dict: Rows by row_id
+    """
+    columns_by_position = {col.position: col.name for col in list_obj.columns}
+    rows = {}
+
+    def collect(query):
+        for row_id, column_position, value in query:
+            column_name = columns_by_position.get(column_position)
+            if column_name:
+                rows.setdefault(row_id, {})[column_name] = value
+
+    base_query = db.session.query(
+        ListData.row_id,
+        ListData.column_position,
+        ListData.value
+    ).filter(ListData.list_id == list_obj.id)
+
+    if row_ids is None:
+        collect(base_query.order_by(ListData.row_id, ListData.column_position).yield_per(10000))
+    else:
+        for chunk in _chunks(sorted(row_ids)):
+            collect(base_query.filter(ListData.row_id.in_(chunk)))
+    return rows
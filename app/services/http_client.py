@@ -0,0 +1,243 @@
+"""
+Shared HTTP client used by every fetch path (URL imports, scripts, JSON tests)
+
+- one pooled requests.Session per scheme://host, created on first use
+- proxy and SSL settings resolved once from the environment / Flask config
+- default (connect, read) timeouts
+- bounded retries with exponential backoff on connection errors and 429/5xx
+- optional per-host rate limit (requests-ratelimiter)
+"""
+import logging
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import should_bypass_proxies
+from urllib3.util.retry import Retry
+
+try:
+    from requests_ratelimiter import LimiterAdapter
+except ImportError:
+    LimiterAdapter = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 60
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_POOL_SIZE = 10
+# Requests per second per host, 0 disables the limit
+DEFAULT_RATE_LIMIT_PER_SECOND = 0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_sessions = {}
+_settings = None
+_lock = threading.Lock()
+
+
+def _config(name, default):
+    """Reads a setting from the Flask config when an application is active, else from the environment"""
+    try:
+        from flask import current_app
+        value = current_app.config.get(name)
+    except RuntimeError:
+        value = None
+    if value in (None, ''):
+        value = os.environ.get(name)
+    return default if value in (None, '') else value
+
+
+def _resolve_settings():
+    """Resolves proxies, SSL verification and client tuning (environment first, then Flask config)"""
+    def env_or_config(name):
+        return os.environ.get(name) or os.environ.get(name.lower()) or _config(name, '') or _config(name.lower(), '')
+
+    proxies = {}
+    if env_or_config('HTTP_PROXY'):
+        proxies['http'] = env_or_config('HTTP_PROXY')
+    if env_or_config('HTTPS_PROXY'):
+        proxies['https'] = env_or_config('HTTPS_PROXY')
+
+    verify_ssl = str(os.environ.get('VERIFY_SSL') or _config('VERIFY_SSL', 'false')).lower() == 'true'
+    # A custom CA bundle is only meaningful when verification is enabled
+    ca_bundle = os.environ.get('REQUESTS_CA_BUNDLE') or os.environ.get('SSL_CERT_FILE')
+    verify = (ca_bundle or True) if verify_ssl else False
+
+    if not verify_ssl:
+        import urllib3
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    host_rate_limits = _config('HTTP_HOST_RATE_LIMITS', {})
+    if not isinstance(host_rate_limits, dict):
+        host_rate_limits = {}
+
+    settings = {
+        'proxies': proxies,
+        'no_proxy': env_or_config('NO_PROXY'),
+        'verify': verify,
+        'timeout': (float(_config('HTTP_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)),
+                    float(_config('HTTP_READ_TIMEOUT', DEFAULT_READ_TIMEOUT))),
+        'max_retries': int(_config('HTTP_MAX_RETRIES', DEFAULT_MAX_RETRIES)),
+        'retry_backoff': float(_config('HTTP_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF)),
+        'pool_size': int(_config('HTTP_POOL_SIZE', DEFAULT_POOL_SIZE)),
+        'rate_limit': float(_config('HTTP_RATE_LIMIT_PER_SECOND', DEFAULT_RATE_LIMIT_PER_SECOND)),
+        'host_rate_limits': host_rate_limits
+    }
+    logger.info(f"HTTP client settings: proxies={proxies}, no_proxy={settings['no_proxy']}, "
+                f"verify={verify}, timeout={settings['timeout']}, retries={settings['max_retries']}")
+    return settings
+
+
+def get_http_settings():
+    """Returns the resolved client settings (computed once per process)"""
+    global _settings
+    if _settings is None:
+        with _lock:
+            if _settings is None:
+                _settings = _resolve_settings()
+    return _settings
+
+
+def _host_key(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+def _build_session(host_key, settings):
+    retry = Retry(
+        total=settings['max_retries'],
+        backoff_factor=settings['retry_backoff'],
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter_kwargs = {
+        'max_retries': retry,
+        'pool_connections': 1,
+        'pool_maxsize': settings['pool_size']
+    }
+
+    host = urlsplit(host_key).hostname or ''
+    rate_limit = float(settings['host_rate_limits'].get(host, settings['rate_limit']) or 0)
+    if rate_limit > 0 and LimiterAdapter is not None:
+        adapter = LimiterAdapter(per_second=rate_limit, per_host=True, **adapter_kwargs)
+    else:
+        if rate_limit > 0:
+            logger.warning(f"requests-ratelimiter is not installed, no rate limit applied to {host_key}")
+        adapter = HTTPAdapter(**adapter_kwargs)
+
+    session = requests.Session()
+    session.mount(host_key, adapter)
+    session.verify = settings['verify']
+    # NO_PROXY is evaluated once per host instead of at every request
+    if settings['proxies'] and not should_bypass_proxies(host_key, no_proxy=settings['no_proxy']):
+        session.proxies.update(settings['proxies'])
+    return session
+
+
+def get_session(url):
+    """
+    Returns the pooled session of the URL's host
+
+    Args:
+        url: Any URL of the host
+
+    Returns:
+        requests.Session: Session with retries, rate limit, proxies and SSL settings
+    """
+    key = _host_key(url)
+    session = _sessions.get(key)
+    if session is None:
+        with _lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _build_session(key, get_http_settings())
+                _sessions[key] = session
+    return session
+
+
+def http_request(method, url, **kwargs):
+    """
+    Sends a request through the shared client
+
+    Explicit arguments (timeout, verify, proxies, headers...) override the defaults.
+
+    Args:
+        method: HTTP method
+        url: Target URL
+        **kwargs: Arguments accepted by requests.Session.request
+
+    Returns:
+        requests.Response: The response (not checked with raise_for_status)
+    """
+    session = get_session(url)
+    settings = get_http_settings()
+    kwargs.setdefault('timeout', settings['timeout'])
+    # Passed explicitly: requests would otherwise let REQUESTS_CA_BUNDLE override session.verify
+    kwargs.setdefault('verify', session.verify)
+    if kwargs.get('proxies') is None:
+        kwargs['proxies'] = dict(session.proxies)
+    return session.request(method, url, **kwargs)
+
+
+def http_get(url, **kwargs):
+    """Sends a GET request through the shared client"""
+    return http_request('GET', url, **kwargs)
+
+
+def reset_http_client(settings=None):
+    """
+    Closes the pooled sessions and forgets the resolved settings (after a configuration change)
+
+    Args:
+        settings: Settings to use from now on instead of resolving them again
+            (e.g. settings resolved by the web process, given to a script worker)
+    """
+    global _settings
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _settings = settings
+
+
+class ClientRequestsModule:
+    """
+    Stand-in for the requests module that routes calls through the shared client
+
+    Given to user scripts instead of patching requests.get globally; attributes
+    other than the request helpers (exceptions, Session...) come from requests.
+    """
+
+    def __init__(self, on_request=None):
+        self._on_request = on_request
+
+    def request(self, method, url, **kwargs):
+        if self._on_request:
+            self._on_request(method.upper(), url)
+        return http_request(method, url, **kwargs)
+
+    def get(self, url, params=None, **kwargs):
+        return self.request('GET', url, params=params, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+    def post(self, url, data=None, json=None, **kwargs):
+        return self.request('POST', url, data=data, json=json, **kwargs)
+
+    def put(self, url, data=None, **kwargs):
+        return self.request('PUT', url, data=data, **kwargs)
+
+    def patch(self, url, data=None, **kwargs):
+        return self.request('PATCH', url, data=data, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
@@ -0,0 +1,246 @@
+"""
+Lists fed by another list of the application
+
+A list can take its data from another List-IQ list, either with the 'list'
+source (update_config: {'source': 'list', 'source_list_id': ...}) or with a URL
+pointing at the public JSON export of a list of this instance
+(.../public/json/<token>). Such sources are not fetched over HTTP: the rows are
+copied inside the database by INSERT ... SELECT statements, the column
+selection becoming a mapping of column positions and the source list's filters
+a WHERE clause. The copy uses constant memory on the application side whatever
+the size of the source list.
+"""
+import hashlib
+import json
+import logging
+import os
+
+from flask import current_app
+from sqlalchemy import text
+
+from database import db
+from models.list_components import ListColumn
+from utils.json_path import DottedPath, JSONPathError, compile_json_path
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_JSON_PREFIX = '/public/json/'
+# Escape character of the LIKE patterns built from filter values
+_LIKE_ESCAPE = '!'
+
+
+def internal_domains():
+    """Host names under which the application reaches itself"""
+    app_domain = os.environ.get('SERVER_NAME') or current_app.config.get('SERVER_NAME', 'localhost')
+    return ["localhost:5000", "web:5000", "nginx", app_domain]
+
+
+def internal_list_token(url):
+    """
+    Returns the public token of a URL pointing at a list of this instance
+
+    Args:
+        url: The configured source URL
+
+    Returns:
+        str: Public access token of the list, or None for an external URL
+    """
+    if not url or PUBLIC_JSON_PREFIX not in url:
+        return None
+    if not any(domain and domain in url for domain in internal_domains()):
+        return None
+    token = url.split(PUBLIC_JSON_PREFIX, 1)[1].split('?')[0].strip().rstrip('/')
+    # Other endpoints under the export (e.g. /changes) are fetched normally
+    if not token or '/' in token:
+        return None
+    return token
+
+
+def resolve_source_list(config):
+    """
+    Finds the list a list is fed from
+
+    Args:
+        config: The list's update_config
+
+    Returns:
+        List: The source list, or None if the source is not an internal list
+
+    Raises:
+        ValueError: The configured list does not exist
+    """
+    from models.list import List
+
+    config = config or {}
+    if config.get('source') == 'list':
+        source_list = List.query.get(config.get('source_list_id'))
+        if source_list is None:
+            raise ValueError(f"Source list {config.get('source_list_id')} not found")
+        return source_list
+    if config.get('source') == 'url':
+        token = internal_list_token(config.get('url'))
+        if token is None:
+            return None
+        source_list = List.query.filter_by(public_access_token=token).first()
+        if source_list is None:
+            raise ValueError(f"List with public ID {token} not found")
+        return source_list
+    return None
+
+
+def source_fingerprint(source_list):
+    """Identifies the content of a source list: its data version, columns and filters"""
+    state = {
+        'list_id': source_list.id,
+        'data_version': source_list.data_version or 0,
+        'columns': sorted((column.position, column.name) for column in source_list.columns),
+        'filter_enabled': bool(source_list.filter_enabled),
+        'filter_rules': source_list.filter_rules if source_list.filter_enabled else None
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def filter_values(source_list):
+    """
+    Filter values of a list, as applied by List.apply_filters
+
+    A row is kept when one of its values contains one of the filter values
+    (case-insensitive).
+
+    Returns:
+        list: Lowercase filter values, or None when the list's rows are not filtered
+    """
+    if not source_list.filter_enabled or not source_list.filter_rules:
+        return None
+    rules = source_list.filter_rules
+    if isinstance(rules, str):
+        if not rules.strip():
+            return None
+        try:
+            rules = json.loads(rules)
+        except json.JSONDecodeError:
+            # apply_filters returns the rows unfiltered in this case
+            logger.warning(f"List {source_list.id}: invalid filter rules, rows are not filtered")
+            return None
+    if not rules or not isinstance(rules, list):
+        return None
+    values = [str(value).lower() for value in rules]
+    # An empty value is contained in every value
+    return None if '' in values else values
+
+
+def column_mapping(source_columns, selected_columns):
+    """
+    Maps the selected columns of the target list onto the source list's columns
+
+    Args:
+        source_columns: Columns of the source list
+        selected_columns: The target's json_selected_columns (all the source
+            columns when empty)
+
+    Returns:
+        list: (source position, target name, target type) triples, or None if a
+        selected path cannot be translated into a source column (nested path or
+        expression)
+    """
+    by_name = {column.name: column for column in source_columns}
+    if not selected_columns:
+        return [(column.position, column.name, column.column_type or 'text')
+                for column in sorted(source_columns, key=lambda column: column.position)]
+
+    mapping = []
+    for selected in selected_columns:
+        if not isinstance(selected, dict) or not selected.get('name'):
+            continue
+        source_name = selected['name']
+        if selected.get('path'):
+            try:
+                path = compile_json_path(selected['path'])
+            except JSONPathError:
+                return None
+            if not isinstance(path, DottedPath) or len(path.parts) != 1:
+                return None
+            source_name = path.parts[0]
+        source_column = by_name.get(source_name)
+        # A column missing from the source is not created, as for a JSON import
+        if source_column is not None:
+            mapping.append((source_column.position, selected['name'],
+                            selected.get('type') or source_column.column_type or 'text'))
+    return mapping
+
+
+def copy_list_rows(target_list, source_list, mapping, max_results=0):
+    """
+    Copies the rows of a list into another list inside the database (without committing)
+
+    The target list's columns are created from the mapping; the target must
+    have no data or columns left. Rows are renumbered from 0 in the order of
+    the source list.
+
+    Args:
+        target_list: The list being imported
+        source_list: The list it is fed from
+        mapping: (source position, target name, target type) triples (column_mapping())
+        max_results: Maximum number of rows copied (0 = all)
+
+    Returns:
+        int: Number of rows copied
+    """
+    if source_list.id == target_list.id:
+        raise ValueError("A list cannot be fed from itself")
+    if not mapping:
+        logger.warning(f"List {target_list.id}: no column of list {source_list.id} to copy")
+        return 0
+
+    columns = [ListColumn(list_id=target_list.id, name=name, column_type=column_type, position=position)
+               for position, (_, name, column_type) in enumerate(mapping)]
+    db.session.add_all(columns)
+    db.session.flush()
+
+    params = {'target_id': target_list.id, 'source_id': source_list.id}
+    # Source position -> target position, as a derived table (a source column may be selected twice)
+    mapping_rows = []
+    for position, (source_position, _, _) in enumerate(mapping):
+        params[f'source_position_{position}'] = source_position
+        params[f'target_position_{position}'] = position
+        mapping_rows.append(f"SELECT :source_position_{position} AS source_position, "
+                            f":target_position_{position} AS target_position")
+
+    # Rows of the source list kept by its filters (List.apply_filters), numbered in order
+    row_filter = ''
+    values = filter_values(source_list)
+    if values:
+        conditions = []
+        for index, value in enumerate(values):
+            escaped = value.replace(_LIKE_ESCAPE, _LIKE_ESCAPE * 2).replace('%', f'{_LIKE_ESCAPE}%').replace('_', f'{_LIKE_ESCAPE}_')
+            params[f'filter_{index}'] = f'%{escaped}%'
+            conditions.append(f"LOWER(d.value) LIKE :filter_{index} ESCAPE '{_LIKE_ESCAPE}'")
+        row_filter = f"AND ({' OR '.join(conditions)})"
+    row_limit = ''
+    if max_results and max_results > 0:
+        params['max_results'] = max_results
+        row_limit = 'WHERE r.new_row_id < :max_results'
+
+    rows_sql = f"""
+        SELECT kept.row_id, ROW_NUMBER() OVER (ORDER BY kept.row_id) - 1 AS new_row_id
+        FROM (
+            SELECT DISTINCT d.row_id
+            FROM list_data d
+            JOIN list_columns c ON c.list_id = d.list_id AND c.position = d.column_position
+            WHERE d.list_id = :source_id {row_filter}
+        ) kept
+    """
+    db.session.execute(text(f"""
+        INSERT INTO list_data (list_id, row_id, column_position, value, created_at, updated_at)
+        SELECT :target_id, r.new_row_id, m.target_position, d.value, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM ({rows_sql}) r
+        JOIN list_data d ON d.list_id = :source_id AND d.row_id = r.row_id
+        JOIN ({' UNION ALL '.join(mapping_rows)}) m ON m.source_position = d.column_position
+        {row_limit}
+    """), params)
+
+    row_count = db.session.execute(text(
+        "SELECT COUNT(DISTINCT row_id) FROM list_data WHERE list_id = :target_id"
+    ), {'target_id': target_list.id}).scalar() or 0
+    logger.info(f"List {target_list.id}: copied {row_count} rows and {len(columns)} columns from list {source_list.id} in the database")
+    return row_count
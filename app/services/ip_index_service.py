@@ -0,0 +1,199 @@
+import bisect
+import logging
+import threading
+from collections import Counter
+
+from database import db
+from models.list_components import ListColumn, ListData
+from utils.ip_lines import ip_value_bounds, parse_ip_value
+
+logger = logging.getLogger(__name__)
+
+# Per-process cache: list_id -> IPIntervalIndex (each index carries its data_version)
+_index_cache = {}
+_cache_lock = threading.Lock()
+
+
+def parse_ip_interval(value):
+    """
+    Converts an IP cell value into an integer interval
+
+    Accepts a single address ("10.0.0.1"), a CIDR ("10.0.0.0/8", host bits allowed)
+    or a range ("10.0.0.1-10.0.0.50").
+
+    Args:
+        value: The raw cell value
+
+    Returns:
+        tuple: (ip_version, start, end) or None if the value is not a valid IP entry
+    """
+    parsed = parse_ip_value(value)
+    if parsed is None:
+        return None
+    start, end = ip_value_bounds(parsed)
+    return start.version, int(start), int(end)
+
+
+class IPIntervalIndex:
+    """
+    Sorted interval index over the IP cells of a list
+
+    Intervals are flattened into disjoint segments: bounds[i] is the first address
+    of segment i and owners[i] the (row_id, column_position) cells covering it until
+    bounds[i + 1] - 1. A lookup is therefore a single bisect, O(log n).
+    """
+
+    def __init__(self, list_id, data_version):
+        self.list_id = list_id
+        self.data_version = data_version
+        self.entry_count = 0
+        self.invalid_count = 0
+        self._bounds = {4: [], 6: []}
+        self._owners = {4: [], 6: []}
+
+    def build(self, cells):
+        """
+        Builds the index from an iterable of (row_id, column_position, value)
+
+        Args:
+            cells: IP cells of the list
+        """
+        events = {4: [], 6: []}
+        for row_id, column_position, value in cells:
+            interval = parse_ip_interval(value)
+            if interval is None:
+                if value:
+                    self.invalid_count += 1
+                continue
+            version, start, end = interval
+            owner = (row_id, column_position)
+            events[version].append((start, 1, owner))
+            events[version].append((end + 1, -1, owner))
+            self.entry_count += 1
+
+        for version, version_events in events.items():
+            self._bounds[version], self._owners[version] = self._sweep(version_events)
+        return self
+
+    @staticmethod
+    def _sweep(events):
+        """Turns start/end events into disjoint segments with their covering cells"""
+        bounds = []
+        owners = []
+        active = Counter()
+        events.sort(key=lambda event: event[0])
+
+        i = 0
+        while i < len(events):
+            position = events[i][0]
+            # Apply every event located at this boundary before emitting the segment
+            while i < len(events) and events[i][0] == position:
+                _, delta, owner = events[i]
+                active[owner] += delta
+                if active[owner] <= 0:
+                    del active[owner]
+                i += 1
+
+            segment_owners = tuple(sorted(active))
+            if owners and owners[-1] == segment_owners:
+                continue
+            bounds.append(position)
+            owners.append(segment_owners)
+
+        return bounds, owners
+
+    def lookup(self, address):
+        """
+        Returns the (row_id, column_position) cells whose interval contains the address
+
+        Args:
+            address: An ipaddress.IPv4Address / IPv6Address
+
+        Returns:
+            tuple: Covering cells, empty if none
+        """
+        bounds = self._bounds[address.version]
+        position = bisect.bisect_right(bounds, int(address)) - 1
+        if position < 0:
+            return ()
+        return self._owners[address.version][position]
+
+    def stats(self):
+        """Returns a summary of the index"""
+        return {
+            'data_version': self.data_version,
+            'entries': self.entry_count,
+            'invalid_entries': self.invalid_count,
+            'ipv4_segments': len(self._bounds[4]),
+            'ipv6_segments': len(self._bounds[6])
+        }
+
+
+def build_ip_index(list_obj):
+    """
+    Builds the interval index of a list's IP columns and stores it in the cache
+
+    Args:
+        list_obj: The list object
+
+    Returns:
+        IPIntervalIndex: The index, or None if the list has no IP column
+    """
+    ip_positions = [
+        col.position for col in ListColumn.query.filter_by(list_id=list_obj.id, column_type='ip').all()
+    ]
+    if not ip_positions:
+        with _cache_lock:
+            _index_cache.pop(list_obj.id, None)
+        return None
+
+    cells = db.session.query(
+        ListData.row_id,
+        ListData.column_position,
+        ListData.value
+    ).filter(
+        ListData.list_id == list_obj.id,
+        ListData.column_position.in_(ip_positions)
+    ).yield_per(10000)
+
+    index = IPIntervalIndex(list_obj.id, list_obj.data_version or 0).build(cells)
+    with _cache_lock:
+        _index_cache[list_obj.id] = index
+
+    logger.info(f"IP index built for list {list_obj.id}: {index.stats()}")
+    return index
+
+
+def get_ip_index(list_obj):
+    """
+    Returns the cached index of a list, rebuilding it if the data version changed
+
+    Args:
+        list_obj: The list object
+
+    Returns:
+        IPIntervalIndex: The index, or None if the list has no IP column
+    """
+    with _cache_lock:
+        index = _index_cache.get(list_obj.id)
+    if index is not None and index.data_version == (list_obj.data_version or 0):
+        return index
+    return build_ip_index(list_obj)
+
+
+def refresh_ip_index(list_obj):
+    """
+    Rebuilds the index after an import, without propagating errors to the caller
+
+    Args:
+        list_obj: The list object
+
+    Returns:
+        bool: True if the index was rebuilt (or not needed), False on error
+    """
+    try:
+        build_ip_index(list_obj)
+        return True
+    except Exception as e:
+        logger.error(f"Error building IP index for list {list_obj.id}: {str(e)}")
+        return False
@@ -0,0 +1,409 @@
+"""
+Background execution of manual imports
+
+A request enqueues a job and returns its identifier; a bounded pool of threads
+runs the job inside an application context. The job's row (import_jobs) holds
+its state so that any web process can report it:
+
+- phase, bytes read / total, rows written / total and an ETA
+- cancellation: a flag set on the row, checked by the running job each time it
+  reports progress; the job's transaction is then rolled back
+
+Importers report progress with report_progress(), a no-op outside of a job.
+
+The process running the jobs refreshes their rows every HEARTBEAT_INTERVAL
+seconds; a queued or running job whose row is no longer refreshed was lost with
+its process (restart, crash) and is marked as failed.
+"""
+import json
+import logging
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import text
+
+from database import db
+from models.list_components import ImportJob
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+DEFAULT_IMPORT_JOB_WORKERS = 2
+# Finished jobs are deleted after this many days
+DEFAULT_JOB_RETENTION_DAYS = 7
+# Minimum delay between two progress writes of a job
+PROGRESS_INTERVAL = 1.0
+# Delay between two refreshes of the rows of the jobs queued or running in this process
+HEARTBEAT_INTERVAL = 5 * PROGRESS_INTERVAL
+# A queued or running job whose row was not refreshed for this long has lost its process
+STALE_JOB_SECONDS = 6 * HEARTBEAT_INTERVAL
+STALE_JOB_MESSAGE = 'Interrupted: the process running the import stopped'
+
+_PROGRESS_FIELDS = ('phase', 'bytes_read', 'bytes_total', 'rows_written', 'rows_total')
+
+_executor = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+# Identifiers of the jobs queued or running in this process
+_live_jobs = set()
+_heartbeat = None
+
+
+class JobCancelled(Exception):
+    """The job was cancelled by a user"""
+
+
+class JobFailed(Exception):
+    """
+    The job ended in error
+
+    Args:
+        message: Error message of the job
+        result: Kept as the job's result (logs, details); also the response body
+            when the import runs in the request
+        status_code: HTTP status of that response
+    """
+
+    def __init__(self, message, result=None, status_code=400):
+        super().__init__(message)
+        self.result = result
+        self.status_code = status_code
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobContext:
+    """Progress of the job running in the current thread"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.progress = {}
+        self.cancelled = False
+        self._last_write = 0.0
+
+    def report(self, force=False, **progress):
+        """
+        Records progress, writing it at most every PROGRESS_INTERVAL seconds
+
+        Raises:
+            JobCancelled: A user asked to cancel the job
+        """
+        self.progress.update({key: value for key, value in progress.items() if value is not None})
+        if self.cancelled:
+            raise JobCancelled()
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        if _write_progress(self.job_id, self.progress):
+            self.cancelled = True
+            raise JobCancelled()
+
+
+def _write_progress(job_id, progress):
+    """Saves the progress of a job outside of the job's transaction and returns its cancellation flag"""
+    assignments = ', '.join(f"{field} = :{field}" for field in _PROGRESS_FIELDS if field in progress)
+    params = {field: progress[field] for field in _PROGRESS_FIELDS if field in progress}
+    params.update({'id': job_id, 'now': _utcnow()})
+    with db.engine.begin() as connection:
+        connection.execute(
+            text(f"UPDATE import_jobs SET {assignments + ', ' if assignments else ''}updated_at = :now WHERE id = :id"),
+            params
+        )
+        return bool(connection.execute(
+            text("SELECT cancel_requested FROM import_jobs WHERE id = :id"), {'id': job_id}
+        ).scalar())
+
+
+def current_job():
+    """Returns the JobContext of the current thread, or None outside of a job"""
+    return getattr(_local, 'job', None)
+
+
+def report_progress(**progress):
+    """
+    Reports the progress of the current job (no-op outside of a job)
+
+    Args:
+        phase: Current step ('uploading', 'downloading', 'parsing', 'writing'...)
+        bytes_read, bytes_total: Input read so far / input size
+        rows_written, rows_total: Rows written so far / expected rows
+
+    Raises:
+        JobCancelled: A user asked to cancel the job
+    """
+    job = current_job()
+    if job is not None:
+        job.report(**progress)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = int(current_app.config.get('IMPORT_JOB_WORKERS', DEFAULT_IMPORT_JOB_WORKERS))
+                _executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='import-job')
+    return _executor
+
+
+def _start_heartbeat(app):
+    global _heartbeat
+    with _executor_lock:
+        if _heartbeat is None:
+            _heartbeat = threading.Thread(target=_heartbeat_loop, args=(app,), name='import-job-heartbeat', daemon=True)
+            _heartbeat.start()
+
+
+def _heartbeat_loop(app):
+    """Refreshes the rows of the jobs of this process, so that they are not taken for lost jobs"""
+    while True:
+        time.sleep(HEARTBEAT_INTERVAL)
+        with _executor_lock:
+            job_ids = list(_live_jobs)
+        if not job_ids:
+            continue
+        try:
+            with app.app_context():
+                now = _utcnow()
+                with db.engine.begin() as connection:
+                    connection.execute(
+                        text("UPDATE import_jobs SET updated_at = :now WHERE id = :id"),
+                        [{'id': job_id, 'now': now} for job_id in job_ids]
+                    )
+        except Exception as e:
+            logger.warning(f"Error refreshing the import jobs of this process: {str(e)}")
+
+
+def submit_job(kind, list_id, func, *args, user_id=None, bytes_total=None, **kwargs):
+    """
+    Enqueues a job
+
+    Args:
+        kind: Type of job ('file_import', 'url_import', 'source_update')
+        list_id: ID of the imported list
+        func: Callable run in the background with *args and **kwargs; returns the
+            JSON-serializable result of the job
+        user_id: ID of the user who started the job
+        bytes_total: Size of the input when known
+
+    Returns:
+        str: Identifier of the job
+    """
+    _delete_old_jobs()
+    job = ImportJob(
+        id=secrets.token_hex(16),
+        list_id=list_id,
+        user_id=user_id,
+        kind=kind,
+        status=JOB_QUEUED,
+        phase='queued',
+        bytes_read=0,
+        bytes_total=bytes_total,
+        rows_written=0,
+        created_at=_utcnow(),
+        updated_at=_utcnow()
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    with _executor_lock:
+        _live_jobs.add(job.id)
+    _start_heartbeat(app)
+    _get_executor().submit(_run_job, app, job.id, func, args, kwargs)
+    logger.info(f"Import job {job.id} ({kind}) queued for list {list_id}")
+    return job.id
+
+
+def _run_job(app, job_id, func, args, kwargs):
+    with app.app_context():
+        job = JobContext(job_id)
+        _local.job = job
+        try:
+            started = db.session.execute(
+                text("""
+                UPDATE import_jobs SET status = :running, phase = 'starting', started_at = :now, updated_at = :now
+                WHERE id = :id AND status = :queued
+                """),
+                {'id': job_id, 'running': JOB_RUNNING, 'queued': JOB_QUEUED, 'now': _utcnow()}
+            ).rowcount
+            db.session.commit()
+            if not started:
+                # Cancelled while queued
+                return
+
+            result = func(*args, **kwargs)
+            if job.cancelled:
+                raise JobCancelled()
+            _finish(job, JOB_SUCCEEDED, result=result)
+        except Exception as e:
+            db.session.rollback()
+            # Importers may turn the cancellation into their own error
+            if job.cancelled or isinstance(e, JobCancelled):
+                logger.info(f"Import job {job_id} cancelled")
+                _finish(job, JOB_CANCELLED, message='Cancelled by the user')
+            elif isinstance(e, JobFailed):
+                _finish(job, JOB_FAILED, message=str(e), result=e.result)
+            else:
+                logger.exception(f"Import job {job_id} failed: {str(e)}")
+                _finish(job, JOB_FAILED, message=str(e))
+        finally:
+            _local.job = None
+            with _executor_lock:
+                _live_jobs.discard(job_id)
+            db.session.remove()
+
+
+def _finish(job, status, message=None, result=None):
+    try:
+        record = db.session.get(ImportJob, job.job_id)
+        if record is None:
+            return
+        for field in _PROGRESS_FIELDS:
+            if field in job.progress:
+                setattr(record, field, job.progress[field])
+        record.status = status
+        record.phase = 'done'
+        record.message = message[:2000] if message else None
+        record.result = json.dumps(result, default=str) if result is not None else None
+        record.finished_at = record.updated_at = _utcnow()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error saving the state of import job {job.job_id}: {str(e)}")
+
+
+def _delete_old_jobs():
+    retention = int(current_app.config.get('IMPORT_JOB_RETENTION_DAYS', DEFAULT_JOB_RETENTION_DAYS))
+    db.session.execute(
+        text("DELETE FROM import_jobs WHERE finished_at IS NOT NULL AND finished_at < :cutoff"),
+        {'cutoff': _utcnow() - timedelta(days=retention)}
+    )
+    _fail_stale_jobs()
+
+
+def _fail_stale_jobs(job_id=None):
+    """
+    Marks as failed the queued or running jobs whose row is no longer refreshed
+
+    Args:
+        job_id: Only checks this job (all the jobs when None)
+
+    Returns:
+        int: Number of jobs marked as failed
+    """
+    now = _utcnow()
+    params = {
+        'failed': JOB_FAILED, 'queued': JOB_QUEUED, 'running': JOB_RUNNING, 'message': STALE_JOB_MESSAGE,
+        'now': now, 'cutoff': now - timedelta(seconds=STALE_JOB_SECONDS)
+    }
+    job_filter = ''
+    if job_id is not None:
+        params['id'] = job_id
+        job_filter = 'AND id = :id'
+    failed = db.session.execute(
+        text(f"""
+        UPDATE import_jobs SET status = :failed, phase = 'done', message = :message, finished_at = :now, updated_at = :now
+        WHERE status IN (:queued, :running) AND COALESCE(updated_at, created_at) < :cutoff {job_filter}
+        """),
+        params
+    ).rowcount
+    if failed:
+        logger.warning(f"{failed} import job(s) marked as failed: no longer refreshed by their process")
+    return failed
+
+
+def get_job(job_id):
+    """Returns the ImportJob with this identifier, or None (a lost queued or running job is marked as failed first)"""
+    job = db.session.get(ImportJob, job_id)
+    if job is not None and job.status in (JOB_QUEUED, JOB_RUNNING) and _fail_stale_jobs(job_id):
+        db.session.commit()
+        db.session.refresh(job)
+    return job
+
+
+def cancel_job(job_id):
+    """
+    Cancels a queued or running job
+
+    A queued job is cancelled at once; a running job stops the next time it
+    reports progress.
+
+    Returns:
+        bool: False if the job was already finished
+    """
+    params = {'id': job_id, 'now': _utcnow(), 'queued': JOB_QUEUED, 'running': JOB_RUNNING, 'cancelled': JOB_CANCELLED}
+    cancelled = db.session.execute(
+        text("""
+        UPDATE import_jobs SET status = :cancelled, phase = 'done', message = 'Cancelled by the user',
+            cancel_requested = 1, finished_at = :now, updated_at = :now
+        WHERE id = :id AND status = :queued
+        """),
+        params
+    ).rowcount
+    if not cancelled:
+        cancelled = db.session.execute(
+            text("UPDATE import_jobs SET cancel_requested = 1 WHERE id = :id AND status = :running"),
+            params
+        ).rowcount
+    db.session.commit()
+    return bool(cancelled)
+
+
+def job_to_dict(job):
+    """Public representation of a job, with its completion ratio and ETA in seconds"""
+    # Rows are the better measure once their number is known
+    progress = None
+    if job.rows_total:
+        progress = min((job.rows_written or 0) / job.rows_total, 1.0)
+    elif job.bytes_total:
+        progress = min((job.bytes_read or 0) / job.bytes_total, 1.0)
+
+    eta = None
+    if job.status == JOB_RUNNING and job.started_at and progress:
+        elapsed = (_utcnow() - job.started_at.replace(tzinfo=None)).total_seconds()
+        eta = round(elapsed * (1 - progress) / progress, 1)
+
+    result = None
+    if job.result:
+        try:
+            result = json.loads(job.result)
+        except ValueError:
+            result = job.result
+
+    def iso(value):
+        return value.isoformat() if value else None
+
+    return {
+        'id': job.id,
+        'list_id': job.list_id,
+        'kind': job.kind,
+        'status': job.status,
+        'finished': job.status in FINISHED_STATUSES,
+        'phase': job.phase,
+        'bytes_read': job.bytes_read or 0,
+        'bytes_total': job.bytes_total,
+        'rows_written': job.rows_written or 0,
+        'rows_total': job.rows_total,
+        'progress': round(progress, 4) if progress is not None else None,
+        'eta_seconds': eta,
+        'cancel_requested': bool(job.cancel_requested),
+        'message': job.message,
+        'result': result,
+        'created_at': iso(job.created_at),
+        'started_at': iso(job.started_at),
+        'finished_at': iso(job.finished_at)
+    }
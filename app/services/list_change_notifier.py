@@ -0,0 +1,125 @@
+import json
+import logging
+import threading
+import time
+
+from sqlalchemy import text
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# Interval between two database checks while waiting (picks up writes made by other workers)
+DEFAULT_POLL_INTERVAL = 2.0
+# Upper bound of a single long-poll or SSE connection, in seconds
+DEFAULT_MAX_WAIT = 60
+
+
+class ListChangeNotifier:
+    """
+    In-process notifier of list data versions
+
+    Write paths of this process wake up waiting requests immediately through
+    notify(); writes made by other workers are detected by polling the
+    data_version column every poll_interval seconds.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._versions = {}
+
+    def notify(self, list_id, data_version):
+        """Publishes a new data version of a list"""
+        with self._condition:
+            if data_version > self._versions.get(list_id, -1):
+                self._versions[list_id] = data_version
+            self._condition.notify_all()
+
+    def wait_for_version(self, list_id, since, timeout, poll_interval=DEFAULT_POLL_INTERVAL):
+        """
+        Blocks until the list's data version is greater than since, or until the timeout
+
+        Args:
+            list_id: ID of the list
+            since: Version already known by the client
+            timeout: Maximum wait in seconds
+            poll_interval: Interval between database checks
+
+        Returns:
+            int: The current data version (equal to since on timeout), or None if the list is gone
+        """
+        deadline = time.monotonic() + max(timeout, 0)
+        while True:
+            version = fetch_data_version(list_id)
+            if version is None or version > since:
+                return version
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return version
+
+            with self._condition:
+                if self._versions.get(list_id, -1) <= since:
+                    self._condition.wait(min(poll_interval, remaining))
+
+
+notifier = ListChangeNotifier()
+
+
+def fetch_data_version(list_id):
+    """
+    Reads the current data version of a list on a fresh connection
+
+    A separate connection is used so that repeated reads are not served from the
+    snapshot of the request's open transaction.
+
+    Args:
+        list_id: ID of the list
+
+    Returns:
+        int: The data version, or None if the list does not exist
+    """
+    with db.engine.connect() as connection:
+        row = connection.execute(
+            text("SELECT data_version FROM lists WHERE id = :list_id"),
+            {'list_id': list_id}
+        ).first()
+    if row is None:
+        return None
+    return row[0] or 0
+
+
+def stream_version_events(list_id, since, max_duration, build_payload, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Generates Server-Sent Events each time the list's data version advances
+
+    Args:
+        list_id: ID of the list
+        since: Version already known by the client
+        max_duration: Duration after which the stream ends (the client reconnects with Last-Event-ID)
+        build_payload: Callable(version, previous version) returning the JSON-serializable event data
+        poll_interval: Interval between database checks
+
+    Yields:
+        str: SSE frames
+    """
+    deadline = time.monotonic() + max_duration
+    yield f"retry: {int(poll_interval * 1000)}\n\n"
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+
+        version = notifier.wait_for_version(list_id, since, min(remaining, 15), poll_interval)
+        if version is None:
+            yield "event: deleted\ndata: {}\n\n"
+            return
+
+        if version > since:
+            payload = build_payload(version, since)
+            since = version
+            yield f"id: {version}\nevent: version\ndata: {json.dumps(payload)}\n\n"
+        else:
+            # Comment line to keep intermediaries from closing an idle connection
+            yield ": keepalive\n\n"
@@ -1,9 +1,15 @@
-from typing import List as TypeList, Dict, Any, Optional
+from typing import List as TypeList, Dict, Any, Iterable, Optional
 from datetime import datetime
 from models.list import List, ListColumn, ListData, db
 import requests
+import itertools
 import json
-import os
+from models.data_writer import ListDataWriter, create_deduplicator
+from services.http_client import http_get
+from utils.schema_inference import DEFAULT_SAMPLE_SIZE, build_converter, date_format_of, infer_column
+
+# Marks the cells absent from a row (a None value is still written)
+_MISSING = object()
 
 class ListService:
     @staticmethod
@@ -179,39 +185,45 @@ class ListService:
             return False
             
     @staticmethod
-    def update_list_data(list_id: int, data: TypeList[Dict[str, Any]]) -> bool:
-        """Updates a list's data"""
+    def update_list_data(list_id: int, data: Iterable[Dict[str, Any]], stats: Optional[Dict[str, Any]] = None) -> bool:
+        """Updates a list's data
+        
+        Args:
+            list_id: ID of the list
+            data: Rows as a list or as a lazy iterator (e.g. paginated source); rows are
+                written in batches as they are produced
+            stats: Dictionary completed with 'rows_written' and 'duplicates_dropped'
+        """
         list_obj = List.query.get(list_id)
         if not list_obj:
             return False
 
         try:
             # Apply the results limit if defined
-            if list_obj.max_results > 0 and len(data) > list_obj.max_results:
-                print(f"ListService: Results limit applied: {list_obj.max_results} out of {len(data)} available results")
-                data = data[:list_obj.max_results]
+            if list_obj.max_results > 0:
+                if isinstance(data, list) and len(data) > list_obj.max_results:
+                    print(f"ListService: Results limit applied: {list_obj.max_results} out of {len(data)} available results")
+                # Stops consuming (and fetching) a lazy source once the limit is reached
+                data = itertools.islice(data, list_obj.max_results)
+            rows = iter(data)
             
             # Delete old data
             ListData.query.filter_by(list_id=list_id).delete()
             
-            # Create or update columns
-            if data and len(data) > 0:
-                columns = list(data[0].keys())
+            # Sample the first rows once to infer the schema, then put them back
+            sample = list(itertools.islice(rows, DEFAULT_SAMPLE_SIZE))
+            if sample:
+                columns = list(sample[0].keys())
+                existing_columns = {col.name: col for col in ListColumn.query.filter_by(list_id=list_id)}
                 column_objects = []
+                converters = []
                 
                 # Create or update columns
                 for position, col_name in enumerate(columns):
-                    col = ListColumn.query.filter_by(list_id=list_id, name=col_name).first()
+                    col = existing_columns.get(col_name)
+                    values = [row.get(col_name) for row in sample]
                     if not col:
-                        # Detect column type
-                        col_type = 'text'  # Default type
-                        if col_name.lower() in ['date', 'datetime']:
-                            col_type = 'date'
-                        elif col_name.lower() in ['ip', 'ipaddress', 'ip_address']:
-                            col_type = 'ip'
-                        elif col_name.lower() in ['number', 'num', 'level']:
-                            col_type = 'number'
-
+                        col_type, date_format = infer_column(col_name, values)
                         col = ListColumn(
                             list_id=list_id,
                             name=col_name,
@@ -221,41 +233,41 @@ class ListService:
                         db.session.add(col)
                     else:
                         col.position = position
+                        date_format = date_format_of(values) if col.column_type == 'date' else None
                     column_objects.append(col)
+                    # Validate and format the values according to the column type
+                    converters.append(build_converter(col.column_type, date_format))
                 
                 db.session.flush()
 
-                # Add the new data
-                for row_idx, row_data in enumerate(data):
-                    for col_name, value in row_data.items():
-                        col = next((c for c in column_objects if c.name == col_name), None)
-                        if col:
-                            # Validate and format the value according to the column type
-                            formatted_value = value
-                            try:
-                                if col.column_type == 'date' and value:
-                                    # Try different date formats
-                                    for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%Y']:
-                                        try:
-                                            formatted_value = datetime.strptime(str(value), fmt).strftime('%Y-%m-%d')
-                                            break
-                                        except ValueError:
-                                            continue
-                                elif col.column_type == 'number' and value:
-                                    formatted_value = float(value)
-                            except (ValueError, TypeError):
-                                formatted_value = str(value)
-
-                            data_entry = ListData(
-                                list_id=list_id,
-                                column_position=col.position,
-                                row_id=row_idx,
-                                value=str(formatted_value)
-                            )
-                            db.session.add(data_entry)
+                # Add the new data, converted column by column for each batch of rows
+                writer = ListDataWriter(list_id, deduplicator=create_deduplicator(
+                    list_id, list_obj.update_config, column_objects))
+                row_idx = 0
+                all_rows = itertools.chain(sample, rows)
+                while True:
+                    batch = list(itertools.islice(all_rows, writer.batch_size))
+                    if not batch:
+                        break
+                    batch_columns = []
+                    for col, convert in zip(column_objects, converters):
+                        values = [row.get(col.name, _MISSING) for row in batch]
+                        batch_columns.append((col.position, [
+                            None if value is _MISSING else convert(value) for value in values
+                        ]))
+                    writer.add_columns(row_idx, batch_columns)
+                    row_idx += len(batch)
+                writer.close()
+                if stats is not None:
+                    stats.update(rows_written=writer.rows_written, duplicates_dropped=writer.duplicates_dropped)
 
             list_obj.last_update = datetime.now()
+            list_obj.bump_data_version()
             db.session.commit()
+
+            # Refresh the indexes derived from the list's data
+            from services.data_change_service import on_list_data_changed
+            on_list_data_changed(list_obj)
             return True
 
         except Exception as e:
@@ -295,6 +307,8 @@ class ListService:
         if not list_obj:
             return False
         
+        from services.data_change_service import on_list_deleted
+        on_list_deleted(list_id)
         db.session.delete(list_obj)
         db.session.commit()
         return True
@@ -389,26 +403,8 @@ class ListService:
         try:
             print(f"Fetching data from URL: {url}")  # Debug log
             
-            # Get proxy environment variables
-            proxies = {}
-            http_proxy = os.environ.get('HTTP_PROXY') or os.environ.get('http_proxy')
-            https_proxy = os.environ.get('HTTPS_PROXY') or os.environ.get('https_proxy')
-            no_proxy = os.environ.get('NO_PROXY') or os.environ.get('no_proxy')
-            
-            # Configure proxies if they are defined
-            if http_proxy:
-                proxies['http'] = http_proxy
-                print(f"Using HTTP proxy: {http_proxy}")
-            if https_proxy:
-                proxies['https'] = https_proxy
-                print(f"Using HTTPS proxy: {https_proxy}")
-            
-            # Configure SSL verification
-            verify_ssl = os.environ.get('VERIFY_SSL', 'true').lower() != 'false'
-            print(f"SSL verification: {'enabled' if verify_ssl else 'disabled'}")
-            
-            # Make the request with proxy parameters
-            response = requests.get(url, proxies=proxies if proxies else None, verify=verify_ssl)
+            # Shared pooled client (proxy, SSL, timeouts, retries and rate limit)
+            response = http_get(url)
             response.raise_for_status()
             
             if is_json:
@@ -0,0 +1,189 @@
+"""
+Pipelined pagination of JSON sources
+
+Pages are yielded in order while the following ones are already being fetched:
+the next page is always prefetched while the caller parses and writes the
+current one. When two consecutive page URLs differ only by an integer query
+parameter (page number, offset), the following URLs are predicted and fetched
+concurrently within a bounded window. Every prediction is checked against the
+next-page link of the page before it, and the window is dropped as soon as
+they disagree.
+
+With a row budget (max_results), the window is limited to the pages still
+needed at the rate of the pages already read, and pagination ends as soon as
+the budget is spent.
+"""
+import logging
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+# Number of pages fetched ahead of the page being processed
+DEFAULT_PAGINATION_WINDOW = 4
+
+
+def get_path_value(data, path):
+    """
+    Reads a dot-separated path ('links.next', 'paging.0.next') in parsed JSON
+
+    Returns:
+        The value, or None if the path does not exist
+    """
+    current = data
+    for key in (path or '').split('.'):
+        if not key:
+            continue
+        if isinstance(current, dict) and key in current:
+            current = current[key]
+        elif isinstance(current, list) and key.isdigit() and int(key) < len(current):
+            current = current[int(key)]
+        else:
+            return None
+    return current
+
+
+def infer_page_step(current_url, next_url):
+    """
+    Detects a predictable pagination pattern between two consecutive page URLs
+
+    Args:
+        current_url: URL of a page
+        next_url: URL of the following page
+
+    Returns:
+        tuple: (parameter name, step) if the URLs only differ by an increasing
+        integer query parameter, None otherwise
+    """
+    if not current_url or not next_url:
+        return None
+    current, following = urlsplit(current_url), urlsplit(next_url)
+    if current[:3] != following[:3]:
+        return None
+
+    current_params = dict(parse_qsl(current.query, keep_blank_values=True))
+    next_params = dict(parse_qsl(following.query, keep_blank_values=True))
+    # Exactly one parameter changes (or only appears on the next page)
+    changed = [key for key in next_params if current_params.get(key) != next_params[key]]
+    if len(changed) != 1 or set(current_params) - set(next_params):
+        return None
+
+    name = changed[0]
+    try:
+        # A missing parameter on the first page means the API's default (page 1 / offset 0)
+        current_value = int(current_params[name]) if name in current_params else None
+        next_value = int(next_params[name])
+    except ValueError:
+        return None
+    if current_value is None:
+        current_value = next_value - 1 if next_value in (1, 2) else 0
+    step = next_value - current_value
+    return (name, step) if step > 0 else None
+
+
+def build_page_url(url, name, value):
+    """Returns the URL with the query parameter name set to value"""
+    parts = urlsplit(url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    params = [(key, str(value) if key == name else item) for key, item in params]
+    if not any(key == name for key, _ in params):
+        params.append((name, str(value)))
+    return urlunsplit(parts._replace(query=urlencode(params)))
+
+
+def iter_pages(first_url, fetch_page, next_page_path, max_pages=10, window=DEFAULT_PAGINATION_WINDOW, first_page=None,
+               remaining_items=None):
+    """
+    Fetches the pages of a paginated source, ahead of their consumption
+
+    Args:
+        first_url: URL of the first page
+        fetch_page: Callable(url) returning the parsed JSON of a page
+        next_page_path: Path of the next page URL in a page
+        max_pages: Maximum number of pages
+        window: Maximum number of pages fetched concurrently
+        first_page: Already fetched first page, if any
+        remaining_items: Callable returning the number of items the caller still
+            wants, checked each time it asks for the next page (None = no limit)
+
+    Yields:
+        tuple: (page number starting at 1, page URL, parsed page)
+    """
+    window = max(int(window or 1), 1)
+    max_pages = max(int(max_pages or 1), 1)
+    executor = ThreadPoolExecutor(max_workers=window, thread_name_prefix='pagination')
+    pending = deque()
+    pattern = None
+
+    def schedule(url):
+        pending.append((url, executor.submit(fetch_page, url)))
+
+    def drop_pending():
+        while pending:
+            pending.popleft()[1].cancel()
+
+    try:
+        if first_page is not None:
+            current = (first_url, None)
+        else:
+            schedule(first_url)
+            current = None
+
+        page_number = 0
+        # Last page worth prefetching, lowered by the item budget
+        prefetch_limit = max_pages
+        while page_number < max_pages:
+            if current is not None:
+                url, payload = current[0], first_page
+                current = None
+            elif pending:
+                url, future = pending.popleft()
+                payload = future.result()
+            else:
+                return
+            page_number += 1
+
+            next_url = get_path_value(payload, next_page_path)
+            next_url = urljoin(url, next_url) if isinstance(next_url, str) and next_url else None
+
+            # Check the speculative pages against the real next-page link
+            if pending and pending[0][0] != next_url:
+                logger.info(f"Pagination: predicted page {pending[0][0]} does not match next link {next_url}, "
+                            f"dropping {len(pending)} prefetched pages")
+                drop_pending()
+                pattern = None
+
+            if next_url and page_number < max_pages:
+                if not pending:
+                    pattern = pattern or infer_page_step(url, next_url)
+                    schedule(next_url)
+                # Keep the window full with predicted URLs
+                if pattern:
+                    name, step = pattern
+                    while len(pending) < window and page_number + len(pending) < prefetch_limit:
+                        last_value = int(dict(parse_qsl(urlsplit(pending[-1][0]).query)).get(name, 0))
+                        schedule(build_page_url(pending[-1][0], name, last_value + step))
+            else:
+                drop_pending()
+
+            remaining_before = remaining_items() if remaining_items else None
+            yield page_number, url, payload
+
+            if not next_url:
+                return
+            if remaining_items:
+                remaining = remaining_items()
+                if remaining <= 0:
+                    logger.info(f"Pagination: item budget spent after page {page_number}, no further page requested")
+                    return
+                # Predicted pages beyond those still needed at the size of the page just read
+                page_items = remaining_before - remaining
+                if page_items > 0:
+                    prefetch_limit = min(max_pages, page_number + math.ceil(remaining / page_items))
+                    while len(pending) > 1 and page_number + len(pending) > prefetch_limit:
+                        pending.pop()[1].cancel()
+    finally:
+        drop_pending()
+        executor.shutdown(wait=False)
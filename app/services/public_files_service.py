@@ -4,12 +4,13 @@ import csv
 import logging
 from flask import current_app
 from models.list import List
+from services.bloom_filter_service import write_bloom_file
 
 logger = logging.getLogger(__name__)
 
 def update_public_files(list_obj):
     """
-    Updates the public CSV and JSON files for a given list
+    Updates the public CSV, JSON and Bloom filter files for a given list
     
     Args:
         list_obj: The list object to update
@@ -19,7 +20,7 @@ def update_public_files(list_obj):
     """
     try:
         # Check if public files are enabled
-        if not list_obj.public_csv_enabled and not list_obj.public_json_enabled:
+        if not list_obj.public_csv_enabled and not list_obj.public_json_enabled and not list_obj.public_bloom_enabled:
             return True
         
         # Create the public files directory if it does not exist
@@ -60,6 +61,10 @@ def update_public_files(list_obj):
                 
             logger.info(f"Public JSON file updated for list {list_obj.id}")
         
+        # Generate the Bloom filter if enabled
+        if list_obj.public_bloom_enabled:
+            write_bloom_file(list_obj, public_files_dir, data)
+        
         return True
     except Exception as e:
         logger.error(f"Error updating public files for list {list_obj.id}: {str(e)}")
@@ -6,14 +6,23 @@ from models.list import List, db
 import logging
 from flask import current_app
 import json
-import subprocess
-import tempfile
 import os
+import re
+from contextlib import closing
 
 # Import timezone utilities
 from utils.timezone_utils import get_paris_now, utc_to_paris, PARIS_TIMEZONE, format_datetime
 from typing import Dict, Any, Optional, List as TypeList, Tuple
 from services.list_service import ListService
+from services.http_client import get_http_settings
+from services.script_runner import ScriptExecutionError, ScriptRun, get_script_pool
+from services.pagination_service import iter_pages, DEFAULT_PAGINATION_WINDOW
+from services.shared_fetch_service import clear_list_sources, register_list_source, shared_fetch, source_key
+from utils.json_path import MISSING, compile_json_path
+from utils.json_projection import column_paths, compile_projection
+from services.curl_client import (
+    CurlProcessOutput, CurlRequest, UnsupportedCurlCommand, DEFAULT_CURL_TIMEOUT, execute_curl, parse_curl_command
+)
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +74,7 @@ class SchedulerService:
             # Remove all existing jobs to avoid duplicates
             for job in self.scheduler.get_jobs():
                 self.scheduler.remove_job(job.id)
+            clear_list_sources()
                 
             logger.info("All previous jobs have been deleted")
             
@@ -79,6 +89,7 @@ class SchedulerService:
             
             for list_obj in lists:
                 self._schedule_list(list_obj)
+            self._log_shared_sources(lists)
                 
             # Display all scheduled jobs
             jobs = self.scheduler.get_jobs()
@@ -92,10 +103,42 @@ class SchedulerService:
             import traceback
             logger.error(traceback.format_exc())
     
+    @staticmethod
+    def _source_definition_key(list_obj: List) -> Optional[str]:
+        """Returns the shared fetch key of a list's source, or None if it is not fetched (script, manual)"""
+        config = list_obj.update_config or {}
+        if config.get('source') == 'url' and config.get('url'):
+            return source_key('body', 'GET', config['url'], config.get('headers') or {})
+        if config.get('source') == 'api' and config.get('api_type') == 'curl' and config.get('curl_command'):
+            try:
+                curl_request = parse_curl_command(config['curl_command'])
+            except UnsupportedCurlCommand:
+                return source_key('json', 'CURL', ' '.join(config['curl_command'].split()))
+            return source_key('json', curl_request.effective_method, curl_request.url, curl_request.headers,
+                              curl_request.data, curl_request.auth)
+        return None
+
+    def _log_shared_sources(self, lists):
+        """Logs the lists due at the same time with the same source definition, which share one fetch per run"""
+        groups = {}
+        for list_obj in lists:
+            try:
+                key = self._source_definition_key(list_obj)
+            except Exception as e:
+                logger.warning(f"List {list_obj.id}: could not identify its source ({e})")
+                continue
+            if key and list_obj.update_schedule:
+                groups.setdefault((key, list_obj.update_schedule), []).append(list_obj.id)
+        for (key, schedule), list_ids in groups.items():
+            if len(list_ids) > 1:
+                logger.info(f"Lists {', '.join(map(str, list_ids))} share the same source on schedule '{schedule}': "
+                            f"it is fetched once per run")
+
     def _schedule_list(self, list_obj: List):
         """Schedules a list's update"""
         if not list_obj.update_schedule:
             logger.warning(f"List {list_obj.id} ({list_obj.name}): No schedule defined")
+            register_list_source(list_obj.id, None)
             return
             
         try:
@@ -122,6 +165,12 @@ class SchedulerService:
                 name=f"Update list {list_obj.name}",
                 misfire_grace_time=3600  # Allow missed updates to run within the hour
             )
+            # Lets a fetch of this list's source be kept for the other lists with the same source
+            try:
+                register_list_source(list_obj.id, self._source_definition_key(list_obj))
+            except Exception as e:
+                register_list_source(list_obj.id, None)
+                logger.warning(f"List {list_obj.id}: could not identify its source ({e})")
             logger.info(f"Scheduling for list {list_obj.name} (ID: {list_obj.id}) with cron {list_obj.update_schedule}")
             logger.info(f"Next scheduled run: {next_run.strftime('%Y-%m-%d %H:%M:%S')}")
             
@@ -134,188 +183,54 @@ class SchedulerService:
             logger.error(traceback.format_exc())
     
     @staticmethod
-    def _execute_python_script(script_content: str) -> tuple[Optional[TypeList[Dict[str, Any]]], list[str]]:
-        """Executes a Python script and returns the resulting JSON data and logs"""
+    def _execute_python_script(script_content: str, max_results: int = 0) -> tuple[Optional[Any], list[str]]:
+        """Executes a Python script in the script pool and returns the resulting JSON data and logs
+        
+        Args:
+            script_content: Source of the script
+            max_results: Number of rows after which a generator main() is stopped (0 = no limit)
+        
+        Returns:
+            tuple: (list of entries, or a ScriptRun still producing rows when main() is a
+            generator, or None on error; execution logs)
+        """
         # List to store execution logs
         execution_logs = []
         
+        def collect_log(message):
+            logger.info(message)
+            execution_logs.append(message)
+        
         try:
-            # Create a temporary file for the script
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.py', mode='w') as temp_file:
-                temp_filename = temp_file.name
-                # Write the script content to the temporary file
-                temp_file.write(script_content)
-            
-            log_message = f"Executing Python script: {temp_filename}"
-            logger.info(log_message)
-            execution_logs.append(log_message)
-            
-            # Prepare the execution environment
-            script_globals = {}
-            script_locals = {}
-            
-            # Custom function to capture prints
-            def custom_print(*args, **kwargs):
-                output = ' '.join(str(arg) for arg in args)
-                execution_logs.append(f"SCRIPT OUTPUT: {output}")
-                logger.info(f"SCRIPT OUTPUT: {output}")
-            
-            # Replace the standard print function with our custom one
-            script_globals['print'] = custom_print
-            
-            # Configure proxy and SSL, and patch requests.get for the script environment
-            try:
-                from flask import current_app
-                import os
-                import urllib3
-                import requests # Import requests here to patch it
-                from requests.packages.urllib3.exceptions import InsecureRequestWarning
-                
-                # Get proxy and SSL configurations
-                verify_ssl = current_app.config.get('VERIFY_SSL', 'false').lower() == 'true'
-                http_proxy = current_app.config.get('HTTP_PROXY', os.environ.get('HTTP_PROXY', ''))
-                https_proxy = current_app.config.get('HTTPS_PROXY', os.environ.get('HTTPS_PROXY', ''))
-                no_proxy = current_app.config.get('NO_PROXY', os.environ.get('NO_PROXY', ''))
-                
-                # Also check lowercase variables for compatibility
-                if not http_proxy: http_proxy = current_app.config.get('http_proxy', os.environ.get('http_proxy', ''))
-                if not https_proxy: https_proxy = current_app.config.get('https_proxy', os.environ.get('https_proxy', ''))
-                if not no_proxy: no_proxy = current_app.config.get('no_proxy', os.environ.get('no_proxy', ''))
-                    
-                ca_bundle = os.environ.get('REQUESTS_CA_BUNDLE', '')
-                ssl_cert_file = os.environ.get('SSL_CERT_FILE', '')
-                
-                proxies = None
-                if http_proxy or https_proxy:
-                    proxies = {}
-                    if http_proxy: proxies['http'] = http_proxy
-                    if https_proxy: proxies['https'] = https_proxy
-                    log_message = f"Using proxy for Python script: {proxies}"
-                    logger.info(log_message)
-                    execution_logs.append(log_message)
-                else:
-                    log_message = "No proxy used for Python script"
-                    logger.info(log_message)
-                    execution_logs.append(log_message)
-                
-                if not verify_ssl:
-                    urllib3.disable_warnings(InsecureRequestWarning)
-                    log_message = "SSL verification disabled for Python script"
-                    logger.info(log_message)
-                    execution_logs.append(log_message)
-                
-                if ca_bundle:
-                    log_message = f"Using custom CA certificate: {ca_bundle}"
-                    logger.info(log_message)
-                    execution_logs.append(log_message)
-                if ssl_cert_file:
-                    log_message = f"Using custom SSL certificate: {ssl_cert_file}"
-                    logger.info(log_message)
-                    execution_logs.append(log_message)
-                
-                original_requests_get = requests.get # Save the original
-                
-                def patched_requests_get(url, **kwargs):
-                    """Wrapper for requests.get that injects proxy and verify_ssl if not specified."""
-                    if proxies and 'proxies' not in kwargs:
-                        kwargs['proxies'] = proxies
-                    if 'verify' not in kwargs:
-                        kwargs['verify'] = verify_ssl
-                    
-                    log_msg = f"HTTP call (patched): GET {url} (proxy: {'yes' if kwargs.get('proxies') else 'no'}, verify_ssl: {kwargs.get('verify')})"
-                    logger.info(log_msg)
-                    execution_logs.append(log_msg)
-                    return original_requests_get(url, **kwargs)
-                
-                requests.get = patched_requests_get # Apply the patch
-
-                # Provide an http_get helper function for convenience
-                def http_get_helper(url, headers=None, params=None, timeout=30):
-                    request_params = {'timeout': timeout}
-                    if headers: request_params['headers'] = headers
-                    if params: request_params['params'] = params
-                    # requests.get is already patched here
-                    response = requests.get(url, **kwargs)
-                    response.raise_for_status()
-                    return response
-                
-                script_globals['http_get'] = http_get_helper
-                script_globals['proxies'] = proxies # For reference in the user's script
-                script_globals['verify_ssl'] = verify_ssl # For reference
-                script_globals['requests'] = requests # Put the (patched) requests module in globals
-
-            except Exception as e:
-                log_message = f"Error configuring proxies and SSL for the script: {str(e)}"
-                logger.error(log_message)
-                execution_logs.append(f"Internal ERROR (proxy/SSL setup): {log_message}")
-                # Fallback: ensure 'requests' is available even if the patch failed
-                if 'requests' not in script_globals:
-                    import requests as unpatched_requests # Use an alias to avoid confusion
-                    script_globals['requests'] = unpatched_requests
-                    execution_logs.append("WARNING: The original (unpatched) requests module is used due to a proxy/SSL configuration error.")
-                
-
-            
-            # Add useful modules for scripts
-            script_globals['requests'] = requests
-            
-            # Execute the script in a secure environment
-            try:
-                # Compile the script
-                compiled_code = compile(script_content, '<string>', 'exec')
-                
-                # Execute the compiled code
-                exec(compiled_code, script_globals, script_locals)
-                
-                # Check if the main function exists
-                if 'main' in script_locals and callable(script_locals['main']):
-                    # Call the main function
-                    log_message = "Calling the script's main() function"
-                    logger.info(log_message)
-                    execution_logs.append(log_message)
-                    
-                    result = script_locals['main']()
-                    
-                    # Check that the result is a list
-                    if isinstance(result, list):
-                        log_message = f"Python script executed successfully, {len(result)} entries retrieved"
-                        logger.info(log_message)
-                        execution_logs.append(log_message)
-                        
-                        # Add a sample of the retrieved data for debugging
-                        if result:
-                            sample = result[0] if len(result) == 1 else result[:2]
-                            log_message = f"Sample data: {json.dumps(sample, indent=2, ensure_ascii=False)}"
-                            logger.info(log_message)
-                            execution_logs.append(log_message)
-                            
-                        return result, execution_logs
-                    else:
-                        log_message = f"The Python script must return a list, but returned {type(result).__name__}"
-                        logger.error(log_message)
-                        execution_logs.append(f"ERROR: {log_message}")
-                        return None, execution_logs
-                else:
-                    log_message = "The Python script must contain a 'main' function that returns the data"
-                    logger.error(log_message)
-                    execution_logs.append(f"ERROR: {log_message}")
-                    return None, execution_logs
-            except Exception as e:
-                log_message = f"Error executing the Python script: {str(e)}"
-                logger.error(log_message)
-                execution_logs.append(f"ERROR: {log_message}")
-                
-                import traceback
-                tb = traceback.format_exc()
-                logger.error(tb)
-                execution_logs.append(f"TRACEBACK: {tb}")
-                return None, execution_logs
-            finally:
-                # Clean up the temporary file
-                try:
-                    os.unlink(temp_filename)
-                except Exception:
-                    pass
+            # Scripts run in worker processes (time, CPU and memory limits), with a
+            # script-local requests object routed through the shared HTTP client
+            pool = get_script_pool()
+            http_settings = get_http_settings()
+            proxies = http_settings['proxies'] or None
+            collect_log(f"Using proxy for Python script: {proxies}" if proxies else "No proxy used for Python script")
+            collect_log(f"Executing Python script in the script pool ({pool.size} workers)")
+            
+            script_run = pool.start(script_content, on_log=collect_log, max_results=max_results)
+            if script_run.streamed:
+                # The rows are written while the script yields them
+                collect_log("The Python script yields its rows, streaming them to the list")
+                return script_run, execution_logs
+            result = list(script_run.rows())
+            
+            collect_log(f"Python script executed successfully, {len(result)} entries retrieved")
+            # Add a sample of the retrieved data for debugging
+            if result:
+                sample = result[0] if len(result) == 1 else result[:2]
+                collect_log(f"Sample data: {json.dumps(sample, indent=2, ensure_ascii=False, default=str)}")
+            return result, execution_logs
+        except ScriptExecutionError as e:
+            log_message = f"Error executing the Python script: {str(e)}"
+            logger.error(log_message)
+            execution_logs.append(f"ERROR: {log_message}")
+            if e.traceback_text:
+                logger.error(e.traceback_text)
+                execution_logs.append(f"TRACEBACK: {e.traceback_text}")
+            return None, execution_logs
         except Exception as e:
             log_message = f"Error preparing the Python script: {str(e)}"
             logger.error(log_message)
@@ -330,46 +245,72 @@ class SchedulerService:
             curl_command: The curl command to execute
             list_obj: The list object to apply the results limit
         """
+        data = SchedulerService._fetch_curl_json(curl_command, list_id=list_obj.id if list_obj is not None else None)
+        if data is None:
+            return None
+        return SchedulerService._normalize_json_data(data, list_obj)
+
+    @staticmethod
+    def _fetch_curl_json(curl_command: str, curl_request: Optional[CurlRequest] = None,
+                         list_id: Optional[int] = None) -> Optional[Any]:
+        """Executes a curl command and returns its parsed JSON output (not normalized)
+        
+        The command runs in process on the shared HTTP client when its options can be
+        translated, and through curl otherwise. Lists sending the same request in the
+        same window share one fetch; its parsed output is only kept when another
+        list can reuse it.
+        
+        Args:
+            curl_command: The curl command to execute
+            curl_request: Already parsed request to send instead of the command
+            list_id: ID of the list fetching the source
+        """
+        if curl_request is not None:
+            source = f"{curl_request.effective_method} {curl_request.url}"
+            key = source_key('json', curl_request.effective_method, curl_request.url, curl_request.headers,
+                             curl_request.data, curl_request.auth)
+        else:
+            source = 'curl command'
+            key = source_key('json', 'CURL', ' '.join(curl_command.split()))
+        with shared_fetch(key) as shared:
+            if shared.payload is not None:
+                logger.info(f"Reusing the output of {source} fetched {shared.age:.0f}s ago for another list")
+                return shared.payload
+            data = SchedulerService._request_curl_json(curl_command, curl_request)
+            if shared.wanted(list_id):
+                shared.publish(data)
+            return data
+
+    @staticmethod
+    def _request_curl_json(curl_command: str, curl_request: Optional[CurlRequest] = None) -> Optional[Any]:
+        """Sends a curl request and parses its JSON output (see _fetch_curl_json)"""
         try:
-            # Create a temporary file to store the output
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.json') as temp_file:
-                temp_filename = temp_file.name
-            
-            # Execute the curl command and redirect the output to the temporary file
-            logger.info(f"Executing curl command: {curl_command}")
-            process = subprocess.run(
-                curl_command + f" > {temp_filename}", 
-                shell=True, 
-                capture_output=True, 
-                text=True
-            )
-            
-            if process.returncode != 0:
-                logger.error(f"Curl command failed with error: {process.stderr}")
-                return None
-            
-            # Read the temporary file
-            with open(temp_filename, 'r') as f:
-                content = f.read()
-            
-            # Delete the temporary file
-            os.unlink(temp_filename)
+            if curl_request is not None:
+                logger.info(f"Sending curl request: {curl_request.effective_method} {curl_request.url}")
+                response = curl_request.send(timeout=DEFAULT_CURL_TIMEOUT)
+            else:
+                logger.info(f"Executing curl command: {curl_command}")
+                response = execute_curl(curl_command)
+            try:
+                if isinstance(response, CurlProcessOutput) and response.returncode != 0:
+                    logger.error(f"Curl command failed with error: {response.stderr}")
+                    return None
+                content = response.text
+            finally:
+                response.close()
             
             # Try to parse the content as JSON
             try:
-                data = json.loads(content)
-                return SchedulerService._normalize_json_data(data, list_obj)
+                return json.loads(content)
             except json.JSONDecodeError:
                 # Try to clean the content if it's not valid JSON
                 logger.warning(f"Failed to parse JSON from curl output, attempting to clean content: {content[:100]}...")
                 try:
                     # Try to find JSON in the content (sometimes surrounded by HTML or other characters)
-                    import re
                     json_match = re.search(r'(\{.*\}|\[.*\])', content, re.DOTALL)
                     if json_match:
                         potential_json = json_match.group(0)
-                        data = json.loads(potential_json)
-                        return SchedulerService._normalize_json_data(data, list_obj)
+                        return json.loads(potential_json)
                     else:
                         logger.error("No JSON-like content found in the response")
                         return None
@@ -379,6 +320,112 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"Error executing curl command: {str(e)}")
             return None
+
+    def _iter_paginated_curl_rows(self, curl_command: str, list_obj, stats: Dict[str, int]):
+        """Yields the normalized rows of every page of a paginated curl source
+        
+        Pages are fetched ahead by the pagination engine, so the rows of a page are
+        written while the following pages are downloading. A page that cannot be
+        retrieved ends the pagination: the rows of the previous pages are kept and
+        the error is recorded in stats['error'].
+        
+        Args:
+            curl_command: The curl command of the first page
+            list_obj: The list object (JSON configuration and pagination settings)
+            stats: Filled with the number of pages and rows produced, and the error
+                that ended the pagination if any
+        """
+        try:
+            # Parsed once: the following pages only change the URL of the request
+            curl_request = parse_curl_command(curl_command)
+        except UnsupportedCurlCommand as e:
+            logger.info(f"Paginated curl command runs in a subprocess ({e})")
+            curl_request = None
+
+        first_page = self._fetch_curl_json(curl_command, curl_request, list_id=list_obj.id)
+        if first_page is None:
+            raise ValueError("No data retrieved from the curl command")
+
+        if curl_request is not None:
+            first_url = curl_request.url
+        else:
+            url_match = re.search(r"https?://[^\s'\"]+", curl_command)
+            first_url = url_match.group(0) if url_match else ''
+
+        # Following pages are not shared: only the first page has the definition of the lists' sources
+        def fetch_page(url):
+            if curl_request is not None:
+                page = self._request_curl_json(curl_command, curl_request.with_url(url))
+            else:
+                modified_curl = self._modify_curl_for_pagination(curl_command, url)
+                if not modified_curl:
+                    raise ValueError(f"Could not modify the curl command for pagination")
+                page = self._request_curl_json(modified_curl)
+            if page is None:
+                raise ValueError(f"No data retrieved for page {url}")
+            return page
+
+        # Rows still wanted: no page is requested once max_results rows were produced
+        max_results = list_obj.max_results or 0
+        remaining_rows = (lambda: max_results - stats['rows']) if max_results > 0 else None
+
+        window = current_app.config.get('PAGINATION_CONCURRENCY', DEFAULT_PAGINATION_WINDOW)
+        pages = iter_pages(first_url, fetch_page, list_obj.json_next_page_path,
+                           max_pages=list_obj.json_max_pages or 1, window=window,
+                           first_page=first_page, remaining_items=remaining_rows)
+        with closing(pages):
+            while True:
+                try:
+                    page_number, url, page = next(pages)
+                except StopIteration:
+                    return
+                except Exception as e:
+                    # The first page is already fetched: only a following page can fail here
+                    stats['error'] = f"Error getting page {stats['pages'] + 1}: {str(e)}"
+                    logger.error(f"{stats['error']}, pagination stopped with {stats['rows']} entries")
+                    return
+                rows = self._normalize_json_data(page, list_obj)
+                if max_results > 0:
+                    rows = rows[:max_results - stats['rows']]
+                stats['pages'] = page_number
+                stats['rows'] += len(rows)
+                logger.info(f"Page {page_number} retrieved, {len(rows)} entries added")
+                yield from rows
+                if max_results > 0 and stats['rows'] >= max_results:
+                    logger.info(f"Results limit ({max_results}) reached after page {page_number}, no further page requested")
+                    return
+    
+    def _iter_script_rows(self, script_run: ScriptRun, list_obj, stats: Dict[str, int], execution_logs: list):
+        """Yields the normalized rows of a script whose main() is a generator
+        
+        Args:
+            script_run: The running script
+            list_obj: The list object (selected JSON columns)
+            stats: Filled with the number of rows produced
+            execution_logs: Logs of the run, receiving script errors
+        """
+        project = None
+        if list_obj.json_config_status == 'configured' and list_obj.json_selected_columns:
+            paths = column_paths(list_obj.get_json_selected_columns)
+            project = compile_projection(paths) if paths else None
+        try:
+            for row in script_run.rows():
+                if not isinstance(row, dict):
+                    row = {"value": row}
+                elif project:
+                    row = project(row)
+                stats['rows'] += 1
+                yield row
+        except ScriptExecutionError as e:
+            log_message = f"Error executing the Python script: {str(e)}"
+            logger.error(log_message)
+            execution_logs.append(f"ERROR: {log_message}")
+            if e.traceback_text:
+                execution_logs.append(f"TRACEBACK: {e.traceback_text}")
+            raise
+        finally:
+            # Stops the script when the writer stopped early (results limit)
+            script_run.close()
     
     def _modify_curl_for_pagination(self, curl_command, next_page_url):
         """Modifies a curl command to use the next page URL"""
@@ -430,57 +477,27 @@ class SchedulerService:
         if list_obj and list_obj.json_config_status == 'configured' and list_obj.json_data_path:
             logger.info(f"Using JSON configuration for list {list_obj.id}")
             try:
-                # Navigate through the data according to the specified path
-                result_data = data
-                for key in list_obj.json_data_path.split('.'):
-                    if not key:
-                        continue
-                    
-                    if isinstance(result_data, dict) and key in result_data:
-                        result_data = result_data[key]
-                    elif isinstance(result_data, list) and len(result_data) > 0:
-                        # If it's a list, take the first element to continue navigation
-                        # but keep the whole list as the final result
-                        if key.isdigit():
-                            # If the key is a number, use it as an index
-                            index = int(key)
-                            if index < len(result_data):
-                                result_data = result_data[index]
-                            else:
-                                logger.error(f"Index {index} out of bounds for list of size {len(result_data)}")
-                                return []
-                        else:
-                            # Otherwise, search for the key in all list elements
-                            temp_data = []
-                            for item in result_data:
-                                if isinstance(item, dict) and key in item:
-                                    temp_data.append(item[key])
-                            result_data = temp_data if temp_data else result_data
-                    else:
-                        logger.error(f"Key {key} not found in the data")
-                        return []
+                # Navigate through the data with the compiled path (dotted, JMESPath or JSONPath)
+                result_data = compile_json_path(list_obj.json_data_path).search(data)
+                if result_data is MISSING:
+                    logger.error(f"Path {list_obj.json_data_path} not found in the data")
+                    return []
+                
+                # Apply the results limit before any per-item work
+                if isinstance(result_data, list) and list_obj.max_results > 0 and len(result_data) > list_obj.max_results:
+                    logger.info(f"Results limit applied: {list_obj.max_results} out of {len(result_data)} available results")
+                    result_data = result_data[:list_obj.max_results]
                 
                 # Filter columns according to the configuration
                 if list_obj.json_selected_columns and isinstance(result_data, list):
-                    selected_columns = list_obj.get_json_selected_columns
-                    if selected_columns:
-                        column_names = [col['name'] for col in selected_columns]
-                        filtered_data = []
-                        for item in result_data:
-                            if isinstance(item, dict):
-                                filtered_item = {col: item.get(col) for col in column_names if col in item}
-                                filtered_data.append(filtered_item)
-                            else:
-                                filtered_data.append({"value": item})
-                        return filtered_data
+                    paths = column_paths(list_obj.get_json_selected_columns)
+                    if paths:
+                        # Only the selected keys (or nested paths) of each item are read
+                        project = compile_projection(paths)
+                        return [project(item) if isinstance(item, dict) else {"value": item} for item in result_data]
                 
                 # Ensure the result is a list of dictionaries
                 if isinstance(result_data, list):
-                    # Apply the results limit if defined
-                    if list_obj.max_results > 0 and len(result_data) > list_obj.max_results:
-                        logger.info(f"Results limit applied: {list_obj.max_results} out of {len(result_data)} available results")
-                        result_data = result_data[:list_obj.max_results]
-                    
                     if all(isinstance(item, dict) for item in result_data):
                         return result_data
                     return [item if isinstance(item, dict) else {"value": item} for item in result_data]
@@ -566,8 +583,35 @@ class SchedulerService:
                     return False, execution_logs
                 
                 data = None
+                # Pagination only applies to configured JSON curl sources
+                paginate = bool(list_obj.json_config_status == 'configured' and
+                                list_obj.json_pagination_enabled and
+                                list_obj.json_next_page_path and
+                                config.get('source') == 'api' and
+                                config.get('api_type') == 'curl')
+                pagination_stats = {'pages': 0, 'rows': 0}
+                # Set when a script yields its rows instead of returning a list
+                streamed = False
+                script_stats = {'rows': 0}
                 # Get data according to the source
-                if config.get('source') == 'url':
+                if config.get('source') == 'list':
+                    # Rows copied from another list inside the database
+                    from models.data_importer import DataImporter
+                    importer = DataImporter(list_obj)
+                    row_count = importer.import_data(force_update=False)
+                    if importer.skip_reason:
+                        log_msg = f"Import skipped: {importer.skip_reason}"
+                    elif row_count is None:
+                        log_msg = f"Copy from list {config.get('source_list_id')} failed"
+                        logger.error(log_msg)
+                        execution_logs.append(f"ERROR: {log_msg}")
+                        return False, execution_logs
+                    else:
+                        log_msg = f"Import successful: {row_count} rows copied from list {config.get('source_list_id')}"
+                    logger.info(log_msg)
+                    execution_logs.append(log_msg)
+                    return True, execution_logs
+                elif config.get('source') == 'url':
                     try:
                         # Check that fetch_data_from_url is a callable method
                         if callable(getattr(ListService, 'fetch_data_from_url', None)):
@@ -605,7 +649,10 @@ class SchedulerService:
                             importer = DataImporter(list_obj)
                             row_count = importer.import_data(force_update=False)
                             
-                            log_msg = f"Import successful: {row_count} rows imported"
+                            if importer.skip_reason:
+                                log_msg = f"Import skipped: {importer.skip_reason}"
+                            else:
+                                log_msg = f"Import successful: {row_count} rows imported"
                             logger.info(log_msg)
                             execution_logs.append(log_msg)
                             
@@ -634,7 +681,10 @@ class SchedulerService:
                     if api_type == 'curl':
                         try:
                             # Execute the curl command
-                            if 'curl_command' in config:
+                            if 'curl_command' in config and paginate:
+                                # Pages are streamed to the writer as they arrive
+                                data = self._iter_paginated_curl_rows(config['curl_command'], list_obj, pagination_stats)
+                            elif 'curl_command' in config:
                                 data = self._execute_curl_command(config['curl_command'], list_obj)
                             else:
                                 logger.error(f"No curl command found in configuration for list {list_id}")
@@ -658,12 +708,15 @@ class SchedulerService:
                                 proxy_info = """# Use of proxy and SSL:
 # ========================
 #
-# IMPORTANT: The requests.get function has been modified to automatically use
-# the proxy and SSL settings configured in the environment.
+# IMPORTANT: The requests object given to the script goes through the shared HTTP
+# client, which applies the proxy and SSL settings configured in the environment.
 #
 # You can therefore use requests.get normally without worrying about proxies:
 # response = requests.get('https://api.example.com/data')
 #
+# main() may also be a generator: rows (or lists of rows) it yields are written
+# while the script runs, and it is stopped once max_results rows were produced.
+#
 # You can also use the http_get function which is a shortcut:
 # response = http_get('https://api.example.com/data', headers={'User-Agent': 'Mozilla/5.0'})
 #
@@ -697,7 +750,7 @@ class SchedulerService:
                                 logger.info(f"Executing Python script for list {list_id} with proxy and SSL management")
                                 
                                 # The method now returns a tuple (data, logs)
-                                data, script_logs = self._execute_python_script(enhanced_script)
+                                data, script_logs = self._execute_python_script(enhanced_script, list_obj.max_results)
                                 
                                 # Store the logs in the configuration to retrieve them later
                                 list_obj._last_script_logs = script_logs
@@ -705,6 +758,9 @@ class SchedulerService:
                                 if data is None:
                                     logger.error(f"Script execution returned no data for list {list_id}")
                                     return None, script_logs
+                                if isinstance(data, ScriptRun):
+                                    streamed = True
+                                    data = self._iter_script_rows(data, list_obj, script_stats, script_logs)
                             else:
                                 logger.error(f"No script content found in configuration for list {list_id}")
                                 return None, ["ERROR: No script content found in the configuration"]
@@ -727,91 +783,44 @@ class SchedulerService:
                 
                 logger.info(f"Data retrieved successfully for list {list_id} ({list_obj.name})")
                 
-                # Add debugging to see the retrieved data
-                logger.info(f"Retrieved data: {str(data)[:500]}...") # Displays the first 500 characters
-                logger.info(f"Number of entries: {len(data) if isinstance(data, list) else 'Not-a-list'}")
-                
-                # Normalize the data using the JSON configuration if available
-                normalized_data = self._normalize_json_data(data, list_obj)
-                
-                # Handle pagination if enabled
-                if (list_obj.json_config_status == 'configured' and 
-                    list_obj.json_pagination_enabled and 
-                    list_obj.json_next_page_path and 
-                    config.get('source') == 'api' and 
-                    config.get('api_type') == 'curl'):
-                    
+                if paginate:
                     logger.info(f"Pagination enabled for list {list_id}")
-                    page_count = 1
-                    all_data = normalized_data
-                    
-                    # Get the next pages until the limit is reached
-                    while page_count < list_obj.json_max_pages:
-                        # Look for the next page URL in the data
-                        next_page_url = None
-                        next_page_data = data
-                        
-                        for key in list_obj.json_next_page_path.split('.'):
-                            if not key:
-                                continue
-                            
-                            if isinstance(next_page_data, dict) and key in next_page_data:
-                                next_page_data = next_page_data[key]
-                            else:
-                                next_page_data = None
-                                break
-                        
-                        next_page_url = next_page_data
-                        
-                        # If no next page URL, stop
-                        if not next_page_url:
-                            logger.info(f"No next page found after {page_count} pages")
-                            break
-                        
-                        # Modify the curl command to use the next page URL
-                        modified_curl = self._modify_curl_for_pagination(config['curl_command'], next_page_url)
-                        if not modified_curl:
-                            logger.error(f"Could not modify the curl command for pagination")
-                            break
-                        
-                        # Execute the modified curl command
-                        try:
-                            page_data = self._execute_curl_command(modified_curl, list_obj)
-                            if not page_data:
-                                logger.error(f"No data retrieved for page {page_count + 1}")
-                                break
-                            
-                            # Normalize the page data
-                            page_normalized = self._normalize_json_data(page_data, list_obj)
-                            
-                            # Add the normalized data to the set of all data
-                            all_data.extend(page_normalized)
-                            
-                            # Update the data for the next iteration
-                            data = page_data
-                            page_count += 1
-                            
-                            logger.info(f"Page {page_count} retrieved, {len(page_normalized)} entries added")
-                        except Exception as e:
-                            logger.error(f"Error getting page {page_count + 1}: {str(e)}")
-                            break
-                    
-                    # Use the paginated data instead of the initial data
-                    normalized_data = all_data
-                    
-                    # Apply the results limit to the set of paginated data
-                    if list_obj.max_results > 0 and len(normalized_data) > list_obj.max_results:
-                        logger.info(f"Results limit applied after pagination: {list_obj.max_results} out of {len(normalized_data)} available results")
-                        normalized_data = normalized_data[:list_obj.max_results]
+                    normalized_data = data
+                elif streamed:
+                    logger.info(f"Streaming the script rows of list {list_id}")
+                    normalized_data = data
+                else:
+                    # Add debugging to see the retrieved data
+                    logger.info(f"Retrieved data: {str(data)[:500]}...") # Displays the first 500 characters
+                    logger.info(f"Number of entries: {len(data) if isinstance(data, list) else 'Not-a-list'}")
                     
-                    logger.info(f"Pagination finished, {len(normalized_data)} entries in total")
+                    # Normalize the data using the JSON configuration if available
+                    normalized_data = self._normalize_json_data(data, list_obj)
                 
                 # Save the normalized data in the list
-                success = ListService.update_list_data(list_id, normalized_data)
+                import_stats = {}
+                success = ListService.update_list_data(list_id, normalized_data, stats=import_stats)
+                if streamed:
+                    # Releases the script worker even if the writer did not consume every row
+                    normalized_data.close()
+                
+                if paginate:
+                    logger.info(f"Pagination finished, {pagination_stats['pages']} pages, {pagination_stats['rows']} entries retrieved")
+                    execution_logs.append(f"INFO: {pagination_stats['pages']} pages retrieved")
+                    if pagination_stats.get('error'):
+                        execution_logs.append(f"WARNING: {pagination_stats['error']}, pagination stopped")
                 
                 if success:
+                    if paginate:
+                        entry_count = pagination_stats['rows']
+                    elif streamed:
+                        entry_count = script_stats['rows']
+                    else:
+                        entry_count = len(normalized_data)
                     logger.info(f"Data updated successfully for list {list_id} ({list_obj.name})")
-                    execution_logs.append(f"INFO: Data updated successfully ({len(normalized_data)} entries)")
+                    execution_logs.append(f"INFO: Data updated successfully ({entry_count} entries)")
+                    if import_stats.get('duplicates_dropped'):
+                        execution_logs.append(f"INFO: {import_stats['duplicates_dropped']} duplicate rows dropped")
                     
                     # Update the last update date
                     list_obj.last_update = get_paris_now()
@@ -863,6 +872,14 @@ class SchedulerService:
                                     
                                 logger.info(f"Public JSON file updated for list {list_id}")
                                 execution_logs.append("INFO: Public JSON file updated")
+                            
+                        # Generate the Bloom filter if enabled
+                        if list_obj.public_bloom_enabled:
+                            from services.bloom_filter_service import write_bloom_file
+                            public_files_dir = os.path.join(self.app.root_path, 'public_files')
+                            os.makedirs(public_files_dir, exist_ok=True)
+                            if write_bloom_file(list_obj, public_files_dir):
+                                execution_logs.append("INFO: Public Bloom filter updated")
                     except Exception as e:
                         logger.error(f"Error updating public files: {str(e)}")
                         execution_logs.append(f"WARNING: Error updating public files: {str(e)}")
@@ -908,6 +925,7 @@ class SchedulerService:
         if self.scheduler.get_job(job_id):
             self.scheduler.remove_job(job_id)
             logger.info(f"Unscheduled list {list_id}")
+        register_list_source(list_id, None)
     
     def shutdown(self):
         """Stops the scheduler"""
@@ -0,0 +1,297 @@
+"""
+Pool of worker processes running the Python script sources
+
+Scripts run in separate interpreters (services.script_worker) instead of a
+scheduler thread: they use every core, cannot hold the web process's GIL and
+are bounded by per-run limits:
+
+- wall-clock time (SCRIPT_TIMEOUT): the worker is killed and replaced
+- CPU time (SCRIPT_CPU_TIME_LIMIT): RLIMIT_CPU, the script gets an error
+- memory (SCRIPT_MEMORY_LIMIT_MB): RLIMIT_AS of the worker
+
+Logs and result rows come back in batches over a socket pair as they are
+produced; a script whose main() is a generator is consumed while it runs.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCRIPT_TIMEOUT = 600
+DEFAULT_SCRIPT_CPU_TIME_LIMIT = 300
+DEFAULT_SCRIPT_MEMORY_LIMIT_MB = 1024
+DEFAULT_SCRIPT_WORKER_MAX_RUNS = 100
+DEFAULT_CODE_CACHE_SIZE = 64
+# Delay given to a worker to answer before it is killed (stop, shutdown)
+WORKER_GRACE_PERIOD = 5
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ScriptExecutionError(Exception):
+    """The script failed, or exceeded one of its limits"""
+
+    def __init__(self, message, traceback_text=None):
+        super().__init__(message)
+        self.traceback_text = traceback_text
+
+
+class _Worker:
+    """A worker process and its end of the socket pair"""
+
+    def __init__(self, settings):
+        parent_sock, child_sock = socket.socketpair()
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, '-m', 'services.script_worker', str(child_sock.fileno())],
+                cwd=_APP_DIR,
+                pass_fds=(child_sock.fileno(),)
+            )
+        finally:
+            child_sock.close()
+        self.conn = Connection(parent_sock.detach())
+        self.runs = 0
+        self.conn.send(('init', settings))
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        if self.is_alive():
+            self.process.kill()
+        self.process.wait()
+
+    def close(self):
+        """Asks the worker to exit, killing it if it does not"""
+        try:
+            self.conn.send(None)
+            self.process.wait(timeout=WORKER_GRACE_PERIOD)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        self.kill()
+
+
+class ScriptPool:
+    """
+    Runs scripts on a bounded number of worker processes
+
+    Args:
+        size: Maximum number of concurrent scripts (and of worker processes)
+        timeout: Wall-clock limit of a run in seconds
+        cpu_time_limit: CPU time limit of a run in seconds
+        memory_limit_mb: Address space limit of a worker in MB
+        code_cache_size: Number of compiled scripts kept by a worker
+        max_runs_per_worker: Runs after which a worker is replaced
+        http_settings: Resolved HTTP client settings given to the workers
+    """
+
+    def __init__(self, size=None, timeout=DEFAULT_SCRIPT_TIMEOUT, cpu_time_limit=DEFAULT_SCRIPT_CPU_TIME_LIMIT,
+                 memory_limit_mb=DEFAULT_SCRIPT_MEMORY_LIMIT_MB, code_cache_size=DEFAULT_CODE_CACHE_SIZE,
+                 max_runs_per_worker=DEFAULT_SCRIPT_WORKER_MAX_RUNS, http_settings=None):
+        self.size = max(int(size or os.cpu_count() or 1), 1)
+        self.timeout = timeout
+        self.cpu_time_limit = cpu_time_limit
+        self.max_runs_per_worker = max_runs_per_worker
+        self._worker_settings = {
+            'memory_limit_mb': memory_limit_mb,
+            'code_cache_size': code_cache_size,
+            'http_settings': http_settings
+        }
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _acquire_worker(self):
+        self._slots.acquire()
+        try:
+            with self._lock:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.is_alive():
+                        return worker
+                    worker.kill()
+            return _Worker(self._worker_settings)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release_worker(self, worker, healthy):
+        try:
+            worker.runs += 1
+            if healthy and not self._closed and worker.runs < self.max_runs_per_worker:
+                with self._lock:
+                    self._idle.append(worker)
+            elif healthy:
+                worker.close()
+            else:
+                worker.kill()
+        finally:
+            self._slots.release()
+
+    def _receive(self, worker, deadline):
+        """Returns the next message of the worker (ScriptExecutionError once the deadline is passed)"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not worker.conn.poll(remaining):
+            raise ScriptExecutionError(f"The Python script exceeded the time limit of {self.timeout} seconds")
+        try:
+            return worker.conn.recv()
+        except (EOFError, OSError):
+            worker.process.wait()
+            raise ScriptExecutionError(f"The Python script worker exited unexpectedly (code {worker.process.returncode}), "
+                                       f"possibly after exceeding its memory limit")
+
+    def start(self, script, on_log=None, max_results=0):
+        """
+        Starts a script and returns once its main() has returned (or started yielding)
+
+        Args:
+            script: Source of the script (must define main())
+            on_log: Callable receiving each log line of the run
+            max_results: Number of rows after which a generator main() is closed (0 = no limit)
+
+        Returns:
+            ScriptRun: Iterator over the result batches
+
+        Raises:
+            ScriptExecutionError: The script failed or exceeded a limit
+        """
+        return ScriptRun(self._execute(script, on_log, max_results))
+
+    def _execute(self, script, on_log, max_results):
+        """
+        Runs a script on a worker, yielding ('result', kind) then ('rows', batch) items
+
+        The wall-clock limit only counts the time spent waiting for the worker, not
+        the time the caller spends on each batch. Closing the generator while it is
+        suspended on a batch stops the script cleanly; closing it at any other point
+        kills the worker.
+        """
+        script_hash = hashlib.sha256(script.encode('utf-8')).hexdigest()
+        worker = self._acquire_worker()
+        healthy = False
+        at_batch = False
+        try:
+            worker.conn.send(('run', script_hash, script, self.cpu_time_limit, max_results or 0))
+            deadline = time.monotonic() + self.timeout
+            while True:
+                message = self._receive(worker, deadline)
+                kind = message[0]
+                if kind == 'log':
+                    if on_log:
+                        on_log(message[1])
+                elif kind == 'result':
+                    paused = time.monotonic()
+                    yield message
+                    deadline += time.monotonic() - paused
+                elif kind == 'rows':
+                    paused = time.monotonic()
+                    at_batch = True
+                    yield message
+                    at_batch = False
+                    deadline += time.monotonic() - paused
+                    worker.conn.send(('next',))
+                elif kind == 'done':
+                    healthy = True
+                    return
+                else:
+                    _, error, traceback_text, fatal = message
+                    healthy = not fatal
+                    raise ScriptExecutionError(error, traceback_text)
+        finally:
+            if at_batch:
+                # Closed by the caller: the worker is waiting for the answer to the last batch
+                healthy = self._stop(worker, on_log)
+            self._release_worker(worker, healthy)
+
+    def _stop(self, worker, on_log=None):
+        """Asks a worker waiting for the answer to a rows message to stop its run"""
+        try:
+            worker.conn.send(('stop',))
+            deadline = time.monotonic() + WORKER_GRACE_PERIOD
+            while True:
+                message = self._receive(worker, deadline)
+                if message[0] == 'log' and on_log:
+                    on_log(message[1])
+                elif message[0] in ('done', 'error'):
+                    return message[0] == 'done'
+        except (ScriptExecutionError, OSError):
+            return False
+
+    def run(self, script, on_log=None, max_results=0):
+        """Runs a script and returns the list of its result rows"""
+        return list(self.start(script, on_log=on_log, max_results=max_results).rows())
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.close()
+
+
+class ScriptRun:
+    """
+    Result of a started script, iterated as batches of rows
+
+    Attributes:
+        streamed: True when main() is a generator (rows arrive while it runs),
+            False when it returned a list
+    """
+
+    def __init__(self, messages):
+        self._messages = messages
+        _, kind = next(messages)
+        self.streamed = kind == 'stream'
+
+    def __iter__(self):
+        for _, batch in self._messages:
+            yield batch
+
+    def rows(self):
+        """Yields the result rows one by one"""
+        for batch in self:
+            yield from batch
+
+    def close(self):
+        """Stops the script if it is still producing rows"""
+        self._messages.close()
+
+
+def get_script_pool():
+    """Returns the process-wide script pool, configured from the Flask config on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from flask import current_app
+                from services.http_client import get_http_settings
+                config = current_app.config
+                _pool = ScriptPool(
+                    size=config.get('SCRIPT_POOL_SIZE'),
+                    timeout=float(config.get('SCRIPT_TIMEOUT', DEFAULT_SCRIPT_TIMEOUT)),
+                    cpu_time_limit=int(config.get('SCRIPT_CPU_TIME_LIMIT', DEFAULT_SCRIPT_CPU_TIME_LIMIT)),
+                    memory_limit_mb=int(config.get('SCRIPT_MEMORY_LIMIT_MB', DEFAULT_SCRIPT_MEMORY_LIMIT_MB)),
+                    code_cache_size=int(config.get('SCRIPT_CODE_CACHE_SIZE', DEFAULT_CODE_CACHE_SIZE)),
+                    max_runs_per_worker=int(config.get('SCRIPT_WORKER_MAX_RUNS', DEFAULT_SCRIPT_WORKER_MAX_RUNS)),
+                    http_settings=get_http_settings()
+                )
+                atexit.register(_pool.shutdown)
+                logger.info(f"Script pool created: {_pool.size} workers max, timeout={_pool.timeout}s, "
+                            f"cpu_time_limit={_pool.cpu_time_limit}s")
+    return _pool
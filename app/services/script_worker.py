@@ -0,0 +1,263 @@
+"""
+Worker process of the Python script pool (see services.script_runner)
+
+Started as `python -m services.script_worker <fd>`, where fd is one end of a
+socket pair. The worker receives scripts to run and sends back logs and
+result rows over the socket, as pickled messages:
+
+    parent -> worker: ('init', settings), ('run', script_hash, script, cpu_limit, max_results),
+                      ('next',) / ('stop',) after each rows message, None to exit
+    worker -> parent: ('log', message), ('result', 'list' | 'stream'), ('rows', batch),
+                      ('done', count), ('error', message, traceback, fatal)
+
+main() either returns a list, or is a generator yielding rows or batches of
+rows (lists): yielded rows are sent as soon as a batch is full (or has waited
+STREAM_FLUSH_INTERVAL), and the generator is closed once max_results rows
+were produced or the parent stops the run.
+
+Compiled scripts are cached by hash, so a scheduled script is compiled once
+per worker.
+"""
+import builtins
+import os
+import signal
+import sys
+import time
+import traceback
+import types
+from collections import OrderedDict
+from multiprocessing.connection import Connection
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_CODE_CACHE_SIZE = 64
+RESULT_BATCH_SIZE = 1000
+# Maximum delay before rows yielded by a slow script are sent
+STREAM_FLUSH_INTERVAL = 1.0
+
+
+class ScriptCPUTimeout(Exception):
+    """The script used more CPU time than allowed"""
+
+
+class RunStopped(Exception):
+    """The parent does not want more rows"""
+
+
+def _on_cpu_limit(signum, frame):
+    raise ScriptCPUTimeout("CPU time limit exceeded")
+
+
+def _set_memory_limit(memory_limit_mb):
+    if resource is None or not memory_limit_mb:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = int(memory_limit_mb) * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _set_cpu_limit(seconds):
+    """Sets the soft CPU limit to the time used so far plus seconds (SIGXCPU when reached)"""
+    if resource is None or not seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    limit = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+
+
+def _clear_cpu_limit():
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+class _CodeCache:
+    """Compiled scripts by hash, least recently used first"""
+
+    def __init__(self, size):
+        self._size = max(int(size or 1), 1)
+        self._codes = OrderedDict()
+
+    def get(self, script_hash, script):
+        code = self._codes.get(script_hash)
+        if code is None:
+            code = compile(script, '<script>', 'exec')
+            self._codes[script_hash] = code
+            if len(self._codes) > self._size:
+                self._codes.popitem(last=False)
+        else:
+            self._codes.move_to_end(script_hash)
+        return code
+
+
+class _Run:
+    """One execution of a script, sending its logs and rows to the parent"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.count = 0
+        self._awaiting_reply = False
+
+    def log(self, message):
+        self.conn.send(('log', message))
+
+    def _wait_reply(self):
+        """Waits for the parent's answer to the last rows message"""
+        if self._awaiting_reply:
+            self._awaiting_reply = False
+            if self.conn.recv() == ('stop',):
+                raise RunStopped()
+
+    def send_rows(self, batch):
+        # The parent processes a batch while the next one is produced
+        self._wait_reply()
+        self.conn.send(('rows', batch))
+        self._awaiting_reply = True
+        self.count += len(batch)
+
+    def finish(self):
+        try:
+            self._wait_reply()
+        except RunStopped:
+            pass
+        self.conn.send(('done', self.count))
+
+    def fail(self, message, fatal=False):
+        # Consume the answer to the last rows so that it is not read by the next run
+        try:
+            self._wait_reply()
+        except RunStopped:
+            pass
+        self.conn.send(('error', message, traceback.format_exc(), fatal))
+
+    def build_namespace(self):
+        """Globals of the script: print and requests are redirected to the run"""
+        from services.http_client import ClientRequestsModule, get_http_settings
+
+        def script_print(*args, **kwargs):
+            self.log(f"SCRIPT OUTPUT: {' '.join(str(arg) for arg in args)}")
+
+        script_requests = ClientRequestsModule(on_request=lambda method, url: self.log(f"HTTP call: {method} {url}"))
+
+        def http_get_helper(url, headers=None, params=None, timeout=30):
+            response = script_requests.get(url, headers=headers, params=params, timeout=timeout)
+            response.raise_for_status()
+            return response
+
+        # 'import requests' inside the script also resolves to the script-local object
+        def script_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if name == 'requests' and level == 0:
+                return script_requests
+            return builtins.__import__(name, globals, locals, fromlist, level)
+
+        http_settings = get_http_settings()
+        return {
+            '__name__': '__script__',
+            '__builtins__': dict(vars(builtins), __import__=script_import, print=script_print),
+            'print': script_print,
+            'http_get': http_get_helper,
+            # For reference in the user's script
+            'proxies': http_settings['proxies'] or None,
+            'verify_ssl': http_settings['verify'] is not False,
+            'requests': script_requests
+        }
+
+
+def _stream_rows(run, generator, max_results):
+    """Sends the rows yielded by a generator main(), closing it once enough rows were produced"""
+    batch = []
+    produced = 0
+    last_flush = time.monotonic()
+    try:
+        for item in generator:
+            # A yielded list (or tuple) is a batch of rows
+            rows = item if isinstance(item, (list, tuple)) else (item,)
+            if max_results and produced + len(rows) >= max_results:
+                batch.extend(rows[:max_results - produced])
+                run.log(f"Results limit reached ({max_results}), stopping the script")
+                break
+            batch.extend(rows)
+            produced += len(rows)
+            if len(batch) >= RESULT_BATCH_SIZE or (batch and time.monotonic() - last_flush >= STREAM_FLUSH_INTERVAL):
+                run.send_rows(batch)
+                batch = []
+                last_flush = time.monotonic()
+    finally:
+        # Runs the script's own cleanup (finally blocks, open sessions)
+        generator.close()
+    if batch:
+        run.send_rows(batch)
+
+
+def _execute(run, code, max_results):
+    namespace = run.build_namespace()
+    exec(code, namespace)
+
+    main = namespace.get('main')
+    if not callable(main):
+        raise ValueError("The Python script must contain a 'main' function that returns the data")
+
+    run.log("Calling the script's main() function")
+    result = main()
+    if isinstance(result, list):
+        run.conn.send(('result', 'list'))
+        for start in range(0, len(result), RESULT_BATCH_SIZE):
+            run.send_rows(result[start:start + RESULT_BATCH_SIZE])
+    elif isinstance(result, types.GeneratorType):
+        run.conn.send(('result', 'stream'))
+        _stream_rows(run, result, max_results)
+    else:
+        raise ValueError(f"The Python script must return a list or yield rows, but returned {type(result).__name__}")
+
+
+def serve(conn):
+    """Runs the scripts sent by the parent until it closes the connection"""
+    init = conn.recv()
+    settings = init[1] if init and init[0] == 'init' else {}
+
+    from services.http_client import reset_http_client
+    reset_http_client(settings.get('http_settings'))
+    _set_memory_limit(settings.get('memory_limit_mb'))
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    cache = _CodeCache(settings.get('code_cache_size', DEFAULT_CODE_CACHE_SIZE))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+
+        _, script_hash, script, cpu_limit, max_results = message
+        run = _Run(conn)
+        try:
+            code = cache.get(script_hash, script)
+            _set_cpu_limit(cpu_limit)
+            try:
+                _execute(run, code, max_results)
+            finally:
+                _clear_cpu_limit()
+            run.finish()
+        except RunStopped:
+            run.finish()
+        except (ScriptCPUTimeout, MemoryError) as e:
+            # The worker may be left in a bad state: the parent replaces it
+            run.fail(f"{type(e).__name__}: {e}", fatal=True)
+        except Exception as e:
+            run.fail(str(e))
+
+
+if __name__ == '__main__':
+    serve(Connection(int(sys.argv[1])))
+    os._exit(0)
@@ -0,0 +1,301 @@
+"""
+Source fetches shared by the lists of a same upstream endpoint
+
+Several lists are often derived from the same source (different selected
+columns, filters or limits) and scheduled at the same minute. A fetch is
+identified by its source definition (method, URL, headers, body, credentials):
+
+- while a fetch is in flight, the other lists with the same definition wait
+  for it instead of sending the same request
+- its result is kept for SHARED_FETCH_TTL_SECONDS, so that the lists due in the
+  same window import it without fetching the source again
+
+Only successful fetches are shared: an error, a 304 or a body larger than
+SHARED_FETCH_MAX_BYTES leaves the next list to fetch the source itself. A
+downloaded body is only copied in memory when another list can reuse it: a list
+waiting for the fetch, or another scheduled list with the same definition
+(register_list_source()).
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Seconds during which a fetched source is reused by the lists with the same definition
+DEFAULT_SHARED_FETCH_TTL = 60
+# Largest body kept in memory to be shared
+DEFAULT_SHARED_FETCH_MAX_BYTES = 32 * 1024 * 1024
+# Longest wait for a fetch in flight before fetching the source anyway
+DEFAULT_SHARED_FETCH_WAIT = 300
+
+_lock = threading.Lock()
+# key -> (payload, expiry time)
+_entries = {}
+# key -> threading.Event set when the fetch in flight ends
+_in_flight = {}
+# key -> number of lists waiting for the fetch in flight
+_waiting = {}
+# list ID -> source definition of the scheduled lists
+_list_sources = {}
+
+
+def _config(name, default):
+    """Reads a numeric setting from the Flask config when an application is active, else from the environment"""
+    try:
+        from flask import current_app
+        value = current_app.config.get(name)
+    except RuntimeError:
+        value = None
+    if value in (None, ''):
+        value = os.environ.get(name)
+    try:
+        return default if value in (None, '') else float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def source_key(kind, method, url, headers=None, data=None, auth=None):
+    """
+    Identifies a source definition
+
+    Header names are case-insensitive and their order does not matter.
+
+    Args:
+        kind: What is shared for this source ('body', 'json'), so that different
+            payloads of a same request do not collide
+        method: HTTP method
+        url: URL of the request
+        headers: Request headers
+        data: Request body
+        auth: Credentials
+
+    Returns:
+        str: SHA-256 of the definition
+    """
+    definition = {
+        'kind': kind,
+        'method': (method or 'GET').upper(),
+        'url': url,
+        'headers': sorted((str(name).lower(), str(value)) for name, value in (headers or {}).items()),
+        'data': data,
+        'auth': auth
+    }
+    return hashlib.sha256(json.dumps(definition, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class SharedFetch:
+    """Slot of a list in a shared fetch, given by shared_fetch()"""
+
+    def __init__(self, key, payload=None, age=None):
+        self.key = key
+        # Result fetched by another list, or None when this list has to fetch the source
+        self.payload = payload
+        self.age = age
+        self.owner = False
+
+    def wanted(self, list_id=None):
+        """
+        Whether another list can reuse the result of this fetch
+
+        Args:
+            list_id: ID of the list fetching the source, not counted as another list
+
+        Returns:
+            bool: True when a list is waiting for the fetch or another scheduled
+            list has the same source definition
+        """
+        with _lock:
+            if _waiting.get(self.key):
+                return True
+            return any(key == self.key and other_id != list_id for other_id, key in _list_sources.items())
+
+    def publish(self, payload):
+        """Shares the result fetched by this list with the lists waiting for it (ignored when None)"""
+        if payload is None or not self.owner:
+            return
+        ttl = _config('SHARED_FETCH_TTL_SECONDS', DEFAULT_SHARED_FETCH_TTL)
+        if ttl <= 0:
+            return
+        with _lock:
+            _entries[self.key] = (payload, time.monotonic() + ttl)
+            event = _in_flight.pop(self.key, None)
+        self.owner = False
+        if event is not None:
+            event.set()
+
+    def release(self):
+        """Ends the fetch of this list; a waiting list then fetches the source itself"""
+        if not self.owner:
+            return
+        with _lock:
+            event = _in_flight.pop(self.key, None)
+        self.owner = False
+        if event is not None:
+            event.set()
+
+
+def register_list_source(list_id, key):
+    """
+    Records the source definition of a scheduled list
+
+    Args:
+        list_id: ID of the list
+        key: Definition of its source (source_key()), None when the list is no
+            longer scheduled or its source is not fetched
+    """
+    with _lock:
+        if key is None:
+            _list_sources.pop(list_id, None)
+        else:
+            _list_sources[list_id] = key
+
+
+def clear_list_sources():
+    """Forgets the source definitions of the scheduled lists"""
+    with _lock:
+        _list_sources.clear()
+
+
+def _lookup(key, now):
+    """Returns the fresh payload of a key, dropping the expired entries (called with the lock held)"""
+    for expired in [name for name, (_, expiry) in _entries.items() if expiry <= now]:
+        del _entries[expired]
+    entry = _entries.get(key)
+    return entry[0] if entry else None
+
+
+@contextmanager
+def shared_fetch(key, reuse=True):
+    """
+    Joins the fetch of a source definition
+
+    The slot's payload is the result of a recent or in-flight fetch of the same
+    definition. When it is None, the caller fetches the source and shares the
+    result with slot.publish(); the lists waiting for it resume when the block
+    ends, at the latest.
+
+    Args:
+        key: Definition of the source (source_key())
+        reuse: False to fetch the source even if a recent result exists (forced
+            update); the result is still shared
+
+    Yields:
+        SharedFetch: The slot
+    """
+    ttl = _config('SHARED_FETCH_TTL_SECONDS', DEFAULT_SHARED_FETCH_TTL)
+    slot = SharedFetch(key)
+    if ttl > 0:
+        deadline = time.monotonic() + _config('SHARED_FETCH_WAIT_SECONDS', DEFAULT_SHARED_FETCH_WAIT)
+        while True:
+            with _lock:
+                now = time.monotonic()
+                payload = _lookup(key, now) if reuse else None
+                if payload is not None:
+                    slot.payload = payload
+                    slot.age = ttl - (_entries[key][1] - now)
+                    break
+                event = _in_flight.get(key)
+                if event is None:
+                    _in_flight[key] = threading.Event()
+                    slot.owner = True
+                    break
+                _waiting[key] = _waiting.get(key, 0) + 1
+            # Another list is fetching the same source: wait for its result
+            try:
+                done = event.wait(max(deadline - time.monotonic(), 0))
+            finally:
+                with _lock:
+                    _waiting[key] -= 1
+                    if not _waiting[key]:
+                        del _waiting[key]
+            if not done:
+                logger.warning(f"Shared fetch {key[:12]}: gave up waiting for the fetch in flight")
+                break
+    try:
+        yield slot
+    finally:
+        slot.release()
+
+
+def shared_body_limit():
+    """Largest body shared between lists, in bytes"""
+    return int(_config('SHARED_FETCH_MAX_BYTES', DEFAULT_SHARED_FETCH_MAX_BYTES))
+
+
+class SharedBody:
+    """
+    Downloaded body of a URL source, shared by the lists importing it
+
+    The body is parsed as JSON once, by the first list that needs it; the
+    parsed document is then shared as well (importers only read it).
+    """
+
+    def __init__(self, response):
+        self.headers = response.headers
+        self.status_code = response.status_code
+        self.url = response.url
+        self.encoding = response.encoding
+        self.content = response.content
+        self.content_hash = response.content_hash
+        self.size = response.size
+        self._parsed = None
+        self._parse_lock = threading.Lock()
+
+    @classmethod
+    def from_response(cls, response):
+        """Shares a SpooledResponse, or returns None if its body is too large to be kept in memory"""
+        if response.size > shared_body_limit():
+            logger.info(f"Shared fetch: body of {response.url} not shared ({response.size} bytes)")
+            return None
+        return cls(response)
+
+    def json(self):
+        with self._parse_lock:
+            if self._parsed is None:
+                self._parsed = (json.loads(self.content),)
+        return self._parsed[0]
+
+    def open(self):
+        """Returns a response object replaying the body"""
+        return SharedBodyResponse(self)
+
+
+class SharedBodyResponse:
+    """Parts of the requests Response API used by the importers, over a SharedBody"""
+
+    def __init__(self, body):
+        self._body = body
+        self.headers = body.headers
+        self.status_code = body.status_code
+        self.url = body.url
+        self.encoding = body.encoding
+        self.content_hash = body.content_hash
+        self.size = body.size
+
+    def iter_content(self, chunk_size=64 * 1024, decode_unicode=False):
+        content = self._body.content
+        chunk_size = chunk_size or 64 * 1024
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+    @property
+    def content(self):
+        return self._body.content
+
+    @property
+    def text(self):
+        return self._body.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def json(self):
+        return self._body.json()
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import tempfile
+from datetime import datetime, timezone
+
+from database import db
+from models.list_components import ListSourceState
+from services.job_service import report_progress
+
+logger = logging.getLogger(__name__)
+
+# Bodies larger than this are spooled to a temporary file while they are hashed
+DEFAULT_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def compute_config_hash(list_obj):
+    """
+    Fingerprints the settings that shape an import, so that an unchanged source
+    is still re-imported after the list's configuration was edited
+
+    Args:
+        list_obj: The list object
+
+    Returns:
+        str: SHA-256 of the import settings
+    """
+    settings = {
+        'update_config': list_obj.update_config,
+        'data_source_format': list_obj.data_source_format,
+        'json_data_path': list_obj.json_data_path,
+        'json_selected_columns': list_obj.json_selected_columns,
+        'max_results': list_obj.max_results
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def get_source_state(list_id):
+    """Returns the stored validators of a list's source, or None"""
+    return ListSourceState.query.get(list_id)
+
+
+def conditional_headers(state, url, config_hash):
+    """
+    Builds the If-None-Match / If-Modified-Since headers of a conditional request
+
+    Validators are only sent when they were obtained for the same URL and settings.
+
+    Args:
+        state: The stored ListSourceState (or None)
+        url: The URL about to be fetched
+        config_hash: Fingerprint of the current import settings
+
+    Returns:
+        dict: Headers to add to the request
+    """
+    if state is None or state.source_url != url or state.config_hash != config_hash:
+        return {}
+    headers = {}
+    if state.etag:
+        headers['If-None-Match'] = state.etag
+    if state.last_modified:
+        headers['If-Modified-Since'] = state.last_modified
+    return headers
+
+
+def is_unchanged(state, url, config_hash, content_hash):
+    """Tells whether a downloaded body is identical to the last imported one"""
+    return (
+        state is not None
+        and state.source_url == url
+        and state.config_hash == config_hash
+        and state.content_hash == content_hash
+    )
+
+
+def save_source_state(list_id, url, headers, content_hash, config_hash):
+    """
+    Records the validators of an imported source (without committing)
+
+    Args:
+        list_id: ID of the list
+        url: The fetched URL
+        headers: Response headers
+        content_hash: SHA-256 of the body
+        config_hash: Fingerprint of the import settings
+    """
+    now = datetime.now(timezone.utc)
+    state = ListSourceState.query.get(list_id) or ListSourceState(list_id=list_id)
+    state.source_url = url
+    state.etag = headers.get('ETag')
+    state.last_modified = headers.get('Last-Modified')
+    state.content_hash = content_hash
+    state.config_hash = config_hash
+    state.checked_at = now
+    state.changed_at = now
+    db.session.add(state)
+
+
+def mark_source_checked(list_id, headers=None):
+    """Updates the check time of an unchanged source, refreshing validators sent with a 304 (without committing)"""
+    state = ListSourceState.query.get(list_id)
+    if state is None:
+        return
+    state.checked_at = datetime.now(timezone.utc)
+    if headers:
+        state.etag = headers.get('ETag') or state.etag
+        state.last_modified = headers.get('Last-Modified') or state.last_modified
+    db.session.add(state)
+
+
+class SpooledResponse:
+    """
+    Downloads a streamed requests response while hashing it
+
+    The body is kept in memory up to max_memory bytes and spooled to a
+    temporary file beyond. The object exposes the parts of the requests
+    Response API used by the importers, replaying the stored body.
+    """
+
+    def __init__(self, response, max_memory=DEFAULT_SPOOL_MAX_MEMORY):
+        self.headers = response.headers
+        self.status_code = response.status_code
+        self.url = response.url
+        self.encoding = response.encoding
+        self._response = response
+        self._content = None
+        self._spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+
+        digest = hashlib.sha256()
+        self.size = 0
+        declared_size = response.headers.get('Content-Length')
+        declared_size = int(declared_size) if declared_size and declared_size.isdigit() else None
+        try:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:
+                    digest.update(chunk)
+                    self._spool.write(chunk)
+                    self.size += len(chunk)
+                    report_progress(phase='downloading', bytes_read=self.size, bytes_total=declared_size)
+        finally:
+            response.close()
+        self.content_hash = digest.hexdigest()
+
+    def iter_content(self, chunk_size=DOWNLOAD_CHUNK_SIZE, decode_unicode=False):
+        self._spool.seek(0)
+        while True:
+            chunk = self._spool.read(chunk_size or DOWNLOAD_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._spool.seek(0)
+            self._content = self._spool.read()
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        self._response.raise_for_status()
+
+    def close(self):
+        self._content = None
+        self._spool.close()
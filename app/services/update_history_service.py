@@ -0,0 +1,75 @@
+import logging
+
+from flask import current_app
+from sqlalchemy import text
+
+from database import db
+from models.list_components import ListUpdateRun
+
+logger = logging.getLogger(__name__)
+
+RUN_SUCCESS = 'success'
+RUN_SKIPPED = 'skipped'
+RUN_ERROR = 'error'
+
+# Number of runs kept per list when not configured
+DEFAULT_HISTORY_RETENTION = 100
+
+
+def record_run(list_id, status, rows_imported=None, message=None, started_at=None, duration_ms=None,
+               duplicates_dropped=None):
+    """
+    Appends an entry to a list's import history and commits it
+
+    Errors are logged, never raised, so that history bookkeeping cannot fail an import.
+
+    Args:
+        list_id: ID of the list
+        status: RUN_SUCCESS, RUN_SKIPPED or RUN_ERROR
+        rows_imported: Number of imported rows, if any
+        message: Short description (skip reason, error message)
+        started_at: Start time of the run
+        duration_ms: Duration of the run in milliseconds
+        duplicates_dropped: Number of duplicate rows dropped, when deduplication is enabled
+    """
+    try:
+        run = ListUpdateRun(
+            list_id=list_id,
+            status=status,
+            rows_imported=rows_imported,
+            duplicates_dropped=duplicates_dropped,
+            message=message[:2000] if message else None,
+            duration_ms=duration_ms
+        )
+        if started_at is not None:
+            run.started_at = started_at
+        db.session.add(run)
+        db.session.flush()
+
+        # Keep only the most recent runs of the list
+        retention = current_app.config.get('UPDATE_HISTORY_RETENTION', DEFAULT_HISTORY_RETENTION)
+        cutoff = db.session.execute(
+            text("""
+            SELECT id FROM list_update_runs
+            WHERE list_id = :list_id
+            ORDER BY id DESC LIMIT 1 OFFSET :retention
+            """),
+            {'list_id': list_id, 'retention': retention}
+        ).scalar()
+        if cutoff is not None:
+            db.session.execute(
+                text("DELETE FROM list_update_runs WHERE list_id = :list_id AND id <= :cutoff"),
+                {'list_id': list_id, 'cutoff': cutoff}
+            )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error recording update run for list {list_id}: {str(e)}")
+
+
+def get_runs(list_id, limit=50):
+    """Returns the most recent runs of a list, newest first"""
+    runs = ListUpdateRun.query.filter_by(list_id=list_id) \
+        .order_by(ListUpdateRun.id.desc()) \
+        .limit(limit).all()
+    return [run.to_dict() for run in runs]
@@ -0,0 +1,459 @@
+"""
+Import of uploaded CSV / JSON files
+
+Uploads are spooled to disk by the request, then read back as a stream: the
+content is decoded incrementally, rows are validated in batches with one
+compiled validator per column and written through ListDataWriter. Rejected
+rows go to a CSV error report on disk, downloadable after the import, instead
+of being kept in memory.
+"""
+import csv
+import io
+import ipaddress
+import itertools
+import json
+import logging
+import os
+import secrets
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from flask import current_app
+
+from database import db
+from models.list import List, ListData
+from models.data_writer import ListDataWriter, create_deduplicator
+from services.job_service import JobFailed, report_progress
+from utils.json_stream import JSONStreamError, iter_json_records
+
+logger = logging.getLogger(__name__)
+
+# Rows validated and written together
+VALIDATION_BATCH_SIZE = 1000
+# Errors returned in the import response, the others are only in the report
+RESPONSE_ERROR_LIMIT = 10
+# Spooled uploads and error reports older than this are deleted
+DEFAULT_UPLOAD_RETENTION_SECONDS = 7 * 24 * 3600
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def _work_dir(config_key, name):
+    path = current_app.config.get(config_key) or os.path.join(tempfile.gettempdir(), name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _delete_expired_files(directory):
+    """Deletes the files left behind by old imports (cancelled jobs, unread reports)"""
+    retention = float(current_app.config.get('IMPORT_UPLOAD_RETENTION_SECONDS', DEFAULT_UPLOAD_RETENTION_SECONDS))
+    cutoff = time.time() - retention
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            continue
+
+
+def spool_upload(file_storage):
+    """
+    Copies an uploaded file to the spool directory (IMPORT_SPOOL_DIR) in chunks
+
+    The copy outlives the request, so that a background job can read it.
+
+    Returns:
+        tuple: (path of the spooled file, size in bytes)
+    """
+    directory = _work_dir('IMPORT_SPOOL_DIR', 'listiq_uploads')
+    _delete_expired_files(directory)
+    fd, path = tempfile.mkstemp(prefix='upload_', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as spool:
+            shutil.copyfileobj(file_storage.stream, spool, READ_CHUNK_SIZE)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, os.path.getsize(path)
+
+
+class _UploadReader:
+    """Incrementally decoded text of a spooled upload, reporting the bytes read"""
+
+    def __init__(self, path, encoding='utf-8-sig'):
+        self._raw = open(path, 'rb')
+        self.text = io.TextIOWrapper(self._raw, encoding=encoding, newline='')
+
+    @property
+    def bytes_read(self):
+        # Position of the binary file: the decoder reads ahead by one block at most
+        return self._raw.tell()
+
+    def chunks(self):
+        while True:
+            chunk = self.text.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        self.text.close()
+
+
+class ErrorReport:
+    """
+    CSV file of the rows rejected by an import (row number, error, row content)
+
+    Only the first errors are kept in memory, for the import response.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.first_errors = []
+        self.token = None
+        self._file = None
+        self._writer = None
+
+    def add(self, row_num, error, data):
+        if self._file is None:
+            directory = _work_dir('IMPORT_REPORT_DIR', 'listiq_import_reports')
+            _delete_expired_files(directory)
+            self.token = secrets.token_hex(16)
+            self._file = open(report_path(self.token), 'w', encoding='utf-8', newline='')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(['row', 'error', 'data'])
+        self._writer.writerow([row_num, error, json.dumps(data, ensure_ascii=False)])
+        self.count += 1
+        if len(self.first_errors) < RESPONSE_ERROR_LIMIT:
+            self.first_errors.append({'row': row_num, 'error': error, 'data': data})
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def report_path(token):
+    """Path of the error report with this token (None for an invalid token)"""
+    if not token or not all(char in '0123456789abcdef' for char in token):
+        return None
+    return os.path.join(_work_dir('IMPORT_REPORT_DIR', 'listiq_import_reports'), f'{token}.csv')
+
+
+def compile_validator(column_type):
+    """
+    Returns the validator of a column type: it strips the value and raises
+    ValueError when the value is not valid for the type ('' for empty values)
+    """
+    def fail(value):
+        raise ValueError(f"Invalid value for type {column_type}: {value}")
+
+    if column_type == 'ip':
+        def check(value):
+            ipaddress.ip_address(value)
+    elif column_type == 'number':
+        check = float
+    elif column_type == 'date':
+        # ISO format
+        check = datetime.fromisoformat
+    else:
+        check = None
+
+    def validate(value):
+        if not value:
+            return ''
+        value = value.strip()
+        if not value or check is None:
+            return value
+        try:
+            check(value)
+        except Exception:
+            fail(value)
+        return value
+    return validate
+
+
+def format_date_for_db(date_str):
+    """Converts a date to DD/MM/YYYY format"""
+    if not date_str:
+        return None
+
+    try:
+        # If the date is already in DD/MM/YYYY format
+        if len(date_str.split('/')) == 3:
+            datetime.strptime(date_str, '%d/%m/%Y')
+            return date_str
+
+        # Otherwise, try to parse and convert
+        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+        return date_obj.strftime('%d/%m/%Y')
+
+    except ValueError as e:
+        raise ValueError(f"Invalid date format. Use DD/MM/YYYY format: {str(e)}")
+
+
+def _iter_batches(rows, size=VALIDATION_BATCH_SIZE):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _update_public_files(list_obj):
+    if list_obj.public_csv_enabled or list_obj.public_json_enabled:
+        from services.public_files_service import update_public_files
+        try:
+            update_public_files(list_obj)
+            current_app.logger.info(f"Public files updated for list {list_obj.id} after import")
+        except Exception as e:
+            current_app.logger.error(f"Error updating public files after import: {str(e)}")
+            # Do not fail the import if updating public files fails
+
+
+def import_validated_csv(list_id, path):
+    """
+    Imports a spooled CSV file whose header must only contain columns of the list
+
+    Every value is validated against its column type; rows with an invalid
+    value are skipped and written to the error report.
+
+    Args:
+        list_id: ID of the list
+        path: Spooled file (deleted once imported)
+
+    Returns:
+        dict: Response of the import (message, stats, first errors, report URL)
+
+    Raises:
+        JobFailed: The file does not match the list's columns
+    """
+    from services.data_change_service import on_list_data_changed
+    from utils.timezone_utils import get_paris_now
+
+    reader = _UploadReader(path)
+    report = ErrorReport()
+    try:
+        list_obj = List.query.get(list_id)
+        if not list_obj:
+            raise JobFailed('List not found', {'error': 'List not found'}, status_code=404)
+        columns_dict = {col.name: col for col in list_obj.columns}
+
+        csv_reader = csv.DictReader(reader.text)
+        current_app.logger.info(f"CSV fieldnames: {csv_reader.fieldnames}")
+        if not csv_reader.fieldnames:
+            raise JobFailed('The CSV file is empty or poorly formatted', {'error': 'The CSV file is empty or poorly formatted'})
+
+        file_columns = set(csv_reader.fieldnames)
+        list_columns = set(columns_dict.keys())
+        if not file_columns.issubset(list_columns):
+            invalid_columns = file_columns - list_columns
+            error = f'Invalid columns found: {", ".join(invalid_columns)}'
+            raise JobFailed(error, {
+                'error': error,
+                'details': {
+                    'file_columns': list(file_columns),
+                    'expected_columns': list(list_columns)
+                }
+            })
+
+        # One compiled validator per column of the file, in the file's order
+        validators = [
+            (name, columns_dict[name].position, compile_validator(columns_dict[name].column_type))
+            for name in csv_reader.fieldnames
+        ]
+
+        writer = ListDataWriter(list_obj.id, deduplicator=create_deduplicator(
+            list_obj.id, list_obj.update_config, columns_dict.values()))
+        row_count = 0
+        first_row_num = 1
+        for batch in _iter_batches(csv_reader):
+            # Validate column by column; a row keeps the error of its first invalid column
+            errors = {}
+            batch_columns = []
+            for name, position, validate in validators:
+                values = []
+                for index, row in enumerate(batch):
+                    try:
+                        values.append(validate(row.get(name)))
+                    except ValueError as e:
+                        errors.setdefault(index, f"Row {first_row_num + index}, column '{name}': {str(e)}")
+                        values.append(None)
+                batch_columns.append((position, values))
+
+            for index, error in sorted(errors.items()):
+                current_app.logger.error(f"Error on row {first_row_num + index}: {error}")
+                report.add(first_row_num + index, error, batch[index])
+                for _, values in batch_columns:
+                    values[index] = None
+
+            writer.add_columns(first_row_num, batch_columns)
+            row_count += len(batch) - len(errors)
+            first_row_num += len(batch)
+            report_progress(phase='writing', bytes_read=reader.bytes_read, rows_written=row_count - writer.duplicates_dropped)
+        writer.close()
+
+        list_obj.last_update = get_paris_now()
+        list_obj.bump_data_version()
+        db.session.commit()
+        on_list_data_changed(list_obj)
+        _update_public_files(list_obj)
+
+        response = {
+            'message': 'Import finished',
+            'stats': {
+                'total_rows': row_count + report.count,
+                'successful_rows': row_count - writer.duplicates_dropped,
+                'error_rows': report.count
+            }
+        }
+        if writer.deduplicator is not None:
+            response['stats']['duplicate_rows'] = writer.duplicates_dropped
+        if report.count:
+            response['message'] = 'Import finished with errors'
+            response['errors'] = report.first_errors
+            response['error_report_url'] = f'/api/import-reports/{report.token}'
+        return response
+    finally:
+        report.close()
+        reader.close()
+        os.remove(path)
+
+
+def _iter_json_upload(reader):
+    """Yields the objects of an uploaded JSON file, which must contain a list of objects"""
+    chunks = reader.chunks()
+    first = ''
+    for chunk in chunks:
+        first += chunk
+        if first.strip():
+            break
+    if not first.lstrip().startswith('['):
+        raise JobFailed('The JSON file must contain a list of objects', {'error': 'The JSON file must contain a list of objects'})
+    try:
+        for item in iter_json_records(itertools.chain([first], chunks)):
+            if not isinstance(item, dict):
+                raise JobFailed('The JSON file must contain a list of objects', {'error': 'The JSON file must contain a list of objects'})
+            yield item
+    except JSONStreamError as e:
+        error = f'JSON decoding error: {str(e)}'
+        raise JobFailed(error, {'error': error})
+
+
+def import_list_file(list_id, path, file_extension):
+    """
+    Appends the rows of a spooled CSV or JSON file to a list
+
+    The columns of the file must belong to the list; a file with unknown columns
+    or an invalid date is rejected as a whole (the transaction is rolled back).
+
+    Args:
+        list_id: ID of the list
+        path: Spooled file (deleted once imported)
+        file_extension: 'csv' or 'json'
+
+    Returns:
+        dict: Response of the import
+
+    Raises:
+        JobFailed: The file is invalid
+    """
+    from services.data_change_service import on_list_data_changed
+
+    reader = _UploadReader(path, encoding='utf-8')
+    try:
+        list_obj = List.query.get(list_id)
+        if not list_obj:
+            raise JobFailed('List not found', {'error': 'List not found'}, status_code=404)
+        columns = {col.name: col for col in list_obj.columns}
+        list_columns = set(columns.keys())
+
+        if file_extension == 'csv':
+            # Get CSV configuration from the list if it exists
+            update_config = list_obj.get_update_config
+            csv_config = update_config.get('csv_config', {}) if update_config else {}
+            delimiter = csv_config.get('separator', ',')
+
+            if csv_config.get('has_headers', True):
+                # Use headers from the first line
+                csv_reader = csv.DictReader(reader.text, delimiter=delimiter)
+            elif csv_config.get('column_names'):
+                csv_reader = csv.DictReader(reader.text, fieldnames=csv_config['column_names'], delimiter=delimiter)
+            else:
+                # Generate column names automatically (Col1, Col2, etc.) from the first line
+                first_line = reader.text.readline()
+                auto_column_names = [f'Col{i+1}' for i in range(len(first_line.rstrip('\r\n').split(delimiter)))]
+                csv_reader = csv.DictReader(itertools.chain([first_line], reader.text),
+                                            fieldnames=auto_column_names, delimiter=delimiter)
+
+            if not csv_reader.fieldnames:
+                raise JobFailed('The CSV file does not contain column headers', {'error': 'The CSV file does not contain column headers'})
+            invalid_columns = set(csv_reader.fieldnames) - list_columns
+            if invalid_columns:
+                error = f'Invalid columns in CSV: {", ".join(invalid_columns)}'
+                raise JobFailed(error, {'error': error})
+            rows = csv_reader
+        else:
+            rows = _iter_json_upload(reader)
+
+        # Apply the results limit if defined
+        if list_obj.max_results > 0:
+            rows = itertools.islice(rows, list_obj.max_results)
+
+        # Find the next available row_id
+        max_row_id = db.session.query(db.func.max(ListData.row_id)).filter(
+            ListData.list_id == list_id
+        ).scalar()
+        next_row_id = (max_row_id or 0) + 1
+        first_row_id = next_row_id
+
+        def convert_date(value):
+            return format_date_for_db(value if isinstance(value, str) else str(value))
+
+        converters = {
+            name: (column.position, convert_date if column.column_type == 'date' else str)
+            for name, column in columns.items()
+        }
+
+        writer = ListDataWriter(list_id, deduplicator=create_deduplicator(list_id, list_obj.update_config, columns.values()))
+        for batch in _iter_batches(rows):
+            if file_extension == 'json':
+                # JSON keys are only known row by row
+                unknown = {key for row in batch for key in row} - list_columns
+                if unknown:
+                    error = f'Invalid columns in JSON: {", ".join(unknown)}'
+                    raise JobFailed(error, {'error': error})
+
+            # Convert column by column
+            converted = {}
+            for name in {key for row in batch for key in row if key in converters}:
+                position, convert = converters[name]
+                converted[name] = [convert(row[name]) if name in row else None for row in batch]
+
+            for index in range(len(batch)):
+                cells = [(converters[name][0], values[index]) for name, values in converted.items()
+                         if name in batch[index]]
+                # The writer renumbers the rows following a dropped duplicate
+                if writer.add_row(next_row_id + writer.duplicates_dropped, cells):
+                    next_row_id += 1
+            report_progress(phase='writing', bytes_read=reader.bytes_read, rows_written=writer.rows_written)
+        row_count = writer.close()
+
+        list_obj.bump_data_version()
+        db.session.commit()
+        on_list_data_changed(list_obj, list(range(first_row_id, next_row_id)))
+        _update_public_files(list_obj)
+
+        response = {
+            'message': f'{row_count} rows imported successfully'
+        }
+        if writer.deduplicator is not None:
+            response['duplicate_rows'] = writer.duplicates_dropped
+        return response
+    except UnicodeDecodeError as e:
+        error = f'The file is not valid UTF-8: {str(e)}'
+        raise JobFailed(error, {'error': error})
+    finally:
+        reader.close()
+        os.remove(path)
@@ -0,0 +1,149 @@
+import hashlib
+import logging
+
+from sqlalchemy import text
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of row ids per IN (...) clause
+ROW_ID_CHUNK_SIZE = 1000
+
+# Normalization done in SQL; normalize_value() must stay equivalent
+_SQL_VALUE_HASH = "SHA2(LOWER(TRIM(value)), 256)"
+
+
+def normalize_value(value):
+    """
+    Normalizes a value the same way as the SQL indexing query (TRIM + LOWER)
+
+    Args:
+        value: The raw value
+
+    Returns:
+        str: The normalized value
+    """
+    return str(value).strip(' ').lower()
+
+
+def hash_value(value):
+    """Returns the index key of a value"""
+    return hashlib.sha256(normalize_value(value).encode('utf-8')).hexdigest()
+
+
+def _insert_from_list_data(list_id, row_ids=None):
+    """Indexes the cells of a list (or of some of its rows) with a single INSERT ... SELECT"""
+    sql = f"""
+    INSERT INTO list_value_index (value_hash, list_id, row_id, column_position)
+    SELECT {_SQL_VALUE_HASH}, list_id, row_id, column_position
+    FROM list_data
+    WHERE list_id = :list_id AND value IS NOT NULL AND TRIM(value) <> ''
+    """
+    if row_ids is None:
+        db.session.execute(text(sql), {'list_id': list_id})
+        return
+
+    for start in range(0, len(row_ids), ROW_ID_CHUNK_SIZE):
+        chunk = row_ids[start:start + ROW_ID_CHUNK_SIZE]
+        params = {'list_id': list_id}
+        placeholders = []
+        for i, row_id in enumerate(chunk):
+            params[f'r{i}'] = row_id
+            placeholders.append(f':r{i}')
+        db.session.execute(text(f"{sql} AND row_id IN ({', '.join(placeholders)})"), params)
+
+
+def _delete_entries(list_id, row_ids=None):
+    """Removes the index entries of a list (or of some of its rows)"""
+    if row_ids is None:
+        db.session.execute(text("DELETE FROM list_value_index WHERE list_id = :list_id"), {'list_id': list_id})
+        return
+
+    for start in range(0, len(row_ids), ROW_ID_CHUNK_SIZE):
+        chunk = row_ids[start:start + ROW_ID_CHUNK_SIZE]
+        params = {'list_id': list_id}
+        placeholders = []
+        for i, row_id in enumerate(chunk):
+            params[f'r{i}'] = row_id
+            placeholders.append(f':r{i}')
+        db.session.execute(
+            text(f"DELETE FROM list_value_index WHERE list_id = :list_id AND row_id IN ({', '.join(placeholders)})"),
+            params
+        )
+
+
+def reindex_list(list_id, row_ids=None):
+    """
+    Rebuilds the index entries of a list
+
+    Args:
+        list_id: ID of the list
+        row_ids: Rows to refresh; None rebuilds the whole list
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        if row_ids is not None:
+            row_ids = sorted(set(row_ids))
+            if not row_ids:
+                return True
+        _delete_entries(list_id, row_ids)
+        _insert_from_list_data(list_id, row_ids)
+        db.session.commit()
+        logger.info(f"Value index refreshed for list {list_id} "
+                    f"({'all rows' if row_ids is None else f'{len(row_ids)} rows'})")
+        return True
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error refreshing value index for list {list_id}: {str(e)}")
+        return False
+
+
+def drop_list(list_id):
+    """Removes all index entries of a deleted list (without committing)"""
+    _delete_entries(list_id)
+
+
+def search_value(value, user=None, limit=1000, exclude_list_ids=None):
+    """
+    Finds the cells of all accessible lists that contain a value
+
+    Args:
+        value: The value to search (compared after TRIM + LOWER)
+        user: The current user; non-admins only see published lists
+        limit: Maximum number of matches returned
+        exclude_list_ids: IDs of lists left out of the search (e.g. IP-restricted
+            lists the client cannot access), excluded before the limit applies
+
+    Returns:
+        list: Matches as dicts (list_id, list_name, column, row_id, value)
+    """
+    sql = """
+    SELECT i.list_id, l.name AS list_name, c.name AS column_name, i.row_id, d.value
+    FROM list_value_index i
+    JOIN lists l ON l.id = i.list_id
+    LEFT JOIN list_columns c ON c.list_id = i.list_id AND c.position = i.column_position
+    LEFT JOIN list_data d ON d.list_id = i.list_id AND d.row_id = i.row_id AND d.column_position = i.column_position
+    WHERE i.value_hash = :value_hash
+    """
+    params = {'value_hash': hash_value(value), 'limit': limit}
+    if user is None or not user.is_admin:
+        sql += " AND l.is_published = 1"
+    if exclude_list_ids:
+        placeholders = []
+        for i, list_id in enumerate(sorted(exclude_list_ids)):
+            params[f'x{i}'] = list_id
+            placeholders.append(f':x{i}')
+        sql += f" AND i.list_id NOT IN ({', '.join(placeholders)})"
+    sql += " ORDER BY i.list_id, i.row_id LIMIT :limit"
+
+    result = db.session.execute(text(sql), params)
+    return [{
+        'list_id': row.list_id,
+        'list_name': row.list_name,
+        'column': row.column_name,
+        'row_id': row.row_id,
+        'value': row.value
+    } for row in result]
@@ -258,11 +258,16 @@ echo "Starting Flask application..."
 export FLASK_ENV=development
 echo "FLASK_ENV=$FLASK_ENV"
 
+# Threaded worker: long-poll and SSE watch requests (/public/watch, up to
+# LONG_POLL_MAX_WAIT seconds) must not hold the only worker; the timeout stays
+# well above the longest wait. A single worker process keeps a single scheduler.
+GUNICORN_OPTIONS="--bind 0.0.0.0:5000 --worker-class gthread --threads ${GUNICORN_THREADS:-16} --timeout ${GUNICORN_TIMEOUT:-120}"
+
 # Add the --reload option in development mode to automatically reload templates
 if [ "$FLASK_ENV" = "development" ]; then
     echo "Development mode detected, enabling auto-reload..."
-    gunicorn --bind 0.0.0.0:5000 --reload wsgi:app
+    gunicorn $GUNICORN_OPTIONS --reload wsgi:app
 else
     echo "Production mode, no auto-reload."
-    gunicorn --bind 0.0.0.0:5000 wsgi:app
+    gunicorn $GUNICORN_OPTIONS wsgi:app
 fi
\ No newline at end of file
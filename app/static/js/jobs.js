@@ -0,0 +1,56 @@
+// Suivi des imports exécutés en tâche de fond (/api/jobs/<id>)
+
+const JOB_POLL_INTERVAL = 1000;
+
+// Interroge une tâche jusqu'à sa fin ; onProgress reçoit l'état à chaque réponse.
+// La promesse est résolue avec l'état final de la tâche (status, result, message).
+function waitForJob(jobId, onProgress) {
+    return new Promise((resolve, reject) => {
+        const poll = () => {
+            fetch(`/api/jobs/${jobId}`, { credentials: 'same-origin' })
+                .then(response => response.json().then(data => {
+                    if (!response.ok) {
+                        throw new Error(data.error || 'Erreur lors du suivi de l\'import');
+                    }
+                    return data;
+                }))
+                .then(job => {
+                    if (onProgress) {
+                        onProgress(job);
+                    }
+                    if (job.finished) {
+                        resolve(job);
+                    } else {
+                        setTimeout(poll, JOB_POLL_INTERVAL);
+                    }
+                })
+                .catch(reject);
+        };
+        poll();
+    });
+}
+
+// Demande l'annulation d'une tâche
+function cancelJob(jobId) {
+    const csrfMetaTag = document.querySelector('meta[name="csrf-token"]');
+    return fetch(`/api/jobs/${jobId}/cancel`, {
+        method: 'POST',
+        headers: csrfMetaTag ? { 'X-CSRFToken': csrfMetaTag.getAttribute('content') } : {},
+        credentials: 'same-origin'
+    }).then(response => response.json());
+}
+
+// Texte court décrivant la progression d'une tâche
+function formatJobProgress(job) {
+    const parts = [job.phase || job.status];
+    if (job.progress !== null && job.progress !== undefined) {
+        parts.push(`${Math.round(job.progress * 100)} %`);
+    }
+    if (job.rows_written) {
+        parts.push(`${job.rows_written} lignes`);
+    }
+    if (job.eta_seconds !== null && job.eta_seconds !== undefined) {
+        parts.push(`~${Math.ceil(job.eta_seconds)} s`);
+    }
+    return parts.join(' - ');
+}
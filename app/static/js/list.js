@@ -341,9 +341,27 @@ function submitImport(event) {
             return data;
         });
     })
+    .then(data => {
+        // L'import s'exécute en tâche de fond : suivre sa progression
+        if (!data.job_id) {
+            return data;
+        }
+        return waitForJob(data.job_id, job => {
+            submitButton.textContent = `Import en cours... ${formatJobProgress(job)}`;
+        }).then(job => {
+            if (job.status !== 'succeeded') {
+                throw new Error((job.result && job.result.error) || job.message || 'Erreur lors de l\'import');
+            }
+            return job.result;
+        });
+    })
     .then(data => {
         console.log('Données reçues:', data);
         if (data.message) {
+            // Proposer le rapport des lignes rejetées
+            if (data.error_report_url && confirm(`${data.message} : ${data.stats.error_rows} ligne(s) rejetée(s). Télécharger le rapport d'erreurs ?`)) {
+                window.open(data.error_report_url, '_blank');
+            }
             // Fermer le modal
             const modal = bootstrap.Modal.getInstance(document.getElementById('importModal'));
             modal.hide();
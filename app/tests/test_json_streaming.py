@@ -0,0 +1,99 @@
+"""
+The streamed JSON import must produce the same rows as the whole-document import
+
+Run from the app directory:
+
+    python -m unittest discover -s tests
+"""
+import io
+import json
+import logging
+import unittest
+from types import SimpleNamespace
+
+import requests
+from flask import Flask
+
+from models.data_importer import DataImporter
+from models.data_writer import ListDataWriter
+from services.source_fetch_service import SpooledResponse
+
+
+class _CollectingWriter(ListDataWriter):
+    """Writer keeping the cells instead of inserting them"""
+
+    def __init__(self, list_id, cells):
+        super().__init__(list_id)
+        self._cells = cells
+
+    def flush(self):
+        self.cells_written += len(self._buffer)
+        self._cells.extend((cell['row_id'], cell['column_position'], cell['value']) for cell in self._buffer)
+        self._buffer = []
+
+
+class _CollectingImporter(DataImporter):
+    def __init__(self, list_instance):
+        super().__init__(list_instance)
+        self.logger = logging.getLogger('test_json_streaming')
+        self.cells = []
+
+    def _create_data_writer(self, columns):
+        return _CollectingWriter(self.list_instance.id, self.cells)
+
+
+def _response(document):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response.raw = io.BytesIO(json.dumps(document).encode('utf-8'))
+    return SpooledResponse(response)
+
+
+def _build_list(data_path, max_results=0):
+    return SimpleNamespace(
+        id=0,
+        max_results=max_results,
+        json_data_path=data_path,
+        json_selected_columns=None,
+        columns=[SimpleNamespace(name='ip', position=0), SimpleNamespace(name='score', position=1)],
+        update_config={'source': 'url', 'auto_create_columns': False}
+    )
+
+
+class JSONStreamingImportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app_context = Flask(__name__).app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def assert_same_rows(self, document, data_path, max_results=0):
+        streamed = _CollectingImporter(_build_list(data_path, max_results))
+        streamed_count = streamed._process_json_stream(_response(document))
+        whole = _CollectingImporter(_build_list(data_path, max_results))
+        whole_count = whole._process_json_data(_response(document).json())
+        self.assertEqual(streamed_count, whole_count)
+        self.assertEqual(streamed.cells, whole.cells)
+        return streamed.cells
+
+    def test_nested_object_path(self):
+        document = {'data': {'items': [{'ip': '10.0.0.1', 'score': 3}, {'ip': '10.0.0.2', 'score': 5}]}}
+        cells = self.assert_same_rows(document, 'data.items', max_results=10)
+        self.assertEqual(cells, [(0, 0, '10.0.0.1'), (0, 1, '3'), (1, 0, '10.0.0.2'), (1, 1, '5')])
+
+    def test_array_index_path(self):
+        document = {'pages': [{'items': [{'ip': '10.0.0.1'}]}, {'items': [{'ip': '10.0.0.9'}]}]}
+        cells = self.assert_same_rows(document, 'pages.1.items', max_results=1)
+        self.assertEqual(cells, [(0, 0, '10.0.0.9')])
+
+    def test_key_read_in_every_element_of_an_array(self):
+        document = {'data': [{'items': {'ip': '10.0.0.1', 'score': 3}}, {'items': {'ip': '10.0.0.2'}}]}
+        cells = self.assert_same_rows(document, 'data.items', max_results=10)
+        self.assertEqual(cells, [(0, 0, '10.0.0.1'), (0, 1, '3'), (1, 0, '10.0.0.2')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+"""
+Lecture rapide des fichiers de listes d'adresses IP (une valeur par ligne).
+
+Les lignes sont lues en flux et traitées par blocs : extraction de la valeur
+(commentaires '#' / ';' ignorés), validation et normalisation des adresses et
+des réseaux CIDR, dédoublonnage et agrégation optionnels.
+
+parse_ip_value() est l'analyse commune des valeurs IP (adresse, réseau CIDR,
+plage), utilisée aussi par l'index de recherche et l'agrégation CIDR des listes.
+"""
+import ipaddress
+import itertools
+import re
+
+# Nombre de lignes traitées par bloc
+DEFAULT_LINE_BATCH_SIZE = 50000
+
+# Adresse IPv4 déjà sous forme canonique (sans zéro initial) : acceptée sans ipaddress
+_OCTET = r'(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
+_CANONICAL_IPV4 = re.compile(rf'{_OCTET}(?:\.{_OCTET}){{3}}')
+# Fin de la valeur : espace, commentaire ou champ suivant (ex. "1.2.3.0/24 ; SBL123")
+_VALUE_END = re.compile(r'[\s;#,]')
+
+
+class InvalidIPLine(ValueError):
+    """Ligne qui n'est ni une adresse IP ni un réseau CIDR"""
+
+
+def iter_line_values(lines):
+    """
+    Extrait la valeur de chaque ligne non vide d'un flux
+
+    Les lignes de commentaire (#, ;) sont ignorées, ainsi que ce qui suit la
+    valeur sur une ligne.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        match = _VALUE_END.search(line)
+        yield line[:match.start()] if match else line
+
+
+def parse_ip_value(value, allow_range=True):
+    """
+    Analyse une adresse IP, un réseau CIDR (bits d'hôte tolérés) ou une plage "début-fin"
+
+    Args:
+        value: Valeur brute (espaces ignorés)
+        allow_range: Accepte les plages "début-fin"
+
+    Returns:
+        Adresse (ip_address), réseau (ip_network) ou tuple (début, fin) d'une plage
+        (bornes ordonnées, de même version), ou None si la valeur n'est pas valide
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        if '/' in value:
+            return ipaddress.ip_network(value, strict=False)
+        if allow_range and '-' in value:
+            first, last = [part.strip() for part in value.split('-', 1)]
+            start = ipaddress.ip_address(first)
+            end = ipaddress.ip_address(last)
+            if start.version != end.version:
+                return None
+            return (start, end) if start <= end else (end, start)
+        return ipaddress.ip_address(value)
+    except ValueError:
+        return None
+
+
+def ip_value_bounds(parsed):
+    """
+    Première et dernière adresse d'une valeur analysée par parse_ip_value()
+
+    Returns:
+        tuple: (première adresse, dernière adresse)
+    """
+    if isinstance(parsed, tuple):
+        return parsed
+    if isinstance(parsed, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+        return parsed.network_address, parsed.broadcast_address
+    return parsed, parsed
+
+
+def normalize_ip(value):
+    """
+    Normalise une adresse IP ou un réseau CIDR
+
+    Returns:
+        str: Forme canonique ('10.0.0.1', '2001:db8::1', '10.0.0.0/8'), ou None si
+        la valeur n'est ni une adresse ni un réseau
+    """
+    if _CANONICAL_IPV4.fullmatch(value):
+        return value
+    parsed = parse_ip_value(value, allow_range=False)
+    return None if parsed is None else str(parsed)
+
+
+def normalize_ip_batch(values):
+    """
+    Normalise un bloc de valeurs
+
+    Returns:
+        tuple: (valeurs normalisées, valeurs invalides)
+    """
+    match = _CANONICAL_IPV4.fullmatch
+    normalized = []
+    invalid = []
+    for value in values:
+        if match(value):
+            normalized.append(value)
+            continue
+        result = normalize_ip(value)
+        if result is None:
+            invalid.append(value)
+        else:
+            normalized.append(result)
+    return normalized, invalid
+
+
+def collapse_networks(values):
+    """
+    Agrège des adresses et réseaux en un minimum de blocs CIDR (IPv4 puis IPv6)
+
+    Les adresses seules restent sans préfixe ('10.0.0.1' et non '10.0.0.1/32').
+    """
+    networks = {4: [], 6: []}
+    for value in values:
+        network = ipaddress.ip_network(value, strict=False)
+        networks[network.version].append(network)
+
+    for version in (4, 6):
+        host_prefix = 32 if version == 4 else 128
+        for network in ipaddress.collapse_addresses(networks[version]):
+            yield str(network.network_address) if network.prefixlen == host_prefix else str(network)
+
+
+def iter_ip_batches(lines, batch_size=DEFAULT_LINE_BATCH_SIZE, deduplicate=False, stats=None, strict=False):
+    """
+    Lit un flux de lignes et produit des blocs d'adresses normalisées
+
+    Args:
+        lines: Itérable de lignes
+        batch_size: Nombre de lignes par bloc
+        deduplicate: Ne produit chaque valeur qu'une fois (dans l'ordre de première apparition)
+        stats: Dictionnaire complété avec 'lines', 'invalid', 'duplicates' et
+            'invalid_samples' (premières valeurs invalides)
+        strict: Lève InvalidIPLine à la première valeur invalide au lieu de l'ignorer
+
+    Yields:
+        list: Valeurs normalisées d'un bloc
+
+    Raises:
+        InvalidIPLine: Valeur invalide rencontrée en mode strict
+    """
+    stats = stats if stats is not None else {}
+    stats.update(lines=0, invalid=0, duplicates=0, invalid_samples=[])
+    seen = set() if deduplicate else None
+    values = iter_line_values(lines)
+    while True:
+        batch = list(itertools.islice(values, batch_size))
+        if not batch:
+            return
+        stats['lines'] += len(batch)
+        normalized, invalid = normalize_ip_batch(batch)
+        if invalid and strict:
+            raise InvalidIPLine(f"Valeur qui n'est pas une adresse IP : {invalid[0]!r}")
+        if invalid:
+            stats['invalid'] += len(invalid)
+            stats['invalid_samples'].extend(invalid[:10 - len(stats['invalid_samples'])])
+        if seen is not None:
+            unique = []
+            for value in normalized:
+                if value not in seen:
+                    seen.add(value)
+                    unique.append(value)
+            stats['duplicates'] += len(normalized) - len(unique)
+            normalized = unique
+        if normalized:
+            yield normalized
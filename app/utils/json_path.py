@@ -0,0 +1,142 @@
+"""
+Chemins JSON compilés (json_data_path, colonnes sélectionnées).
+
+Trois syntaxes sont acceptées :
+
+- chemin pointé historique : 'data.items', 'results.0.hosts' ; une clé appliquée
+  à un tableau est lue dans chacun de ses objets
+- JSONPath (jsonpath-ng) pour les expressions commençant par '$' :
+  '$.data[*].attributes'
+- JMESPath pour les autres expressions : 'data[].hosts[]',
+  'data[*].{ip: attributes.ip, pays: geo.country}', 'items[?active]'
+
+Chaque expression est compilée une seule fois (cache) puis appliquée aux
+documents : projections et aplatissements sont faits en une passe par la
+bibliothèque plutôt que par des boucles Python.
+"""
+from functools import lru_cache
+
+try:
+    import jmespath
+except ImportError:
+    jmespath = None
+
+try:
+    from jsonpath_ng.ext import parse as jsonpath_parse
+except ImportError:
+    jsonpath_parse = None
+
+# Valeur absente du document (distincte d'une valeur null)
+MISSING = object()
+
+# Caractères qui n'apparaissent pas dans un chemin pointé simple
+_EXPRESSION_CHARS = frozenset('[]*|{}@()&!=<>`\'",?:')
+# Éléments JSONPath pouvant produire plusieurs valeurs
+_JSONPATH_MULTIPLE = ('*', '..', '[?', ':', ',')
+
+
+class JSONPathError(ValueError):
+    """Expression invalide ou bibliothèque absente"""
+
+
+class DottedPath:
+    """Chemin pointé : clés d'objets et indices de tableaux"""
+
+    kind = 'dotted'
+
+    def __init__(self, parts):
+        self.parts = parts
+
+    @property
+    def root_key(self):
+        """Clé de premier niveau lue par le chemin (None si le chemin est vide)"""
+        return self.parts[0] if self.parts else None
+
+    def search(self, data):
+        current = data
+        for key in self.parts:
+            if isinstance(current, dict):
+                current = current.get(key, MISSING)
+            elif isinstance(current, list):
+                if key.isdigit():
+                    index = int(key)
+                    current = current[index] if index < len(current) else MISSING
+                else:
+                    # Clé lue dans chaque objet du tableau
+                    current = [item[key] for item in current if isinstance(item, dict) and key in item] or MISSING
+            else:
+                return MISSING
+            if current is MISSING:
+                return MISSING
+        return current
+
+
+class JMESPathExpression:
+    """Expression JMESPath compilée ; un résultat null est considéré comme absent"""
+
+    kind = 'jmespath'
+    root_key = None
+
+    def __init__(self, expression):
+        if jmespath is None:
+            raise JSONPathError(f"JMESPath expression '{expression}' requires the jmespath package")
+        try:
+            self._compiled = jmespath.compile(expression)
+        except Exception as e:
+            raise JSONPathError(f"Invalid JMESPath expression '{expression}': {e}") from e
+
+    def search(self, data):
+        value = self._compiled.search(data)
+        return MISSING if value is None else value
+
+
+class JSONPathExpression:
+    """Expression JSONPath compilée ; plusieurs correspondances donnent une liste"""
+
+    kind = 'jsonpath'
+    root_key = None
+
+    def __init__(self, expression):
+        if jsonpath_parse is None:
+            raise JSONPathError(f"JSONPath expression '{expression}' requires the jsonpath-ng package")
+        try:
+            self._compiled = jsonpath_parse(expression)
+        except Exception as e:
+            raise JSONPathError(f"Invalid JSONPath expression '{expression}': {e}") from e
+        self.multiple = any(token in expression for token in _JSONPATH_MULTIPLE)
+
+    def search(self, data):
+        values = [match.value for match in self._compiled.find(data)]
+        if not values:
+            return MISSING
+        if len(values) == 1 and not self.multiple:
+            return values[0]
+        return values
+
+
+@lru_cache(maxsize=512)
+def compile_json_path(path):
+    """
+    Compile un chemin ou une expression (résultat mis en cache)
+
+    Args:
+        path: Chemin pointé, expression JSONPath ('$...') ou JMESPath ; vide pour la racine
+
+    Returns:
+        Objet dont search(document) retourne la valeur désignée, ou MISSING
+
+    Raises:
+        JSONPathError: Expression invalide ou bibliothèque absente
+    """
+    path = (path or '').strip()
+    if path.startswith('$'):
+        return JSONPathExpression(path)
+    if any(char in _EXPRESSION_CHARS for char in path):
+        return JMESPathExpression(path)
+    return DottedPath(tuple(part for part in path.split('.') if part))
+
+
+@lru_cache(maxsize=512)
+def compile_key(key):
+    """Chemin réduit à une clé de premier niveau (le nom peut contenir des points)"""
+    return DottedPath((key,))
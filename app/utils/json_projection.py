@@ -0,0 +1,68 @@
+"""
+Projection des colonnes sélectionnées d'une source JSON.
+
+La sélection (json_selected_columns) est compilée une fois par import en un
+chemin par colonne : seules les clés choisies sont lues dans chaque objet, y
+compris dans des objets imbriqués ('path': 'geo.country') ou au moyen d'une
+expression JMESPath / JSONPath (voir utils.json_path).
+"""
+from utils.json_path import MISSING, compile_json_path, compile_key
+
+
+def column_paths(selected_columns):
+    """
+    Chemins compilés des colonnes sélectionnées
+
+    Une colonne est lue à la clé de même nom, ou au chemin donné par sa clé
+    'path' (chemin pointé, JMESPath ou JSONPath).
+
+    Args:
+        selected_columns: Liste de dictionnaires {'name', 'type', 'path' optionnel}
+
+    Returns:
+        list: Couples (nom de la colonne, chemin compilé)
+
+    Raises:
+        JSONPathError: Expression invalide
+    """
+    paths = []
+    for column in selected_columns or []:
+        if not isinstance(column, dict) or not column.get('name'):
+            continue
+        path = column.get('path')
+        paths.append((column['name'], compile_json_path(path) if path else compile_key(column['name'])))
+    return paths
+
+
+def root_keys(paths):
+    """
+    Clés de premier niveau nécessaires pour lire les chemins (lecture en flux)
+
+    Returns:
+        set: Les clés, ou None si une expression peut lire n'importe quelle clé
+    """
+    keys = set()
+    for _, path in paths:
+        if path.root_key is None:
+            return None
+        keys.add(path.root_key)
+    return keys
+
+
+def compile_projection(paths):
+    """
+    Compile la projection d'un objet sur les colonnes sélectionnées
+
+    Returns:
+        callable: item -> dictionnaire {nom: valeur} limité aux colonnes présentes
+    """
+    getters = [(name, path.search) for name, path in paths]
+
+    def project(item):
+        row = {}
+        for name, get in getters:
+            value = get(item)
+            if value is not MISSING:
+                row[name] = value
+        return row
+    return project
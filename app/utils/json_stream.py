@@ -0,0 +1,253 @@
+"""
+Lecture incrémentale de documents JSON volumineux (bibliothèque standard uniquement).
+
+Le document est consommé bloc par bloc : seuls les éléments du tableau situé au
+chemin demandé sont décodés, un par un, et les valeurs qui ne sont pas
+sélectionnées sont sautées sans être matérialisées.
+"""
+import json
+import re
+
+# Caractères significatifs hors chaîne et dans une chaîne
+_STRUCTURE_RE = re.compile(r'["{}\[\]]')
+_STRING_RE = re.compile(r'["\\]')
+# Fin d'un nombre ou d'un littéral (true, false, null)
+_SCALAR_END_RE = re.compile(r'[,\]}\s]')
+_WHITESPACE = ' \t\r\n'
+
+
+class JSONStreamError(ValueError):
+    """Document JSON invalide ou chemin introuvable"""
+
+
+class JSONPathFanOut(JSONStreamError):
+    """
+    Le chemin lit une clé dans chaque objet d'un tableau ('data.items' quand
+    'data' est un tableau) : le résultat regroupe plusieurs tableaux et demande
+    le document entier (DottedPath.search)
+    """
+
+
+class _JSONTextReader:
+    """Tampon de lecture sur un itérable de blocs de texte"""
+
+    def __init__(self, text_chunks):
+        self._chunks = iter(text_chunks)
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, keep_from):
+        """Ajoute un bloc au tampon en abandonnant le texte avant keep_from ; retourne le décalage appliqué"""
+        self.buffer = self.buffer[keep_from:]
+        self.pos -= keep_from
+        for chunk in self._chunks:
+            if chunk:
+                self.buffer += chunk
+                return keep_from
+        self.eof = True
+        return keep_from
+
+    def peek(self):
+        """Retourne le prochain caractère significatif sans le consommer ('' en fin de document)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ''
+            self._fill(self.pos)
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise JSONStreamError(f"Expected '{char}' but found '{found or 'end of document'}'")
+        self.pos += 1
+
+    def _value_end(self, keep):
+        """
+        Trouve la fin de la valeur qui commence à la position courante
+
+        Args:
+            keep: Conserve le texte de la valeur dans le tampon (False pour une valeur sautée)
+
+        Returns:
+            int: Indice de fin (exclu) de la valeur dans le tampon
+        """
+        first = self.peek()
+        if not first:
+            raise JSONStreamError("Unexpected end of document")
+
+        i = self.pos
+        if first not in '{["':
+            while True:
+                match = _SCALAR_END_RE.search(self.buffer, i)
+                if match:
+                    return match.start()
+                if self.eof:
+                    return len(self.buffer)
+                i -= self._fill(self.pos if keep else i)
+
+        depth = 0
+        in_string = False
+        while True:
+            if in_string:
+                match = _STRING_RE.search(self.buffer, i)
+                if match and match.group() == '\\':
+                    if match.end() < len(self.buffer):
+                        i = match.end() + 1
+                        continue
+                    # Escape cut at the end of the buffer: resume on the backslash
+                    i = match.start()
+                elif match:
+                    in_string = False
+                    i = match.end()
+                    if depth == 0:
+                        return i
+                    continue
+                else:
+                    i = len(self.buffer)
+            else:
+                match = _STRUCTURE_RE.search(self.buffer, i)
+                if match:
+                    char = match.group()
+                    i = match.end()
+                    if char == '"':
+                        in_string = True
+                    elif char in '{[':
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            return i
+                    continue
+                i = len(self.buffer)
+
+            if self.eof:
+                raise JSONStreamError("Unexpected end of document")
+            i -= self._fill(self.pos if keep else i)
+
+    def read_value(self):
+        """Décode et consomme la valeur courante"""
+        end = self._value_end(keep=True)
+        text = self.buffer[self.pos:end]
+        self.pos = end
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise JSONStreamError(f"Invalid JSON value: {e}") from e
+
+    def skip_value(self):
+        """Consomme la valeur courante sans la décoder"""
+        self.pos = self._value_end(keep=False)
+
+    def enter_key(self, key):
+        """Se positionne sur la valeur de la clé key de l'objet courant"""
+        self.expect('{')
+        if self.peek() == '}':
+            raise JSONStreamError(f"Key '{key}' not found")
+        while True:
+            current_key = self.read_value()
+            self.expect(':')
+            if current_key == key:
+                return
+            self.skip_value()
+            separator = self.peek()
+            if separator == ',':
+                self.pos += 1
+            elif separator == '}':
+                raise JSONStreamError(f"Key '{key}' not found")
+            else:
+                raise JSONStreamError(f"Expected ',' or '}}' but found '{separator or 'end of document'}'")
+
+    def enter_index(self, index):
+        """Se positionne sur l'élément index du tableau courant"""
+        self.expect('[')
+        for _ in range(index):
+            if self.peek() == ']':
+                raise JSONStreamError(f"Index {index} out of range")
+            self.skip_value()
+            self.expect(',')
+        if self.peek() == ']':
+            raise JSONStreamError(f"Index {index} out of range")
+
+    def read_object(self, keys):
+        """Décode l'objet courant en ne conservant que les clés demandées"""
+        self.expect('{')
+        record = {}
+        if self.peek() == '}':
+            self.pos += 1
+            return record
+        while True:
+            key = self.read_value()
+            self.expect(':')
+            if key in keys:
+                record[key] = self.read_value()
+            else:
+                self.skip_value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == '}':
+                return record
+            if separator != ',':
+                raise JSONStreamError(f"Expected ',' or '}}' but found '{separator or 'end of document'}'")
+
+    def read_record(self, keys=None):
+        if keys and self.peek() == '{':
+            return self.read_object(keys)
+        return self.read_value()
+
+
+def iter_json_records(text_chunks, data_path='', selected_keys=None, max_results=0):
+    """
+    Parcourt les enregistrements d'un document JSON au fil de sa lecture
+
+    Args:
+        text_chunks: Itérable de blocs de texte (ex. iter_response_text)
+        data_path: Chemin pointé vers les données ('data.items', indices numériques acceptés)
+        selected_keys: Clés à conserver dans chaque objet (toutes si vide)
+        max_results: Nombre maximum d'enregistrements (0 = illimité) ; la lecture s'arrête dès qu'il est atteint
+
+    Yields:
+        Les éléments du tableau ciblé ; un objet ciblé est produit seul et un scalaire sous la forme {'value': ...}
+
+    Raises:
+        JSONPathFanOut: Une clé du chemin s'applique à un tableau (avant tout enregistrement produit)
+    """
+    reader = _JSONTextReader(text_chunks)
+    keys = set(selected_keys) if selected_keys else None
+
+    for part in [part for part in (data_path or '').split('.') if part]:
+        current = reader.peek()
+        if current == '{':
+            reader.enter_key(part)
+        elif current == '[' and part.isdigit():
+            reader.enter_index(int(part))
+        elif current == '[':
+            raise JSONPathFanOut(f"Path part '{part}' of json_data_path '{data_path}' is read in every element of an array")
+        else:
+            raise JSONStreamError(f"Cannot navigate path part '{part}' in json_data_path '{data_path}'")
+
+    if reader.peek() != '[':
+        value = reader.read_record(keys)
+        yield value if isinstance(value, (dict, list)) else {'value': value}
+        return
+
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+
+    count = 0
+    while True:
+        if max_results and count >= max_results:
+            return
+        yield reader.read_record(keys)
+        count += 1
+
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise JSONStreamError(f"Expected ',' or ']' but found '{separator or 'end of document'}'")
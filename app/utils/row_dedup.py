@@ -0,0 +1,101 @@
+"""
+Dédoublonnage des lignes pendant un import.
+
+Chaque ligne est réduite à une empreinte de 16 octets (ligne complète ou
+colonnes clés) conservée dans un ensemble en mémoire. Au-delà du budget
+mémoire, l'ensemble est déversé dans une base SQLite temporaire sur disque,
+interrogée pour les lignes suivantes : la mémoire reste bornée quelle que soit
+la taille de la source.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+
+# Budget mémoire par défaut de l'ensemble des empreintes
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+# Coût approximatif d'une empreinte dans un set Python (objet bytes + entrée de table)
+_BYTES_PER_DIGEST = 100
+_SEPARATOR = '\x1f'
+
+
+class RowDeduplicator:
+    """
+    Ensemble des lignes déjà vues d'un import
+
+    Args:
+        key_positions: Positions des colonnes formant l'identité d'une ligne ;
+            None pour la ligne complète
+        memory_budget: Octets alloués aux empreintes avant déversement sur disque
+        spill_dir: Répertoire de la base temporaire (répertoire temporaire du système par défaut)
+    """
+
+    def __init__(self, key_positions=None, memory_budget=DEFAULT_MEMORY_BUDGET, spill_dir=None):
+        self.key_positions = list(key_positions) if key_positions else None
+        self.max_entries = max(int(memory_budget) // _BYTES_PER_DIGEST, 1000)
+        self.spill_dir = spill_dir
+        self.duplicates = 0
+        self.spilled = 0
+        self._seen = set()
+        self._db = None
+        self._db_path = None
+
+    def _digest(self, cells):
+        """Empreinte d'une ligne donnée par ses couples (position, valeur), ou None sans clé"""
+        if self.key_positions is None:
+            parts = [f"{position}={value}" for position, value in sorted(cells, key=lambda cell: cell[0])]
+        else:
+            values = dict(cells)
+            parts = [values.get(position) for position in self.key_positions]
+            if all(value is None for value in parts):
+                return None
+            parts = ['' if value is None else str(value) for value in parts]
+        return hashlib.blake2b(_SEPARATOR.join(parts).encode('utf-8'), digest_size=16).digest()
+
+    def is_duplicate(self, cells):
+        """
+        Indique si la ligne a déjà été vue, et l'enregistre sinon
+
+        Les lignes sans aucune valeur dans les colonnes clés ne sont jamais
+        considérées comme des doublons.
+
+        Args:
+            cells: Liste de couples (position, valeur) ; les valeurs sont comparées
+                sous leur forme texte
+        """
+        digest = self._digest(cells)
+        if digest is None:
+            return False
+        if digest in self._seen or (self._db is not None and self._db.execute(
+                'SELECT 1 FROM seen WHERE digest = ?', (digest,)).fetchone()):
+            self.duplicates += 1
+            return True
+        self._seen.add(digest)
+        if len(self._seen) >= self.max_entries:
+            self._spill()
+        return False
+
+    def _spill(self):
+        """Déverse l'ensemble en mémoire dans la base temporaire"""
+        if self._db is None:
+            fd, self._db_path = tempfile.mkstemp(prefix='dedup_', suffix='.sqlite', dir=self.spill_dir)
+            os.close(fd)
+            self._db = sqlite3.connect(self._db_path)
+            self._db.execute('PRAGMA journal_mode = OFF')
+            self._db.execute('PRAGMA synchronous = OFF')
+            self._db.execute('CREATE TABLE seen (digest BLOB PRIMARY KEY) WITHOUT ROWID')
+        self._db.executemany('INSERT INTO seen (digest) VALUES (?)', ((digest,) for digest in self._seen))
+        self._db.commit()
+        self.spilled += len(self._seen)
+        self._seen = set()
+
+    def close(self):
+        """Supprime la base temporaire"""
+        self._seen = set()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+            try:
+                os.remove(self._db_path)
+            except OSError:
+                pass
@@ -0,0 +1,135 @@
+"""
+Inférence du schéma d'un import et conversion des valeurs par colonne.
+
+Le type et le format de date de chaque colonne sont déterminés une seule fois
+sur un échantillon des lignes ; les convertisseurs compilés sont ensuite
+appliqués colonne par colonne sur des blocs de lignes.
+"""
+import ipaddress
+from datetime import datetime
+from functools import lru_cache
+
+# Formats de date reconnus, dans l'ordre de préférence
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%Y')
+# Nombre de lignes examinées pour déterminer les types
+DEFAULT_SAMPLE_SIZE = 1000
+# Nombre de dates converties gardées en cache par colonne
+_DATE_CACHE_SIZE = 4096
+
+# Types déduits du nom d'une colonne
+_NAME_TYPES = {
+    'date': 'date', 'datetime': 'date',
+    'ip': 'ip', 'ipaddress': 'ip', 'ip_address': 'ip',
+    'number': 'number', 'num': 'number', 'level': 'number'
+}
+
+
+def _parse_date(value, date_format):
+    try:
+        datetime.strptime(value, date_format)
+        return True
+    except ValueError:
+        return False
+
+
+def _is_ip(value):
+    try:
+        ipaddress.ip_network(value, strict=False)
+        return True
+    except ValueError:
+        return False
+
+
+def detect_date_format(values, formats=DATE_FORMATS):
+    """
+    Choisit le format de date qui reconnaît le plus de valeurs
+
+    Returns:
+        tuple: (format retenu ou None, nombre de valeurs reconnues)
+    """
+    best_format, best_count = None, 0
+    for date_format in formats:
+        count = sum(1 for value in values if _parse_date(value, date_format))
+        if count > best_count:
+            best_format, best_count = date_format, count
+    return best_format, best_count
+
+
+def infer_column(name, values):
+    """
+    Détermine le type d'une nouvelle colonne et son format de date
+
+    Le nom de la colonne est prioritaire ; sinon une colonne dont toutes les
+    valeurs échantillonnées sont des adresses IP/CIDR ou des dates d'un même
+    format prend ce type. Le type 'number' n'est jamais déduit du contenu : la
+    normalisation en flottant réécrirait des identifiants ('007', codes postaux).
+
+    Args:
+        name: Nom de la colonne
+        values: Valeurs échantillonnées (None et chaînes vides ignorés)
+
+    Returns:
+        tuple: (type, format de date ou None)
+    """
+    samples = [str(value).strip() for value in values if value is not None and str(value).strip()]
+    column_type = _NAME_TYPES.get(name.lower())
+    if column_type:
+        return column_type, date_format_of(samples) if column_type == 'date' else None
+    if not samples:
+        return 'text', None
+    if all(_is_ip(value) for value in samples):
+        return 'ip', None
+    date_format, count = detect_date_format(samples)
+    if date_format and count == len(samples):
+        return 'date', date_format
+    return 'text', None
+
+
+def date_format_of(values):
+    """Retourne le format de date le plus fréquent parmi des valeurs (None si aucune date)"""
+    samples = [str(value) for value in values if value]
+    return detect_date_format(samples)[0]
+
+
+def build_converter(column_type, date_format=None):
+    """
+    Compile la conversion des valeurs d'une colonne en chaînes stockées
+
+    - date : format ISO (AAAA-MM-JJ), en essayant d'abord date_format puis les
+      autres formats connus ; une valeur non reconnue est conservée
+    - number : valeur flottante ; une valeur non numérique est conservée
+    - autres types : valeur inchangée
+
+    Returns:
+        Callable(valeur) -> str
+    """
+    if column_type == 'date':
+        formats = DATE_FORMATS
+        if date_format:
+            formats = (date_format,) + tuple(fmt for fmt in DATE_FORMATS if fmt != date_format)
+
+        # Les mêmes dates reviennent souvent d'une ligne à l'autre
+        @lru_cache(maxsize=_DATE_CACHE_SIZE)
+        def convert_date_text(text):
+            for fmt in formats:
+                try:
+                    return datetime.strptime(text, fmt).strftime('%Y-%m-%d')
+                except ValueError:
+                    continue
+            return text
+
+        def convert_date(value):
+            return convert_date_text(str(value)) if value else str(value)
+        return convert_date
+
+    if column_type == 'number':
+        def convert_number(value):
+            if not value:
+                return str(value)
+            try:
+                return str(float(value))
+            except (ValueError, TypeError):
+                return str(value)
+        return convert_number
+
+    return str
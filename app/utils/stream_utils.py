@@ -0,0 +1,112 @@
+"""
+Utilitaires pour la lecture en flux des réponses HTTP texte (CSV, listes de valeurs).
+"""
+import codecs
+import io
+import itertools
+import re
+
+# Taille des blocs lus sur le réseau
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Taille du préfixe analysé pour détecter le dialecte CSV
+SNIFF_PREFIX_SIZE = 5 * 1024
+
+_CHARSET_RE = re.compile(r'charset\s*=\s*"?([\w.:-]+)"?', re.IGNORECASE)
+
+
+def response_encoding(response, default='utf-8-sig'):
+    """
+    Retourne l'encodage annoncé par l'en-tête Content-Type d'une réponse
+
+    requests applique ISO-8859-1 aux types text/* sans charset ; on préfère
+    UTF-8 (avec suppression du BOM éventuel) lorsque le serveur ne précise rien.
+    """
+    match = _CHARSET_RE.search(response.headers.get('Content-Type', ''))
+    if match:
+        try:
+            return codecs.lookup(match.group(1)).name
+        except LookupError:
+            pass
+    return default
+
+
+def iter_response_text(response, encoding=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Décode une réponse requests (stream=True) bloc par bloc
+
+    Le décodeur incrémental gère les caractères multi-octets coupés entre deux blocs.
+    """
+    decoder = codecs.getincrementaldecoder(encoding or response_encoding(response))(errors='replace')
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if chunk:
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_lines(text_chunks):
+    """
+    Découpe des blocs de texte en lignes en conservant les fins de ligne
+
+    Seul '\\n' sert de séparateur, comme avec open(..., newline=''), pour que
+    csv.reader reconstitue correctement les champs entre guillemets multi-lignes.
+    """
+    pending = ''
+    for chunk in text_chunks:
+        pending += chunk
+        start = 0
+        while True:
+            end = pending.find('\n', start)
+            if end < 0:
+                break
+            yield pending[start:end + 1]
+            start = end + 1
+        pending = pending[start:]
+    if pending:
+        yield pending
+
+
+def peek_prefix(lines, size=SNIFF_PREFIX_SIZE):
+    """
+    Lit des lignes complètes jusqu'à atteindre size caractères, sans les consommer
+
+    Args:
+        lines: Itérable de lignes (flux texte, StringIO, générateur)
+        size: Taille minimale du préfixe
+
+    Returns:
+        tuple: (préfixe, itérateur sur toutes les lignes, préfixe compris)
+    """
+    lines = iter(lines)
+    head = []
+    length = 0
+    for line in lines:
+        head.append(line)
+        length += len(line)
+        if length >= size:
+            break
+    return ''.join(head), itertools.chain(head, lines)
+
+
+def open_text_stream(source, encoding=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Retourne un itérateur de lignes pour une réponse HTTP, une chaîne ou un flux texte
+
+    Args:
+        source: Réponse requests, str, bytes ou objet fichier texte
+        encoding: Encodage forcé (réponses HTTP et bytes uniquement)
+        chunk_size: Taille des blocs réseau
+
+    Returns:
+        Itérateur de lignes avec leurs fins de ligne
+    """
+    if isinstance(source, str):
+        return iter(io.StringIO(source, newline=''))
+    if isinstance(source, bytes):
+        return iter(io.StringIO(source.decode(encoding or 'utf-8-sig', errors='replace'), newline=''))
+    if hasattr(source, 'iter_content'):
+        return iter_lines(iter_response_text(source, encoding, chunk_size))
+    return iter(source)